@@ -0,0 +1,46 @@
+# ai_worker.py
+
+from typing import Any, Callable, Optional
+import queue
+import threading
+import time
+import pygame
+
+# ワーカーの処理が終わったことをメインループに知らせるイベント（result, error を持つ）
+TURN_DONE = pygame.event.custom_type()
+
+class TurnWorker:
+    """
+    AIの打牌や役判定を描画スレッドの外で実行し、結果をpygameのイベントとして送り返すワーカースレッド。
+    min_turn_timeを指定すると、1手がそれより早く終わっても観戦しやすいよう待ってから知らせます。
+    """
+
+    def __init__(self, min_turn_time: float = 0.0):
+        self.min_turn_time = min_turn_time
+        self._jobs: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="ai-turn-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+        self._jobs.put((fn, args))
+
+    def stop(self, timeout: Optional[float] = 1.0) -> None:
+        self._jobs.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            fn, args = job
+            start = time.perf_counter()
+            result = error = None
+            try:
+                result = fn(*args)
+            except Exception as e:
+                error = e
+            remaining = self.min_turn_time - (time.perf_counter() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+            pygame.event.post(pygame.event.Event(TURN_DONE, result=result, error=error))
@@ -0,0 +1,107 @@
+# augmentation.py
+
+from itertools import permutations
+from typing import Dict, Optional
+import numpy as np
+from torch.utils.data import get_worker_info
+from encoder import PLANE_SEAT_WIND, WIND_OFFSET
+from tiles import NUM_TILE_TYPES
+
+NUM_SUIT_PERMUTATIONS = 6
+NUM_SEAT_ROTATIONS = 4
+
+def _suit_permutation_table() -> np.ndarray:
+    """
+    [6, 34] の表。table[p, j] は並べ替え後の牌種jに移る元の牌種です（字牌はそのまま）。
+    """
+    table = np.tile(np.arange(NUM_TILE_TYPES), (NUM_SUIT_PERMUTATIONS, 1))
+    for p, order in enumerate(permutations(range(3))):
+        for new_suit, old_suit in enumerate(order):
+            table[p, new_suit * 9:new_suit * 9 + 9] = np.arange(old_suit * 9, old_suit * 9 + 9)
+    return table
+
+def _seat_rotation_table() -> np.ndarray:
+    """
+    [4, 34] の表。自風の位置（東南西北）をr席分ずらします。
+    """
+    table = np.tile(np.arange(NUM_TILE_TYPES), (NUM_SEAT_ROTATIONS, 1))
+    for r in range(NUM_SEAT_ROTATIONS):
+        table[r, WIND_OFFSET:WIND_OFFSET + 4] = WIND_OFFSET + (np.arange(4) - r) % 4
+    return table
+
+SUIT_PERMUTATIONS = _suit_permutation_table()
+SUIT_PERMUTATIONS_INVERSE = np.argsort(SUIT_PERMUTATIONS, axis=1)
+SEAT_ROTATIONS = _seat_rotation_table()
+
+def apply_symmetry(batch: Dict[str, np.ndarray], suit_ids: np.ndarray,
+                   rotations: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    サンプルごとに萬筒索の入れ替えと席の回転を適用した新しいバッチを返します。
+    特徴プレーンと方策の教師は牌の軸の並べ替えだけで変換し、再エンコードはしません。
+
+    河・副露のプレーンは観測者からの相対席順なので、席の回転は自風の位置をずらすことに相当します。
+
+    Args:
+        batch: 'obs' [B, NUM_PLANES, 34], 'policy' [B, 34], 'action' [B] などを含むバッチ
+        suit_ids: [B] 使う並べ替え（0〜5, 0は恒等）
+        rotations: [B] 自風をずらす席数（0〜3）。Noneなら回転しない
+    """
+    index = SUIT_PERMUTATIONS[suit_ids]
+    out = dict(batch)
+    if 'obs' in batch:
+        obs = np.take_along_axis(batch['obs'], index[:, None, :], axis=2)
+        if rotations is not None:
+            obs[:, PLANE_SEAT_WIND] = np.take_along_axis(obs[:, PLANE_SEAT_WIND], SEAT_ROTATIONS[rotations], axis=1)
+        out['obs'] = obs
+    if 'policy' in batch:
+        out['policy'] = np.take_along_axis(batch['policy'], index, axis=1)
+    if 'action' in batch:
+        actions = batch['action']
+        out['action'] = SUIT_PERMUTATIONS_INVERSE[suit_ids, actions.astype(np.intp)].astype(actions.dtype)
+    return out
+
+def expand_symmetries(batch: Dict[str, np.ndarray], rotate_seats: bool = False) -> Dict[str, np.ndarray]:
+    """
+    全ての並べ替え（6通り、rotate_seatsなら×4席）を適用してバッチを拡張します。
+    """
+    size = len(next(iter(batch.values())))
+    rotations = NUM_SEAT_ROTATIONS if rotate_seats else 1
+    suit_ids = np.repeat(np.arange(NUM_SUIT_PERMUTATIONS), rotations * size)
+    seat_ids = np.tile(np.repeat(np.arange(rotations), size), NUM_SUIT_PERMUTATIONS)
+    repeated = {name: np.concatenate([values] * NUM_SUIT_PERMUTATIONS * rotations) for name, values in batch.items()}
+    return apply_symmetry(repeated, suit_ids, seat_ids if rotate_seats else None)
+
+class SymmetryAugmenter:
+    """
+    バッチの各サンプルにランダムな対称変換をかける変換。
+    trainer.ReplayStoreDataset や iterate_examples の transform として使います。
+    """
+
+    def __init__(self, seed: Optional[int] = None, rotate_seats: bool = True, exhaustive: bool = False):
+        self.seed = seed
+        self.rotate_seats = rotate_seats
+        self.exhaustive = exhaustive
+        self._rng: Optional[np.random.Generator] = None
+
+    @property
+    def rng(self) -> np.random.Generator:
+        if self._rng is None:
+            # DataLoaderのワーカーごとに異なる乱数列を使う
+            info = get_worker_info()
+            worker_id = info.id if info is not None else 0
+            self._rng = np.random.default_rng(None if self.seed is None else [self.seed, worker_id])
+        return self._rng
+
+    def reseed(self, *key: int) -> None:
+        """
+        以降の変換の乱数を seed と key（エポック・ワーカー・バッチ番号など）から決め直します。
+        """
+        self._rng = np.random.default_rng(None if self.seed is None else [self.seed, *key])
+
+    def __call__(self, batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        if self.exhaustive:
+            return expand_symmetries(batch, self.rotate_seats)
+        size = len(next(iter(batch.values())))
+        suit_ids = self.rng.integers(0, NUM_SUIT_PERMUTATIONS, size)
+        rotations = self.rng.integers(0, NUM_SEAT_ROTATIONS, size) if self.rotate_seats else None
+        return apply_symmetry(batch, suit_ids, rotations)
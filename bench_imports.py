@@ -0,0 +1,44 @@
+# bench_imports.py
+# `python -X importtime` でモジュールの読み込み時間を測ります。
+
+from typing import List, Tuple
+import argparse
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ('torch', 'numpy', 'optuna', 'h5py', 'PyQt5', 'pygame')
+
+def import_profile(module: str) -> Tuple[float, List[Tuple[float, str]], List[str]]:
+    """
+    新しいインタプリタでmoduleを読み込み、(合計ミリ秒, [(累積ミリ秒, モジュール名)], 読み込まれた重い依存) を返します。
+    """
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True, env=env)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|', 2)
+        entries.append((int(cumulative) / 1000, name.strip()))
+    total = next((ms for ms, name in entries if name == module), 0.0)
+    output = result.stdout.strip().splitlines()
+    heavy = [name for name in (output[-1] if output else '').split(',') if name]
+    return total, sorted(entries, reverse=True), heavy
+
+def main():
+    parser = argparse.ArgumentParser(description="モジュールの読み込み時間を表示します。")
+    parser.add_argument('modules', nargs='*', default=['marjong'])
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    for module in args.modules:
+        total, entries, heavy = import_profile(module)
+        print(f"{module}: {total:.1f} ms, 重い依存: {', '.join(heavy) or 'なし'}")
+        for ms, name in entries[:args.top]:
+            print(f"  {ms:8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
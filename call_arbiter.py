@@ -0,0 +1,220 @@
+# call_arbiter.py
+# 打牌に対する鳴き（チー・ポン・カン）とロンの受付と優先順位の裁定。
+# marjong（標準ライブラリのみ）からも使うため、numpy・pygameには依存しません。
+# 牌は34種のインデックス（萬子0-8, 筒子9-17, 索子18-26, 字牌27-33）、手牌はその枚数の並びで扱います。
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import asyncio
+import inspect
+
+NUM_TILE_TYPES = 34
+
+# 鳴きの種類（game_record の CALL_* と同じ値）。ロンは裁定のためだけの種類です。
+CALL_RON = 0
+CALL_CHI = 1
+CALL_PON = 2
+CALL_KAN = 3  # 大明槓
+
+# ロン > ポン・カン > チー
+PRIORITY = {CALL_RON: 3, CALL_PON: 2, CALL_KAN: 2, CALL_CHI: 1}
+
+_TERMINALS_AND_HONORS = (0, 8, 9, 17, 18, 26) + tuple(range(27, NUM_TILE_TYPES))
+
+def _is_suited(tile: int) -> bool:
+    return tile < 27
+
+def _melds_only(counts: List[int], start: int = 0) -> bool:
+    """
+    枚数の並びが面子（刻子・順子）だけに分解できるかを調べます。countsは一時的に書き換えます。
+    """
+    tile = start
+    while tile < NUM_TILE_TYPES and counts[tile] == 0:
+        tile += 1
+    if tile == NUM_TILE_TYPES:
+        return True
+    if counts[tile] >= 3:
+        counts[tile] -= 3
+        ok = _melds_only(counts, tile)
+        counts[tile] += 3
+        if ok:
+            return True
+    if _is_suited(tile) and tile % 9 <= 6 and counts[tile + 1] and counts[tile + 2]:
+        for t in (tile, tile + 1, tile + 2):
+            counts[t] -= 1
+        ok = _melds_only(counts, tile)
+        for t in (tile, tile + 1, tile + 2):
+            counts[t] += 1
+        return ok
+    return False
+
+def is_complete(counts: Sequence[int]) -> bool:
+    """
+    和了形（4面子1雀頭・七対子・国士無双）かどうかを判定します。副露分を除いた手牌でも判定できます。
+    """
+    counts = list(counts)
+    total = sum(counts)
+    if total % 3 != 2:
+        return False
+    if total == 14:
+        if sum(1 for c in counts if c == 2) == 7:
+            return True
+        if all(counts[t] for t in _TERMINALS_AND_HONORS) and \
+                sum(counts[t] for t in _TERMINALS_AND_HONORS) == 14:
+            return True
+    for pair in range(NUM_TILE_TYPES):
+        if counts[pair] >= 2:
+            counts[pair] -= 2
+            ok = _melds_only(counts)
+            counts[pair] += 2
+            if ok:
+                return True
+    return False
+
+@dataclass(frozen=True)
+class CallOptions:
+    """
+    ある手牌に対して、どの牌が捨てられたら何ができるかの表。
+    各maskは牌種ごとのビット（1 << 牌）で、chiは牌種ごとのチーの先頭牌の候補です。
+    """
+    ron_mask: int
+    pon_mask: int
+    kan_mask: int
+    chi_mask: int
+    chi: Tuple[Tuple[int, ...], ...]
+
+    @property
+    def any_mask(self) -> int:
+        return self.ron_mask | self.pon_mask | self.kan_mask | self.chi_mask
+
+@lru_cache(maxsize=4096)
+def call_options(counts: bytes) -> CallOptions:
+    """
+    手牌（牌種ごとの枚数を並べたbytes）の鳴き・ロンの表を作ります。同じ手牌の表は使い回します。
+    """
+    ron_mask = pon_mask = kan_mask = chi_mask = 0
+    chi = []
+    waiting = sum(counts) % 3 == 1
+    hand = list(counts)
+    for tile in range(NUM_TILE_TYPES):
+        bit = 1 << tile
+        if counts[tile] >= 2:
+            pon_mask |= bit
+        if counts[tile] >= 3:
+            kan_mask |= bit
+        bases = []
+        if _is_suited(tile):
+            for base in range(max(tile - 2, tile - tile % 9), min(tile, tile - tile % 9 + 6) + 1):
+                if all(counts[t] for t in (base, base + 1, base + 2) if t != tile):
+                    bases.append(base)
+        if bases:
+            chi_mask |= bit
+        chi.append(tuple(bases))
+        if waiting and hand[tile] < 4:
+            hand[tile] += 1
+            if is_complete(hand):
+                ron_mask |= bit
+            hand[tile] -= 1
+    return CallOptions(ron_mask, pon_mask, kan_mask, chi_mask, tuple(chi))
+
+@dataclass(frozen=True)
+class Call:
+    """
+    1席の鳴き・ロンの宣言。baseは面子の先頭牌（チー以外は捨て牌と同じ）です。
+    """
+    seat: int
+    call_type: int
+    tile: int
+    base: int
+
+def meld_tile_indices(call: Call) -> List[int]:
+    """
+    鳴きの面子のうち、手牌から出す牌を返します（捨て牌そのものは含みません）。
+    """
+    if call.call_type == CALL_CHI:
+        tiles = [call.base, call.base + 1, call.base + 2]
+        tiles.remove(call.tile)
+        return tiles
+    return [call.tile] * (3 if call.call_type == CALL_KAN else 2)
+
+def arbitrate(discarder: int, calls: Iterable[Call], num_players: int = 4) -> Optional[Call]:
+    """
+    宣言の中から成立するものを1つ選びます。優先順位が同じなら打牌者の下家から近い席を優先します（頭ハネ）。
+    """
+    return max(calls, default=None,
+               key=lambda call: (PRIORITY[call.call_type], -((call.seat - discarder) % num_players)))
+
+Decider = Callable[[int, List[Call]], Union[Optional[Call], Awaitable[Optional[Call]]]]
+
+class CallArbiter:
+    """
+    席ごとの鳴き・ロンの表を手牌が変わったときだけ引き直し、打牌のたびの判定はビット演算だけで済ませます。
+    何もできない席には問い合わせません。
+    表は和了形かどうかだけを見るため、役やフリテンの確認は can_ron で行います。
+    """
+
+    def __init__(self, num_players: int = 4, timeout: float = 5.0,
+                 can_ron: Optional[Callable[[Call], bool]] = None):
+        self.num_players = num_players
+        self.timeout = timeout  # 人間の席の応答を待つ秒数
+        self.can_ron = can_ron  # ロンの候補を出す前の確認（役・フリテン）
+        self._options: List[Optional[CallOptions]] = [None] * num_players
+
+    def update_hand(self, seat: int, counts: Sequence[int]) -> None:
+        """
+        seatの手牌（牌種ごとの枚数）が変わったときに呼びます。
+        """
+        self._options[seat] = call_options(bytes(counts))
+
+    def options(self, seat: int) -> Optional[CallOptions]:
+        return self._options[seat]
+
+    def candidates(self, discarder: int, tile: int) -> Dict[int, List[Call]]:
+        """
+        捨て牌に対して各席ができる宣言を返します。何もできない席は含みません。
+        """
+        bit = 1 << tile
+        result = {}
+        for offset in range(1, self.num_players):
+            seat = (discarder + offset) % self.num_players
+            options = self._options[seat]
+            if options is None or not options.any_mask & bit:
+                continue
+            calls = []
+            if options.ron_mask & bit:
+                ron = Call(seat, CALL_RON, tile, tile)
+                if self.can_ron is None or self.can_ron(ron):
+                    calls.append(ron)
+            if options.pon_mask & bit:
+                calls.append(Call(seat, CALL_PON, tile, tile))
+            if options.kan_mask & bit:
+                calls.append(Call(seat, CALL_KAN, tile, tile))
+            if offset == 1:  # チーは上家の捨て牌だけ
+                calls.extend(Call(seat, CALL_CHI, tile, base) for base in options.chi[tile])
+            if calls:
+                result[seat] = calls
+        return result
+
+    async def collect(self, discarder: int, tile: int, deciders: Dict[int, Decider]) -> Optional[Call]:
+        """
+        宣言できる席のdeciderに同時に問い合わせ、成立する宣言を返します。
+        deciderは (席, 候補) を受け取り、宣言（見送りはNone）かそれを返すawaitableを返します。
+        awaitable（人間の席）は timeout 秒で見送りとみなします。
+        """
+        candidates = self.candidates(discarder, tile)
+
+        async def decide(seat: int, calls: List[Call]) -> Optional[Call]:
+            decider = deciders.get(seat)
+            if decider is None:
+                return None
+            decision = decider(seat, calls)
+            if inspect.isawaitable(decision):
+                try:
+                    decision = await asyncio.wait_for(decision, self.timeout)
+                except asyncio.TimeoutError:
+                    return None
+            return decision if decision in calls else None
+
+        decisions = await asyncio.gather(*(decide(seat, calls) for seat, calls in candidates.items()))
+        return arbitrate(discarder, [call for call in decisions if call is not None], self.num_players)
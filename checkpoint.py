@@ -0,0 +1,119 @@
+# checkpoint.py
+
+from typing import Any, Dict, List, Optional
+import os
+import random
+import re
+import tempfile
+import numpy as np
+import torch
+
+def atomic_save(obj: Any, path: str) -> None:
+    """
+    同じディレクトリの一時ファイルに書き込んでからrenameし、途中状態のファイルを残さないようにします。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            torch.save(obj, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)  # renameそのものをディスクに反映する
+    finally:
+        os.close(dir_fd)
+
+def capture_rng_state() -> Dict[str, Any]:
+    state = {
+        'python': random.getstate(),
+        'numpy': np.random.get_state(),
+        'torch': torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state['cuda'] = torch.cuda.get_rng_state_all()
+    return state
+
+def restore_rng_state(state: Dict[str, Any]) -> None:
+    random.setstate(state['python'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'])
+    if 'cuda' in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+
+def export_weights(model: torch.nn.Module, path: str, version: int) -> None:
+    """
+    推論ワーカー向けに重みだけを書き出します（オプティマイザや乱数状態は含めません）。
+    """
+    state_dict = {key: value.detach().cpu() for key, value in model.state_dict().items()}
+    atomic_save({'version': version, 'state_dict': state_dict}, path)
+
+def load_weights(path: str) -> Dict[str, Any]:
+    return torch.load(path, map_location='cpu')
+
+class CheckpointManager:
+    """
+    学習状態（モデル・オプティマイザ・乱数・リプレイの読み出し位置）を定期保存し、直近N個を残します。
+    """
+
+    _PATTERN = re.compile(r'^checkpoint-(\d+)\.pt$')
+
+    def __init__(self, directory: str, keep_last: int = 3):
+        self.directory = directory
+        self.keep_last = keep_last
+        os.makedirs(directory, exist_ok=True)
+
+    def checkpoints(self) -> List[str]:
+        """
+        保存済みのチェックポイントをステップ順に返します。
+        """
+        found = []
+        for name in os.listdir(self.directory):
+            match = self._PATTERN.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return [path for _, path in sorted(found)]
+
+    def latest(self) -> Optional[str]:
+        paths = self.checkpoints()
+        return paths[-1] if paths else None
+
+    def save(self, step: int, model: torch.nn.Module, optimizer: Optional[torch.optim.Optimizer] = None,
+             replay_cursor: Any = None, extra: Optional[Dict[str, Any]] = None) -> str:
+        path = os.path.join(self.directory, f"checkpoint-{step:08d}.pt")
+        atomic_save({
+            'step': step,
+            'model': model.state_dict(),
+            'optimizer': optimizer.state_dict() if optimizer is not None else None,
+            'rng': capture_rng_state(),
+            'replay_cursor': replay_cursor,
+            'extra': extra or {},
+        }, path)
+        for old in self.checkpoints()[:-self.keep_last]:
+            os.remove(old)
+        return path
+
+    def restore(self, model: torch.nn.Module, optimizer: Optional[torch.optim.Optimizer] = None,
+                path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        チェックポイント（省略時は最新）から学習状態を復元します。無ければNoneを返します。
+
+        Returns:
+            Optional[Dict[str, Any]]: step, replay_cursor, extra を含む辞書
+        """
+        path = path or self.latest()
+        if path is None:
+            return None
+        checkpoint = torch.load(path, map_location='cpu', weights_only=False)
+        model.load_state_dict(checkpoint['model'])
+        if optimizer is not None and checkpoint['optimizer'] is not None:
+            optimizer.load_state_dict(checkpoint['optimizer'])
+        restore_rng_state(checkpoint['rng'])
+        return {key: checkpoint[key] for key in ('step', 'replay_cursor', 'extra')}
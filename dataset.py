@@ -0,0 +1,242 @@
+# dataset.py
+
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import queue
+import threading
+import h5py
+import numpy as np
+from game_record import EVENT_DTYPE
+
+# 列名 -> (1行あたりの形状, dtype)
+ColumnSpec = Dict[str, Tuple[Tuple[int, ...], np.dtype]]
+
+# 対局記録イベントをそのまま列に分解したスキーマ
+RECORD_COLUMNS: ColumnSpec = {name: ((), EVENT_DTYPE[name]) for name in EVENT_DTYPE.names}
+
+OFFSETS_KEY = 'game_offsets'
+
+class ChunkedDatasetWriter:
+    """
+    チャンク化・圧縮・可変長のHDF5データセットに1局ずつ追記するライター。
+    """
+
+    def __init__(self, path: str, columns: ColumnSpec = RECORD_COLUMNS, chunk_rows: int = 8192,
+                 compression: Optional[str] = 'gzip', compression_opts: Optional[int] = 4):
+        self.path = path
+        self.columns = columns
+        self.file = h5py.File(path, 'a')
+        for name, (shape, dtype) in columns.items():
+            if name in self.file:
+                if self.file[name].shape[1:] != tuple(shape):
+                    raise ValueError(f"列 {name} の形状が既存ファイルと一致しません")
+                continue
+            self.file.create_dataset(
+                name, shape=(0,) + tuple(shape), maxshape=(None,) + tuple(shape), dtype=dtype,
+                chunks=(chunk_rows,) + tuple(shape), compression=compression,
+                compression_opts=compression_opts if compression == 'gzip' else None, shuffle=True,
+            )
+        if OFFSETS_KEY not in self.file:
+            offsets = self.file.create_dataset(OFFSETS_KEY, shape=(1,), maxshape=(None,), dtype=np.int64,
+                                               chunks=(4096,))
+            offsets[0] = 0
+
+    def __len__(self) -> int:
+        return int(self.file[OFFSETS_KEY][-1])
+
+    @property
+    def num_games(self) -> int:
+        return self.file[OFFSETS_KEY].shape[0] - 1
+
+    def append_game(self, **arrays: np.ndarray) -> None:
+        """
+        1局分の各列を追記します。すべての列の行数は一致している必要があります。
+        """
+        missing = set(self.columns) - set(arrays)
+        if missing:
+            raise ValueError(f"列が不足しています: {sorted(missing)}")
+        lengths = {len(arrays[name]) for name in self.columns}
+        if len(lengths) != 1:
+            raise ValueError("列ごとの行数が一致しません")
+        rows = lengths.pop()
+        start = len(self)
+        for name in self.columns:
+            data = self.file[name]
+            data.resize(start + rows, axis=0)
+            data[start:start + rows] = arrays[name]
+        offsets = self.file[OFFSETS_KEY]
+        offsets.resize(offsets.shape[0] + 1, axis=0)
+        offsets[-1] = start + rows
+
+    def append_events(self, events: np.ndarray) -> None:
+        """
+        対局記録のイベント列（EVENT_DTYPE）を1局として追記します。
+        """
+        self.append_game(**{name: events[name] for name in EVENT_DTYPE.names})
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+
+    def __enter__(self) -> ChunkedDatasetWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+class ChunkedDatasetReader:
+    """
+    チャンク単位で読み出すストリーミングリーダー。ファイル全体をメモリに載せません。
+    """
+
+    def __init__(self, path: str, columns: Optional[Sequence[str]] = None):
+        self.path = path
+        self.file = h5py.File(path, 'r')
+        names = [name for name in self.file.keys() if name != OFFSETS_KEY]
+        self.columns: List[str] = list(columns) if columns is not None else names
+        self.offsets = self.file[OFFSETS_KEY][:]  # 対局数ぶんの小さな配列
+        first = self.file[self.columns[0]]
+        self.chunk_rows = first.chunks[0] if first.chunks else max(len(first), 1)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def num_games(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def num_chunks(self) -> int:
+        return (len(self) + self.chunk_rows - 1) // self.chunk_rows
+
+    def read(self, start: int, stop: int, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        [start, stop) の行を読み出します。
+        """
+        with self._lock:
+            return {name: self.file[name][start:stop] for name in (columns or self.columns)}
+
+    def read_chunk(self, index: int, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        index番目のチャンクをチャンク境界に揃えて読み出します。
+        """
+        start = index * self.chunk_rows
+        return self.read(start, min(start + self.chunk_rows, len(self)), columns)
+
+    def game(self, index: int, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        index番目の対局の全行を読み出します。
+        """
+        return self.read(int(self.offsets[index]), int(self.offsets[index + 1]), columns)
+
+    def take(self, indices: Sequence[int], columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        任意の行を読み出します。必要なチャンクだけを1回ずつ読み、元の順序で返します。
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        columns = columns or self.columns
+        result = {name: None for name in columns}
+        chunk_ids = indices // self.chunk_rows
+        for chunk_id in np.unique(chunk_ids):
+            positions = np.flatnonzero(chunk_ids == chunk_id)
+            chunk = self.read_chunk(int(chunk_id), columns)
+            local = indices[positions] - chunk_id * self.chunk_rows
+            for name in columns:
+                if result[name] is None:
+                    result[name] = np.empty((len(indices),) + chunk[name].shape[1:], dtype=chunk[name].dtype)
+                result[name][positions] = chunk[name][local]
+        return result
+
+    def iter_batches(self, batch_size: int, columns: Optional[Sequence[str]] = None, shuffle: bool = True,
+                     seed: Optional[int] = None, prefetch: int = 4, shuffle_chunks: int = 8,
+                     drop_last: bool = False, chunk_ids: Optional[Sequence[int]] = None, start: int = 0
+                     ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        ミニバッチを順に返します。読み出しは別スレッドで行い、最大prefetch個まで先読みします。
+        shuffle時はチャンク順を入れ替え、shuffle_chunks個ぶんのチャンクを混ぜてから切り出します。
+        chunk_idsを指定するとそのチャンクだけを読みます（ワーカー間での分担用）。
+        startを指定すると、同じseedで先頭から数えてstart個目のバッチから返します（学習の再開用）。
+        飛ばすバッチだけでできていて次へ持ち越す行もないチャンクの組は、読まずに乱数だけを進めます。
+        """
+        columns = list(columns or self.columns)
+        rng = np.random.default_rng(seed)
+        batches: queue.Queue = queue.Queue(maxsize=max(prefetch, 1))
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def producer():
+            try:
+                order = np.arange(self.num_chunks) if chunk_ids is None else np.asarray(chunk_ids)
+                if shuffle:
+                    order = rng.permutation(order)
+                group = shuffle_chunks if shuffle else 1
+                carry = None
+                skip = start
+                for begin in range(0, len(order), group):
+                    ids = order[begin:begin + group]
+                    if skip:
+                        rows = sum(min(self.chunk_rows, len(self) - int(i) * self.chunk_rows) for i in ids)
+                        rows += len(carry[columns[0]]) if carry is not None else 0
+                        if rows % batch_size == 0 and skip >= rows // batch_size:
+                            if shuffle:
+                                rng.permutation(rows)
+                            skip -= rows // batch_size
+                            carry = None
+                            continue
+                    parts = [self.read_chunk(int(i), columns) for i in ids]
+                    if carry is not None:
+                        parts.insert(0, carry)
+                    pool = {name: np.concatenate([p[name] for p in parts]) for name in columns}
+                    rows = len(pool[columns[0]])
+                    if shuffle:
+                        perm = rng.permutation(rows)
+                        pool = {name: values[perm] for name, values in pool.items()}
+                    full = rows - rows % batch_size
+                    for b in range(0, full, batch_size):
+                        if skip:
+                            skip -= 1
+                        elif not put({name: values[b:b + batch_size] for name, values in pool.items()}):
+                            return
+                    carry = {name: values[full:] for name, values in pool.items()} if full < rows else None
+                if carry is not None and not drop_last and not skip:
+                    put(carry)
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+
+        worker = threading.Thread(target=producer, daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            worker.join()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> ChunkedDatasetReader:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
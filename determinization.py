@@ -0,0 +1,138 @@
+# determinization.py
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+import numpy as np
+from game_record import ReplayState
+from tiles import NUM_TILE_TYPES, tile_to_index
+
+@dataclass
+class VisibleState:
+    """
+    ある席から見える情報。相手の手牌と山は含みません。
+    """
+    seat: int
+    hand: np.ndarray                     # [34] 自分の手牌の枚数
+    discards: np.ndarray                 # [4, 34] 各席の河の枚数
+    melds: np.ndarray                    # [4, 34] 各席の副露の枚数
+    dora_indicators: List[int] = field(default_factory=list)
+    hand_sizes: List[int] = field(default_factory=lambda: [13, 13, 13, 13])  # 各席の手牌（副露を除く）の枚数
+
+    def unseen_counts(self) -> np.ndarray:
+        """
+        見えていない牌（相手の手牌・山・王牌）の牌種ごとの枚数。
+        """
+        seen = self.hand + self.discards.sum(axis=0) + self.melds.sum(axis=0)
+        seen = seen + np.bincount(np.asarray(self.dora_indicators, dtype=np.intp), minlength=NUM_TILE_TYPES)
+        return np.clip(4 - seen, 0, 4).astype(np.int64)
+
+    @property
+    def opponents(self) -> List[int]:
+        return [seat for seat in range(len(self.hand_sizes)) if seat != self.seat]
+
+def visible_state_from_game(game, seat: int) -> VisibleState:
+    """
+    game.MahjongGame の現在の局面から、指定席に見える情報を取り出します。
+    """
+    hand = np.zeros(NUM_TILE_TYPES, dtype=np.int64)
+    discards = np.zeros((4, NUM_TILE_TYPES), dtype=np.int64)
+    for tile in game.players[seat].hand:
+        hand[tile_to_index(tile)] += 1
+    for player in game.players:
+        for tile in player.discards:
+            discards[player.seat, tile_to_index(tile)] += 1
+    return VisibleState(seat, hand, discards, np.zeros((4, NUM_TILE_TYPES), dtype=np.int64),
+                        hand_sizes=[len(player.hand) for player in game.players])
+
+def visible_state_from_replay(state: ReplayState, seat: int) -> VisibleState:
+    """
+    game_record.replay で復元した局面から、指定席に見える情報を取り出します。
+    """
+    discards = np.zeros((4, NUM_TILE_TYPES), dtype=np.int64)
+    for other, river in enumerate(state.rivers):
+        discards[other] = np.bincount(np.asarray(river, dtype=np.intp), minlength=NUM_TILE_TYPES)
+    hand_sizes = [int(state.hands[other].sum()) for other in range(state.num_players)]
+    return VisibleState(seat, state.hands[seat].astype(np.int64), discards, state.melds.astype(np.int64),
+                        list(state.dora_indicators), hand_sizes)
+
+def discard_weights(state: VisibleState, strength: float = 0.7) -> np.ndarray:
+    """
+    河に基づく簡易的な相手モデル。自分で切った牌種と、その牌の筋（±3）は手牌に残っている可能性が低いとみなします。
+
+    Returns:
+        np.ndarray: [4, 34] 各席が各牌種を持っている相対的な尤度
+    """
+    weights = np.ones((len(state.hand_sizes), NUM_TILE_TYPES))
+    for seat in state.opponents:
+        discarded = state.discards[seat] > 0
+        suji = np.zeros(NUM_TILE_TYPES, dtype=bool)
+        for suit in range(3):
+            block = discarded[suit * 9:suit * 9 + 9]
+            suji[suit * 9:suit * 9 + 6] |= block[3:]
+            suji[suit * 9 + 3:suit * 9 + 9] |= block[:6]
+        weights[seat, suji] *= 1 - strength / 2
+        weights[seat, discarded] *= 1 - strength
+    return weights
+
+@dataclass
+class Determinizations:
+    """
+    サンプリングした完全情報の局面 num_samples 件。
+    """
+    hands: np.ndarray   # [N, 4, 34] 各席の手牌の枚数（自分の席は実際の手牌）
+    walls: np.ndarray   # [N, W] 残りの牌を引く順に並べた牌種インデックス
+
+class DeterminizationSampler:
+    """
+    見えている情報と矛盾しない相手の手牌と山を、まとめてNumPy配列にサンプリングします。
+    seedを固定すると同じ列が再現されます。
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self, state: VisibleState, num_samples: int, weights: Optional[np.ndarray] = None
+               ) -> Determinizations:
+        """
+        Args:
+            state (VisibleState): 観測者から見える情報
+            num_samples (int): サンプル数
+            weights (Optional[np.ndarray]): [4, 34] 相手モデルによる牌種ごとの尤度（discard_weights など）。
+                Noneなら見えていない牌を一様に配ります
+
+        Returns:
+            Determinizations: サンプリング結果
+        """
+        unseen = np.repeat(np.arange(NUM_TILE_TYPES), state.unseen_counts())
+        opponents = state.opponents
+        needed = sum(state.hand_sizes[seat] for seat in opponents)
+        if needed > len(unseen):
+            raise ValueError(f"相手の手牌 {needed} 枚が見えていない牌 {len(unseen)} 枚を超えています")
+
+        pool = np.broadcast_to(unseen, (num_samples, len(unseen)))
+        hands = np.zeros((num_samples, len(state.hand_sizes), NUM_TILE_TYPES), dtype=np.int8)
+        hands[:, state.seat] = state.hand
+        rows = np.arange(num_samples)[:, None]
+        if weights is None:
+            order = self.rng.permuted(np.broadcast_to(np.arange(len(unseen)), pool.shape), axis=1)
+            start = 0
+            for seat in opponents:
+                taken = order[:, start:start + state.hand_sizes[seat]]
+                np.add.at(hands, (rows, seat, pool[rows, taken]), 1)
+                start += state.hand_sizes[seat]
+            return Determinizations(hands, pool[rows, order[:, start:]].astype(np.int8))
+
+        # 重み付き非復元抽出（Efraimidis-Spirakis）: キー log(u)/w の大きい順に取る
+        log_u = np.log(self.rng.random(pool.shape))
+        available = np.ones(pool.shape, dtype=bool)
+        for seat in opponents:
+            size = state.hand_sizes[seat]
+            if size == 0:
+                continue
+            keys = np.where(available, log_u / np.maximum(weights[seat][pool], 1e-12), -np.inf)
+            taken = np.argpartition(-keys, size - 1, axis=1)[:, :size]
+            np.add.at(hands, (rows, seat, pool[rows, taken]), 1)
+            available[rows, taken] = False
+        remaining = np.where(available, self.rng.random(pool.shape), np.inf)
+        order = np.argsort(remaining, axis=1)[:, :len(unseen) - needed]
+        return Determinizations(hands, pool[rows, order].astype(np.int8))
@@ -0,0 +1,144 @@
+# dqn.py
+
+from typing import Dict, Optional
+import argparse
+import copy
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from checkpoint import export_weights
+from encoder import OBS_SIZE, PLANE_HAND, PLANE_SCALE, samples_from_events
+from game_record import EVENT_DISCARD, read_events, split_games
+from models import QNetwork
+from replay_buffer import PrioritizedReplayBuffer
+from tiles import NUM_TILE_TYPES
+from trainer import TrainStats
+
+def q_input(obs: torch.Tensor) -> torch.Tensor:
+    """
+    uint8の特徴プレーン [B, NUM_PLANES, 34] をQNetworkの平坦な入力に変換します。
+    """
+    scale = torch.from_numpy(PLANE_SCALE).to(obs.device)
+    return (obs.float() * scale[:, None]).flatten(1)
+
+def transitions_from_events(events: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    1局分のイベント列を遷移に変換します。
+    次状態は同じ席の次の打牌局面で、各席の最後の打牌が終局結果（和了1、放銃・他家和了-1、流局0）を報酬とする終端です。
+    """
+    samples = samples_from_events(events)
+    events = np.asarray(events)
+    seats = events['seat'][events['kind'] == EVENT_DISCARD].astype(np.intp)
+    count = len(seats)
+    next_index = np.arange(count)
+    dones = np.ones(count, dtype=bool)
+    for seat in np.unique(seats):
+        positions = np.flatnonzero(seats == seat)
+        next_index[positions[:-1]] = positions[1:]
+        dones[positions[:-1]] = False
+    rewards = np.where(dones, samples['value'], 0.0).astype(np.float32)
+    return {'obs': samples['obs'], 'actions': samples['action'], 'rewards': rewards,
+            'next_index': next_index, 'dones': dones}
+
+def fill_from_records(buffer: PrioritizedReplayBuffer, path: str) -> int:
+    """
+    対局記録ファイルの全対局を遷移としてバッファに追加し、追加した件数を返します。
+    """
+    events = read_events(path)
+    added = 0
+    for game in split_games(events):
+        transitions = transitions_from_events(events[game])
+        if len(transitions['actions']):
+            buffer.add_batch(**transitions)
+            added += len(transitions['actions'])
+    return added
+
+class DQNTrainer:
+    """
+    優先度付き経験再生からQNetworkを学習するDouble DQN。
+    ターゲットネットワークはtarget_updateステップごとに同期します。
+    """
+
+    def __init__(self, model: nn.Module, optimizer: torch.optim.Optimizer, buffer: PrioritizedReplayBuffer,
+                 gamma: float = 0.99, target_update: int = 1000, device: Optional[torch.device] = None):
+        self.device = device or next(model.parameters()).device
+        self.model = model.to(self.device)
+        self.target = copy.deepcopy(model).to(self.device).eval()
+        self.optimizer = optimizer
+        self.buffer = buffer
+        self.gamma = gamma
+        self.target_update = target_update
+        self.steps = 0
+
+    def train_step(self, batch_size: int, beta: float = 0.4) -> float:
+        batch, indices, weights = self.buffer.sample(batch_size, beta)
+        obs = torch.from_numpy(batch['obs']).to(self.device)
+        next_obs = torch.from_numpy(batch['next_obs']).to(self.device)
+        actions = torch.from_numpy(batch['action'].astype(np.int64)).to(self.device)
+        rewards = torch.from_numpy(batch['reward']).to(self.device)
+        dones = torch.from_numpy(batch['done']).to(self.device)
+
+        self.model.train()
+        q = self.model(q_input(obs)).gather(1, actions[:, None]).squeeze(1)
+        with torch.no_grad():
+            # 次の局面で手牌にある牌だけが打牌候補
+            legal = next_obs[:, PLANE_HAND] > 0
+            next_actions = self.model(q_input(next_obs)).masked_fill(~legal, float('-inf')).argmax(1, keepdim=True)
+            next_q = self.target(q_input(next_obs)).gather(1, next_actions).squeeze(1)
+            target = rewards + self.gamma * next_q * (~dones).float()
+        td_errors = target - q
+        loss = (torch.from_numpy(weights).to(self.device) * F.smooth_l1_loss(q, target, reduction='none')).mean()
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+        self.buffer.update_priorities(indices, td_errors.detach().cpu().numpy())
+
+        self.steps += 1
+        if self.steps % self.target_update == 0:
+            self.target.load_state_dict(self.model.state_dict())
+        return loss.item()
+
+    def fit(self, steps: int, batch_size: int = 256, beta_start: float = 0.4, log_every: int = 0) -> TrainStats:
+        """
+        stepsステップ学習します。重要度重みの指数betaは1まで線形に増やします。
+        """
+        stats = TrainStats()
+        start = time.perf_counter()
+        total_loss = 0.0
+        for step in range(steps):
+            beta = beta_start + (1.0 - beta_start) * step / max(steps - 1, 1)
+            total_loss += self.train_step(batch_size, beta)
+            stats.steps += 1
+            stats.samples += batch_size
+            if log_every and stats.steps % log_every == 0:
+                print(f"ステップ {self.steps}: 損失 {total_loss / stats.steps:.4f}")
+        stats.seconds = time.perf_counter() - start
+        stats.loss = total_loss / max(stats.steps, 1)
+        return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="対局記録からQNetworkをDQNで学習します。")
+    parser.add_argument('records', nargs='+', help="game_record 形式の対局記録")
+    parser.add_argument('output', help="checkpoint.export_weights 形式の重みの書き出し先")
+    parser.add_argument('--capacity', type=int, default=4_000_000)
+    parser.add_argument('--steps', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--lr', type=float, default=1e-4)
+    parser.add_argument('--gamma', type=float, default=0.99)
+    parser.add_argument('--target-update', type=int, default=1000)
+    args = parser.parse_args()
+
+    buffer = PrioritizedReplayBuffer(args.capacity)
+    for path in args.records:
+        print(f"{path}: {fill_from_records(buffer, path)} 件の遷移を読み込みました")
+    model = QNetwork(OBS_SIZE, NUM_TILE_TYPES)
+    trainer = DQNTrainer(model, torch.optim.Adam(model.parameters(), lr=args.lr), buffer,
+                         gamma=args.gamma, target_update=args.target_update)
+    stats = trainer.fit(args.steps, args.batch_size, log_every=1000)
+    print(f"損失 {stats.loss:.4f}, {stats.samples_per_second:.0f} samples/s")
+    export_weights(model, args.output, version=trainer.steps)
+
+if __name__ == "__main__":
+    main()
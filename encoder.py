@@ -0,0 +1,221 @@
+# encoder.py
+
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+import numpy as np
+import torch
+from tiles import NUM_TILE_TYPES, tile_to_index
+from game_record import (EVENT_GAME_START, EVENT_DEAL, EVENT_DRAW, EVENT_DISCARD, EVENT_CALL,
+                         EVENT_DORA, EVENT_WIN, apply_call)
+
+# 特徴プレーンの構成（各プレーンは34種の牌に対応）
+PLANE_HAND = 0          # 自分の手牌（1枚以上, 2枚以上, 3枚以上, 4枚）
+PLANE_RIVER = 4         # 河の枚数（自分から見た相対席順で4人分）
+PLANE_RIVER_ORDER = 8   # 河で最後に切られた巡目（1始まり, 0は未打牌）
+PLANE_MELD = 12         # 副露の枚数（相対席順で4人分）
+PLANE_DORA = 16         # ドラの枚数
+PLANE_SEAT_WIND = 17    # 自風の位置
+PLANE_ROUND_WIND = 18   # 場風の位置
+NUM_PLANES = 19
+OBS_SIZE = NUM_PLANES * NUM_TILE_TYPES
+
+MAX_RIVER = 32
+MAX_DORA = 5
+WIND_OFFSET = 27  # 東のインデックス
+
+# プレーンはuint8で保持し、モデル側でこの係数を掛けて正規化する
+PLANE_SCALE = np.ones(NUM_PLANES, dtype=np.float32)
+PLANE_SCALE[PLANE_RIVER:PLANE_RIVER + 4] = 1 / 4
+PLANE_SCALE[PLANE_RIVER_ORDER:PLANE_RIVER_ORDER + 4] = 1 / 24
+PLANE_SCALE[PLANE_MELD:PLANE_MELD + 4] = 1 / 4
+PLANE_SCALE[PLANE_DORA] = 1 / 4
+
+# 学習データストア（dataset.ChunkedDatasetWriter）用のスキーマ
+SAMPLE_COLUMNS = {
+    'obs': ((NUM_PLANES, NUM_TILE_TYPES), np.uint8),
+    'policy': ((NUM_TILE_TYPES,), np.float32),
+    'value': ((), np.float32),
+    'action': ((), np.int16),
+}
+
+def _next_dora_table() -> np.ndarray:
+    table = np.empty(NUM_TILE_TYPES, dtype=np.intp)
+    for index in range(27):
+        table[index] = index // 9 * 9 + (index % 9 + 1) % 9
+    for index in range(27, 31):
+        table[index] = 27 + (index - 27 + 1) % 4  # 東南西北
+    for index in range(31, 34):
+        table[index] = 31 + (index - 31 + 1) % 3  # 白發中
+    return table
+
+DORA_FROM_INDICATOR = _next_dora_table()
+
+class ObservationEncoder:
+    """
+    局面の配列表現をまとめて特徴プレーン [B, NUM_PLANES, 34] に変換するエンコーダー。
+    出力先のバッファは事前確保して使い回すため、返した配列は次の呼び出しで上書きされます。
+    """
+
+    def __init__(self, max_batch_size: int = 256, pin_memory: Optional[bool] = None):
+        if pin_memory is None:
+            pin_memory = torch.cuda.is_available()
+        shape = (max_batch_size, NUM_PLANES, NUM_TILE_TYPES)
+        if pin_memory:
+            self._tensor = torch.empty(shape, dtype=torch.uint8).pin_memory()
+            self._buffer = self._tensor.numpy()
+        else:
+            self._buffer = np.empty(shape, dtype=np.uint8)
+        self.max_batch_size = max_batch_size
+        self._flat_rivers = np.zeros(max_batch_size * 4 * NUM_TILE_TYPES, dtype=np.uint8)
+
+    def encode_batch(self, hands: np.ndarray, rivers: np.ndarray, melds: np.ndarray,
+                     dora_indicators: np.ndarray, seats: np.ndarray, dealers: np.ndarray,
+                     round_winds: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            hands: [B, 34] 観測者の手牌の枚数
+            rivers: [B, 4, R] 絶対席順の河（牌種インデックス, 未使用は-1）
+            melds: [B, 4, 34] 絶対席順の副露の枚数
+            dora_indicators: [B, D] ドラ表示牌（未使用は-1）
+            seats, dealers, round_winds: [B] 観測者の席, 親の席, 場風（0=東）
+
+        Returns:
+            np.ndarray: [B, NUM_PLANES, 34] のuint8配列（内部バッファのビュー）
+        """
+        batch = len(hands)
+        if batch > self.max_batch_size:
+            raise ValueError(f"バッチサイズ {batch} が上限 {self.max_batch_size} を超えています")
+        out = self._buffer[:batch]
+        out.fill(0)
+        rows = np.arange(batch)
+
+        hands = np.asarray(hands)
+        for k in range(4):
+            out[:, PLANE_HAND + k] = hands > k
+
+        # 観測者から見た相対席順に並べ替える
+        order = (np.asarray(seats)[:, None] + np.arange(4)) % 4
+        rivers = np.take_along_axis(np.asarray(rivers), order[:, :, None], axis=1)
+        out[:, PLANE_MELD:PLANE_MELD + 4] = np.take_along_axis(np.asarray(melds), order[:, :, None], axis=1)
+
+        valid = rivers >= 0
+        slot = (rows[:, None, None] * 4 + np.arange(4)[None, :, None]) * NUM_TILE_TYPES + rivers
+        slot = slot[valid]
+        counts = np.bincount(slot, minlength=batch * 4 * NUM_TILE_TYPES)
+        out[:, PLANE_RIVER:PLANE_RIVER + 4] = counts.reshape(batch, 4, NUM_TILE_TYPES)
+        recency = self._flat_rivers[:batch * 4 * NUM_TILE_TYPES]
+        recency.fill(0)
+        position = np.broadcast_to(np.arange(1, rivers.shape[2] + 1, dtype=np.uint8), rivers.shape)
+        np.maximum.at(recency, slot, position[valid])
+        out[:, PLANE_RIVER_ORDER:PLANE_RIVER_ORDER + 4] = recency.reshape(batch, 4, NUM_TILE_TYPES)
+
+        dora_indicators = np.asarray(dora_indicators)
+        has_dora = dora_indicators >= 0
+        dora = DORA_FROM_INDICATOR[np.where(has_dora, dora_indicators, 0)]
+        dora_counts = np.bincount((rows[:, None] * NUM_TILE_TYPES + dora)[has_dora],
+                                  minlength=batch * NUM_TILE_TYPES)
+        out[:, PLANE_DORA] = dora_counts.reshape(batch, NUM_TILE_TYPES)
+
+        seat_winds = (np.asarray(seats) - np.asarray(dealers)) % 4
+        out[rows, PLANE_SEAT_WIND, WIND_OFFSET + seat_winds] = 1
+        out[rows, PLANE_ROUND_WIND, WIND_OFFSET + np.asarray(round_winds)] = 1
+        return out
+
+    def encode_tensor(self, *args, **kwargs) -> torch.Tensor:
+        """
+        encode_batch の結果をコピーせずにtorchテンソルとして返します。
+        """
+        return torch.from_numpy(self.encode_batch(*args, **kwargs))
+
+def empty_state_arrays(batch: int) -> Dict[str, np.ndarray]:
+    """
+    encode_batch に渡す配列一式をゼロ（河・ドラは-1）で確保します。
+    """
+    return {
+        'hands': np.zeros((batch, NUM_TILE_TYPES), dtype=np.int8),
+        'rivers': np.full((batch, 4, MAX_RIVER), -1, dtype=np.int8),
+        'melds': np.zeros((batch, 4, NUM_TILE_TYPES), dtype=np.int8),
+        'dora_indicators': np.full((batch, MAX_DORA), -1, dtype=np.int8),
+        'seats': np.zeros(batch, dtype=np.intp),
+        'dealers': np.zeros(batch, dtype=np.intp),
+        'round_winds': np.zeros(batch, dtype=np.intp),
+    }
+
+def state_arrays_from_game(game, seat: int) -> Dict[str, np.ndarray]:
+    """
+    game.MahjongGame の現在の局面を、指定席から見た1件分の配列表現にします。
+    """
+    arrays = empty_state_arrays(1)
+    for tile in game.players[seat].hand:
+        arrays['hands'][0, tile_to_index(tile)] += 1
+    for player in game.players:
+        river = [tile_to_index(tile) for tile in player.discards][-MAX_RIVER:]
+        arrays['rivers'][0, player.seat, :len(river)] = river
+    arrays['seats'][0] = seat
+    arrays['dealers'][0] = game.determine_first_player()
+    return arrays
+
+def decision_points(events: np.ndarray) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+    """
+    1局分のイベント列を先頭から1度だけ走査し、各打牌直前の局面を集めます。
+
+    Returns:
+        (局面の配列表現, 打牌した牌種 [N], 打牌した席 [N])
+    """
+    events = np.asarray(events)
+    discard_positions = np.flatnonzero(events['kind'] == EVENT_DISCARD)
+    arrays = empty_state_arrays(len(discard_positions))
+    hands = np.zeros((4, NUM_TILE_TYPES), dtype=np.int8)
+    melds = np.zeros((4, NUM_TILE_TYPES), dtype=np.int8)
+    rivers = np.full((4, MAX_RIVER), -1, dtype=np.int8)
+    river_lengths = [0, 0, 0, 0]
+    dora = []
+    dealer = round_wind = 0
+    actions = np.zeros(len(discard_positions), dtype=np.int16)
+    seats = np.zeros(len(discard_positions), dtype=np.intp)
+    sample = 0
+    for kind, seat, tile, arg, _, extra in events.tolist():
+        if kind == EVENT_GAME_START:
+            dealer, round_wind = seat, tile
+        elif kind in (EVENT_DEAL, EVENT_DRAW):
+            hands[seat, tile] += 1
+        elif kind == EVENT_DISCARD:
+            arrays['hands'][sample] = hands[seat]
+            arrays['rivers'][sample] = rivers
+            arrays['melds'][sample] = melds
+            arrays['dora_indicators'][sample, :len(dora)] = dora[:MAX_DORA]
+            arrays['seats'][sample] = seat
+            arrays['dealers'][sample] = dealer
+            arrays['round_winds'][sample] = round_wind
+            actions[sample], seats[sample] = tile, seat
+            sample += 1
+            hands[seat, tile] -= 1
+            if river_lengths[seat] < MAX_RIVER:
+                rivers[seat, river_lengths[seat]] = tile
+                river_lengths[seat] += 1
+        elif kind == EVENT_CALL:
+            apply_call(hands, melds, seat, tile, arg, extra)
+        elif kind == EVENT_DORA:
+            dora.append(tile)
+    return arrays, actions, seats
+
+def samples_from_events(events: np.ndarray, encoder: Optional[ObservationEncoder] = None) -> Dict[str, np.ndarray]:
+    """
+    1局分のイベント列を学習サンプル（SAMPLE_COLUMNS形式）に変換します。
+    方策の教師は実際の打牌、価値の教師は和了者なら1、他家は-1、流局は0です。
+    """
+    arrays, actions, seats = decision_points(events)
+    count = len(actions)
+    encoder = encoder or ObservationEncoder(max(count, 1), pin_memory=False)
+    obs = np.empty((count, NUM_PLANES, NUM_TILE_TYPES), dtype=np.uint8)
+    for start in range(0, count, encoder.max_batch_size):
+        stop = min(start + encoder.max_batch_size, count)
+        obs[start:stop] = encoder.encode_batch(**{k: v[start:stop] for k, v in arrays.items()})
+    policy = np.zeros((count, NUM_TILE_TYPES), dtype=np.float32)
+    policy[np.arange(count), actions] = 1.0
+    wins = np.flatnonzero(np.asarray(events)['kind'] == EVENT_WIN)
+    value = np.zeros(count, dtype=np.float32)
+    if len(wins):
+        winner = int(events[wins[0]]['seat'])
+        value = np.where(seats == winner, 1.0, -1.0).astype(np.float32)
+    return {'obs': obs, 'policy': policy, 'value': value, 'action': actions}
@@ -0,0 +1,111 @@
+# export_policy.py
+
+from typing import Any, Dict, Optional
+import argparse
+import copy
+import json
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+from encoder import NUM_PLANES, OBS_SIZE
+from models import PolicyValueNet, QNetwork
+from policy_runtime import ExportedPolicy, METADATA_FILE
+from tiles import NUM_TILE_TYPES
+
+def example_input(model: nn.Module, batch_size: int = 1) -> torch.Tensor:
+    """
+    トレース用の入力を作ります。QNetworkは平坦なfloat、方策ネットワークはuint8プレーンを受け取ります。
+    """
+    if isinstance(model, QNetwork):
+        return torch.zeros(batch_size, model.fc1.in_features)
+    return torch.zeros(batch_size, NUM_PLANES, NUM_TILE_TYPES, dtype=torch.uint8)
+
+def quantize(model: nn.Module) -> nn.Module:
+    """
+    Linear層を動的int8量子化したコピーを返します。
+    """
+    return torch.ao.quantization.quantize_dynamic(copy.deepcopy(model).eval(), {nn.Linear}, dtype=torch.qint8)
+
+def export_policy(model: nn.Module, path: str, quantized: bool = True,
+                  metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    モデルをTorchScriptにトレースし（必要ならint8量子化して）単体で読み込める成果物として保存します。
+    """
+    model = copy.deepcopy(model).eval()
+    if quantized:
+        model = quantize(model)
+    # 量子化済みLinearはTransformerの高速パスの条件判定に対応していないため、通常パスでトレースする
+    fastpath = torch.backends.mha.get_fastpath_enabled()
+    torch.backends.mha.set_fastpath_enabled(False)
+    try:
+        with torch.no_grad():
+            traced = torch.jit.trace(model, example_input(model), check_trace=False)
+    finally:
+        torch.backends.mha.set_fastpath_enabled(fastpath)
+    info = dict(metadata or {})
+    info.update({'model': type(model).__name__, 'quantized': quantized})
+    torch.jit.save(traced, path, _extra_files={METADATA_FILE: json.dumps(info)})
+    return path
+
+def _latency_ms(fn, inputs: torch.Tensor, repeats: int) -> float:
+    with torch.inference_mode():
+        fn(inputs)  # ウォームアップ
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn(inputs)
+    return (time.perf_counter() - start) / repeats * 1000
+
+def _scores(output) -> torch.Tensor:
+    return output[0] if isinstance(output, (tuple, list)) else output
+
+def benchmark(float_model: nn.Module, exported: ExportedPolicy, inputs: torch.Tensor,
+              repeats: int = 50) -> Dict[str, float]:
+    """
+    浮動小数点モデルと書き出したモデルの遅延（1件・バッチ）と出力の一致度を比較します。
+    """
+    float_model = float_model.eval()
+    single = inputs[:1]
+    with torch.inference_mode():
+        reference = _scores(float_model(inputs))
+        candidate = torch.from_numpy(exported(inputs)[0])
+    return {
+        'float_latency_ms': _latency_ms(float_model, single, repeats),
+        'exported_latency_ms': _latency_ms(exported.module, single, repeats),
+        'float_batch_latency_ms': _latency_ms(float_model, inputs, repeats),
+        'exported_batch_latency_ms': _latency_ms(exported.module, inputs, repeats),
+        'top1_agreement': float((reference.argmax(-1) == candidate.argmax(-1)).float().mean()),
+        'max_abs_diff': float((reference - candidate).abs().max()),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="学習済みモデルをCPU推論用に書き出します。")
+    parser.add_argument('weights', help="checkpoint.export_weights 形式の重みファイル")
+    parser.add_argument('output', help="書き出し先（.pt）")
+    parser.add_argument('--model', choices=['policy', 'qnetwork'], default='policy')
+    parser.add_argument('--params', default='{}', help="モデルパラメータのJSON")
+    parser.add_argument('--no-quantize', action='store_true')
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    params = json.loads(args.params)
+    if args.model == 'policy':
+        model = PolicyValueNet.from_params(params)
+    else:
+        model = QNetwork(params.get('input_size', OBS_SIZE), params.get('output_size', NUM_TILE_TYPES))
+    checkpoint = torch.load(args.weights, map_location='cpu')
+    model.load_state_dict(checkpoint.get('state_dict', checkpoint))
+
+    export_policy(model, args.output, quantized=not args.no_quantize,
+                  metadata={'version': checkpoint.get('version'), 'params': params})
+    exported = ExportedPolicy(args.output)
+    inputs = example_input(model, args.batch_size)
+    if inputs.dtype == torch.uint8:
+        inputs = torch.from_numpy(np.random.default_rng(0).integers(0, 3, inputs.shape).astype(np.uint8))
+    else:
+        inputs = torch.randn(inputs.shape)
+    for key, value in benchmark(model, exported, inputs).items():
+        print(f"{key}: {value:.4f}")
+
+if __name__ == "__main__":
+    main()
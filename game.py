@@ -1,35 +1,59 @@
-from typing import List, Optional
-from tiles import Tile, create_tiles
+from typing import List, Optional, Sequence
+from tiles import Tile, create_tiles, tile_to_index
 from yaku_evaluator import YakuEvaluator
 from ai_agent import AIAgent
 import random
 from player import Player
+from renderer import TableRenderer
+from ai_worker import TURN_DONE, TurnWorker
+from game_record import (EVENT_GAME_START, EVENT_DEAL, EVENT_DRAW, EVENT_WIN, EVENT_GAME_END,
+                         END_EXHAUSTED, END_WIN, END_ABORTED, pack_extra)
 import pygame
 import logging
+import threading
 
 # ログの設定
 logging.basicConfig(filename='game_error.log', level=logging.ERROR,
                     format='%(asctime)s:%(levelname)s:%(message)s')
 
 class MahjongGame:
-    def __init__(self, num_players: int = 4):
+    # 和了は自分の手番の役判定（ツモ）だけで、他家の捨て牌でのロンはまだない。
+    # ロンを実装したら end_game に from_seat（放銃者）を渡し、これを True にする
+    SUPPORTS_RON = False
+
+    def __init__(self, num_players: int = 4, recorder=None, human_seats: Sequence[int] = (0,),
+                 agents: Optional[Sequence[Optional[AIAgent]]] = None, load_images: bool = True,
+                 verbose: bool = True):
         if not (2 <= num_players <= 4):
             raise ValueError("プレイヤー数は2人から4人までです。")
         self.num_players = num_players
+        self.recorder = recorder  # 対局記録のライター（GameRecordWriterなど）
+        self.verbose = verbose
+        self.last_drawn_tile: Optional[Tile] = None
+        self.winner: Optional[Player] = None
         self.players = [
             Player(
                 f"Player {i+1}", 
-                is_human=(i == 0), 
-                evaluator=YakuEvaluator(is_dealer=(i == 0))
+                is_human=(i in human_seats), 
+                ai_agent=agents[i] if agents else None,
+                evaluator=YakuEvaluator(is_dealer=(i == 0), verbose=verbose)
             ) for i in range(self.num_players)
         ]
+        for seat, player in enumerate(self.players):
+            player.seat = seat
+            player.recorder = recorder
+            if hasattr(player.ai_agent, 'bind'):
+                player.ai_agent.bind(self, seat)  # 局面全体を参照するエージェント用
         self.tiles = create_tiles()
-        for tile in self.tiles:
-            tile.load_image()  # タイル画像をロード
+        if load_images:
+            for tile in self.tiles:
+                tile.load_image()  # タイル画像をロード
         self.deal_tiles()
         self.current_player_index = self.determine_first_player()
+        self.record_deal()
         self.game_over = False
-        self.state = 'draw'  # 'draw', 'discard'
+        self.state = 'draw'  # 'draw', 'discard', 'evaluating'
+        self.lock = threading.RLock()  # ワーカースレッドと描画の排他
 
     def deal_tiles(self):
         """
@@ -42,6 +66,26 @@ class MahjongGame:
             player.hand = self.tiles[start:end]
         # 親（Player 1）に14枚目を配る
         self.players[0].hand.append(self.tiles[self.num_players * 13])
+        # 配った牌は山から除く（残すと同じ牌をツモり直し、5枚目が現れる）
+        del self.tiles[:self.num_players * 13 + 1]
+
+    def record_deal(self):
+        """
+        対局開始と配牌を対局記録に書き込みます。
+        """
+        if self.recorder is None:
+            return
+        self.recorder.record(EVENT_GAME_START, self.current_player_index, 0, self.num_players)
+        for player in self.players:
+            for tile in player.hand:
+                self.recorder.record(EVENT_DEAL, player.seat, tile_to_index(tile))
+
+    def log(self, message: str):
+        """
+        verbose時のみ進行状況を表示します。
+        """
+        if self.verbose:
+            print(message)
 
     def determine_first_player(self) -> int:
         """
@@ -54,84 +98,180 @@ class MahjongGame:
         山から一枚牌を引く
         """
         if not self.tiles:
-            print("牌が尽きました。")
+            self.log("牌が尽きました。")
             self.game_over = True
+            if self.recorder is not None:
+                self.recorder.record(EVENT_GAME_END, arg=END_EXHAUSTED)
             return
         drawn_tile = self.tiles.pop()
         player.hand.append(drawn_tile)
-        print(f"{player.name} が引いた牌: {drawn_tile.name}")
+        self.log(f"{player.name} が引いた牌: {drawn_tile.name}")
         if len(player.hand) > 14:
             player.hand = player.hand[:14]  # 手牌が14枚を超えないように制限
-    def play_game_pygame(self, window, font):
-        clock = pygame.time.Clock()
+        elif self.recorder is not None:
+            # 制限で捨てられた牌は手牌に入らないため記録しない
+            self.recorder.record(EVENT_DRAW, player.seat, tile_to_index(drawn_tile))
+        self.last_drawn_tile = drawn_tile
+
+    def play_ai_turn(self, current_player: Player) -> Optional[Tile]:
+        """
+        AIプレイヤーの1巡（ツモ・打牌・役判定・手番の移動）を処理します。
+        """
+        self.log(f"{current_player.name} のAIターンを開始します。")
+        self.draw_tile(current_player)
+        if self.game_over:
+            return None
+        discarded_tile = current_player.choose_discard()
+        if discarded_tile:
+            self.log(f"{current_player.name} が捨てました: {discarded_tile.name}")
+            yaku_list, han, fu = current_player.evaluator.evaluate_hand(
+                current_player.hand, current_player.is_closed, False
+            )
+            self.log(f"{current_player.name} の役: {yaku_list}, 翻数: {han}, 符数: {fu}")
+            if yaku_list:
+                self.end_game(winner=current_player, han=han, fu=fu)
+                return discarded_tile
+            self.current_player_index = (self.current_player_index + 1) % self.num_players
+            self.state = 'draw'
+        return discarded_tile
+
+    def play_headless(self, max_turns: int = 1000) -> Optional[Player]:
+        """
+        ウィンドウを使わずにAI同士で1局を最後まで進め、和了者（流局ならNone）を返します。
+        """
+        for _ in range(max_turns):
+            if self.game_over:
+                break
+            current_player = self.players[self.current_player_index]
+            if current_player.is_human:
+                raise ValueError("ヘッドレス対局では全席をAIにしてください。")
+            if self.play_ai_turn(current_player) is None and not self.game_over:
+                # 打牌できない場合は対局を打ち切る
+                self.game_over = True
+                if self.recorder is not None:
+                    self.recorder.record(EVENT_GAME_END, arg=END_ABORTED)
+        return self.winner
+
+    def play_ai_turn_locked(self, current_player: Player) -> Optional[Tile]:
+        """
+        描画と競合しないよう局面をロックしてAIの1巡を処理します（ワーカースレッド用）。
+        """
+        with self.lock:
+            return self.play_ai_turn(current_player)
+
+    def discard_by_index(self, current_player: Player, tile_index: int) -> Optional[Tile]:
+        """
+        指定した牌種の牌を1枚手牌から捨てます（ネットワーク対局用）。手牌になければNoneを返します。
+        """
+        for position, tile in enumerate(current_player.hand):
+            if tile_to_index(tile) == tile_index:
+                current_player.hand.pop(position)
+                current_player.discards.append(tile)
+                current_player.record_discard(tile)
+                return tile
+        return None
+
+    def finish_human_discard(self, current_player: Player) -> None:
+        """
+        人間の打牌後の役判定と手番の移動を行います（ワーカースレッド用）。
+        """
+        with self.lock:
+            yaku_list, han, fu = current_player.evaluator.evaluate_hand(
+                current_player.hand, current_player.is_closed, True
+            )
+            self.log(f"{current_player.name} の役: {yaku_list}, 翻数: {han}, 符数: {fu}")
+            if yaku_list:
+                self.end_game(winner=current_player, han=han, fu=fu)
+                return
+            self.current_player_index = (self.current_player_index + 1) % self.num_players
+            self.state = 'draw'
+
+    def present(self, renderer: TableRenderer) -> None:
+        """
+        変化した領域だけを描き直して画面に反映します。
+        ワーカーが局面を更新中なら描画を見送り、完了イベントで描き直します。
+        """
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            dirty_rects = renderer.render(self.players)
+        finally:
+            self.lock.release()
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+
+    def play_game_pygame(self, window, font, fps: int = 30, render_every: int = 1, quit_on_exit: bool = True):
+        """
+        Pygameのウィンドウで対局を進めます。
+        AIの手番と役判定はワーカースレッドで処理し、メインループは何も起きていない間はイベントを待って休みます。
+
+        Args:
+            fps (int): AIの1手あたりの最短時間を 1/fps 秒にする。0なら待たない（ターボモード）
+            render_every (int): 描画するAIの手番の間隔。観戦用に間引く場合は2以上にする
+            quit_on_exit (bool): 終局後にpygameを終了するかどうか（続けて対局する場合はFalse）
+        """
+        renderer = TableRenderer(window, font)
+        worker = TurnWorker(min_turn_time=1 / fps if fps else 0.0)
         running = True
+        busy = False  # ワーカーが処理中かどうか
+        turns = 0
+        self.present(renderer)
 
         while running and not self.game_over:
             try:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running = False
-                    elif event.type == pygame.MOUSEBUTTONDOWN:
-                        print("MOUSEBUTTONDOWN event detected")
-                        if self.state == 'discard':
-                            current_player = self.players[self.current_player_index]
-                            if current_player.is_human:
-                                mouse_pos = pygame.mouse.get_pos()
-                                print(f"{current_player.name} の捨て牌処理を開始します。クリック位置: {mouse_pos}")
-                                discarded_tile = current_player.handle_mouse_click(mouse_pos)
-                                if discarded_tile:
-                                    print(f"{current_player.name} が捨てました: {discarded_tile.name}")
-                                    yaku_list, han, fu = current_player.evaluator.evaluate_hand(
-                                        current_player.hand, current_player.is_closed, True
-                                    )
-                                    print(f"{current_player.name} の役: {yaku_list}, 翻数: {han}, 符数: {fu}")
-                                    if yaku_list:
-                                        self.end_game(winner=current_player)
-                                        continue
-                                    self.current_player_index = (self.current_player_index + 1) % self.num_players
-                                    self.state = 'draw'
-
-                # AIのターンを処理
-                if not self.game_over and self.state == 'draw':
+                if not busy and self.state == 'draw':
                     current_player = self.players[self.current_player_index]
                     if not current_player.is_human:
-                        print(f"{current_player.name} のAIターンを開始します。")
-                        self.draw_tile(current_player)
-                        discarded_tile = current_player.choose_discard()
-                        if discarded_tile:
-                            print(f"{current_player.name} が捨てました: {discarded_tile.name}")
-                            yaku_list, han, fu = current_player.evaluator.evaluate_hand(
-                                current_player.hand, current_player.is_closed, False
-                            )
-                            print(f"{current_player.name} の役: {yaku_list}, 翻数: {han}, 符数: {fu}")
-                            if yaku_list:
-                                self.end_game(winner=current_player)
-                                continue
-                            self.current_player_index = (self.current_player_index + 1) % self.num_players
-                            self.state = 'draw'
+                        worker.submit(self.play_ai_turn_locked, current_player)
+                        busy = True
                     else:
                         # 人間プレイヤーのターン
-                        print(f"{current_player.name} の人間ターンを開始します。")
+                        self.log(f"{current_player.name} の人間ターンを開始します。")
                         self.draw_tile(current_player)
                         self.state = 'discard'
+                        self.present(renderer)
+                        continue
 
-                # 描画処理
-                window.fill((0, 128, 0))  # 背景を緑色に設定
-
-                self.draw_game_state(window, font)
-
-                pygame.display.flip()
-                clock.tick(30)
+                event = pygame.event.wait()  # 何も起きていない間はここで待つ
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    renderer.invalidate()
+                    self.present(renderer)
+                elif event.type == TURN_DONE:
+                    busy = False
+                    if event.error is not None:
+                        raise event.error
+                    turns += 1
+                    if turns % render_every == 0 or self.game_over:
+                        self.present(renderer)
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    self.log("MOUSEBUTTONDOWN event detected")
+                    if self.state == 'discard' and not busy:
+                        current_player = self.players[self.current_player_index]
+                        if current_player.is_human:
+                            self.log(f"{current_player.name} の捨て牌処理を開始します。クリック位置: {event.pos}")
+                            discarded_tile = current_player.handle_mouse_click(event.pos)
+                            if discarded_tile:
+                                self.log(f"{current_player.name} が捨てました: {discarded_tile.name}")
+                                self.state = 'evaluating'
+                                self.present(renderer)
+                                worker.submit(self.finish_human_discard, current_player)
+                                busy = True
 
             except Exception as e:
                 logging.error("An error occurred", exc_info=True)
                 running = False
 
+        worker.stop()
+
         # ゲーム終了時のメッセージ表示
         if self.game_over:
             self.display_end_message(window, font)
+            pygame.display.flip()
 
-        pygame.quit()
+        if quit_on_exit:
+            pygame.quit()
 
     def draw_game_state(self, window, font):
         """
@@ -161,9 +301,14 @@ class MahjongGame:
         end_surface = font.render(end_text, True, (255, 215, 0))
         window.blit(end_surface, (50, 750))
 
-    def end_game(self, winner: Player):
+    def end_game(self, winner: Player, han: int = 0, fu: int = 0, from_seat: Optional[int] = None):
         """
-        ゲームを終了し、勝者を設定します。
+        ゲームを終了し、勝者を設定します。from_seatはロンの放銃者の席で、Noneならツモです。
         """
-        print(f"{winner.name} が和了しました！")
+        self.log(f"{winner.name} が和了しました！")
         self.game_over = True
+        self.winner = winner
+        if self.recorder is not None:
+            winning_tile = tile_to_index(self.last_drawn_tile) if self.last_drawn_tile else 0
+            self.recorder.record(EVENT_WIN, winner.seat, winning_tile, han, pack_extra(fu, winner.seat if from_seat is None else from_seat))
+            self.recorder.record(EVENT_GAME_END, winner.seat, arg=END_WIN)
@@ -0,0 +1,328 @@
+# game_record.py
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import List, Optional
+import os
+import struct
+import numpy as np
+from tiles import NUM_TILE_TYPES
+
+# イベント種別
+EVENT_GAME_START = 1  # seat=親, tile=場風, arg=プレイヤー数
+EVENT_DEAL = 2        # 配牌
+EVENT_DRAW = 3        # ツモ
+EVENT_DISCARD = 4     # 打牌
+EVENT_CALL = 5        # 鳴き（arg=鳴きの種類, extra=下位8bit:面子の先頭牌 / 上位8bit:放銃元）
+EVENT_RIICHI = 6      # 立直宣言
+EVENT_DORA = 7        # ドラ表示牌
+EVENT_WIN = 8         # 和了（arg=翻数, extra=下位8bit:符 / 上位8bit:放銃元。和了者と同じならツモ）
+EVENT_GAME_END = 9    # 終局（arg=終局理由）
+
+# 鳴きの種類
+CALL_CHI = 1
+CALL_PON = 2
+CALL_KAN = 3   # 大明槓
+CALL_ANKAN = 4
+CALL_KAKAN = 5
+
+# 終局理由
+END_EXHAUSTED = 0  # 流局
+END_WIN = 1
+END_ABORTED = 2
+
+# 1イベント8バイトの固定長レコード
+EVENT_DTYPE = np.dtype([
+    ('kind', 'u1'),
+    ('seat', 'u1'),
+    ('tile', 'u1'),
+    ('arg', 'u1'),
+    ('turn', '<u2'),
+    ('extra', '<u2'),
+])
+_EVENT_STRUCT = struct.Struct('<BBBBHH')
+assert _EVENT_STRUCT.size == EVENT_DTYPE.itemsize
+
+EVENT_SIZE = _EVENT_STRUCT.size
+
+def pack_event(kind: int, seat: int = 0, tile: int = 0, arg: int = 0, turn: int = 0, extra: int = 0) -> bytes:
+    """
+    イベント1件を記録ファイルと同じ8バイトの形式に詰めます（通信用）。
+    """
+    return _EVENT_STRUCT.pack(kind, seat, tile, min(arg, 255), min(turn, 0xFFFF), extra)
+
+def unpack_event(data: bytes):
+    """
+    pack_event の逆変換。(kind, seat, tile, arg, turn, extra) を返します。
+    """
+    return _EVENT_STRUCT.unpack(data)
+
+RECORD_MAGIC = b'MJRC'
+RECORD_VERSION = 1
+_HEADER_STRUCT = struct.Struct('<4sHH')
+HEADER_SIZE = _HEADER_STRUCT.size
+
+def pack_extra(low: int, high: int) -> int:
+    """
+    extraフィールドに下位・上位8bitの値を詰めます。
+    """
+    return (low & 0xFF) | ((high & 0xFF) << 8)
+
+def unpack_extra(extra: int):
+    """
+    extraフィールドを (下位8bit, 上位8bit) に分解します。
+    """
+    return extra & 0xFF, (extra >> 8) & 0xFF
+
+def meld_tiles(call_type: int, base_tile: int) -> List[int]:
+    """
+    鳴きの種類と先頭牌から面子を構成する牌種の並びを返します。
+    """
+    if call_type == CALL_CHI:
+        return [base_tile, base_tile + 1, base_tile + 2]
+    if call_type == CALL_PON:
+        return [base_tile] * 3
+    return [base_tile] * 4
+
+def apply_call(hands: np.ndarray, melds: np.ndarray, seat: int, called: int, call_type: int, extra: int) -> None:
+    """
+    鳴きイベント1件を手牌・副露の枚数配列に反映します。
+    """
+    base, _ = unpack_extra(extra)
+    tiles_in_meld = meld_tiles(call_type, base)
+    taken_from_hand = list(tiles_in_meld)
+    if call_type in (CALL_CHI, CALL_PON, CALL_KAN):
+        taken_from_hand.remove(called)  # 他家の捨て牌は手牌から減らさない
+    elif call_type == CALL_KAKAN:
+        melds[seat, base] -= 3  # 既存のポンを槓子に置き換える
+        taken_from_hand = [base]
+    for tile in taken_from_hand:
+        hands[seat, tile] -= 1
+    for tile in tiles_in_meld:
+        melds[seat, tile] += 1
+
+class GameRecordWriter:
+    """
+    対局イベントを固定長バイナリで追記する、バッファ付きのライター。
+    バッファが一杯になった時点でまとめて書き出します。
+    """
+
+    def __init__(self, path: str, buffer_events: int = 4096):
+        self.path = path
+        self.buffer_events = buffer_events
+        self._buffer = bytearray(buffer_events * EVENT_DTYPE.itemsize)
+        self._size = 0
+        self.turn = 0
+        self.events_written = 0
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            read_header(path)  # 既存ファイルの形式を確認してから追記する
+        self._file = open(path, 'ab')
+        if is_new:
+            self._file.write(_HEADER_STRUCT.pack(RECORD_MAGIC, RECORD_VERSION, EVENT_DTYPE.itemsize))
+
+    def record(self, kind: int, seat: int = 0, tile: int = 0, arg: int = 0, extra: int = 0) -> None:
+        """
+        イベントを1件バッファに追加します。
+        """
+        if kind == EVENT_GAME_START:
+            self.turn = 0
+        elif kind == EVENT_DRAW:
+            self.turn += 1
+        _EVENT_STRUCT.pack_into(self._buffer, self._size * EVENT_DTYPE.itemsize,
+                                kind, seat, tile, min(arg, 255), min(self.turn, 0xFFFF), extra)
+        self._size += 1
+        if self._size == self.buffer_events:
+            self.flush()
+
+    def append_events(self, events: np.ndarray) -> None:
+        """
+        記録済みのイベント列（EVENT_DTYPE）をそのまま追記します。
+        """
+        self.flush()
+        self._file.write(np.ascontiguousarray(events, dtype=EVENT_DTYPE).tobytes())
+        self.events_written += len(events)
+
+    def flush(self) -> None:
+        """
+        バッファ内のイベントをファイルへ書き出します。
+        """
+        if self._size:
+            self._file.write(memoryview(self._buffer)[:self._size * EVENT_DTYPE.itemsize])
+            self.events_written += self._size
+            self._size = 0
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> GameRecordWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+class MemoryRecorder:
+    """
+    イベントをメモリ上に貯めるレコーダー。GameRecordWriterと同じrecordで書き込めます。
+    """
+
+    def __init__(self):
+        self._rows = []
+        self.turn = 0
+
+    def record(self, kind: int, seat: int = 0, tile: int = 0, arg: int = 0, extra: int = 0) -> None:
+        if kind == EVENT_GAME_START:
+            self.turn = 0
+        elif kind == EVENT_DRAW:
+            self.turn += 1
+        self._rows.append((kind, seat, tile, min(arg, 255), min(self.turn, 0xFFFF), extra))
+
+    def events(self) -> np.ndarray:
+        """
+        貯めたイベントを構造化配列として返します。
+        """
+        return np.array(self._rows, dtype=EVENT_DTYPE)
+
+    def clear(self) -> None:
+        self._rows = []
+        self.turn = 0
+
+def read_header(path: str) -> int:
+    """
+    記録ファイルのヘッダを検証し、バージョンを返します。
+    """
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) != HEADER_SIZE:
+        raise ValueError(f"記録ファイルのヘッダが不正です: {path}")
+    magic, version, itemsize = _HEADER_STRUCT.unpack(header)
+    if magic != RECORD_MAGIC or itemsize != EVENT_DTYPE.itemsize:
+        raise ValueError(f"対局記録ファイルではありません: {path}")
+    if version > RECORD_VERSION:
+        raise ValueError(f"未対応の記録バージョンです: {version}")
+    return version
+
+def read_events(path: str, mmap: bool = True) -> np.ndarray:
+    """
+    記録ファイルのイベント列を構造化配列として読み込みます（既定はメモリマップ）。
+    """
+    read_header(path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // EVENT_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE)
+    if mmap:
+        return np.memmap(path, dtype=EVENT_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+    return np.fromfile(path, dtype=EVENT_DTYPE, count=count, offset=HEADER_SIZE)
+
+def split_games(events: np.ndarray) -> List[slice]:
+    """
+    イベント列を対局開始イベントごとの区間に分割します。
+    """
+    starts = np.flatnonzero(events['kind'] == EVENT_GAME_START)
+    bounds = list(starts) + [len(events)]
+    return [slice(int(bounds[i]), int(bounds[i + 1])) for i in range(len(starts))]
+
+@dataclass
+class ReplayState:
+    """
+    イベント列から復元した局面。
+    """
+    num_players: int = 4
+    dealer: int = 0
+    round_wind: int = 0
+    hands: np.ndarray = field(default_factory=lambda: np.zeros((4, NUM_TILE_TYPES), dtype=np.int8))
+    melds: np.ndarray = field(default_factory=lambda: np.zeros((4, NUM_TILE_TYPES), dtype=np.int8))
+    rivers: List[np.ndarray] = field(default_factory=list)
+    dora_indicators: List[int] = field(default_factory=list)
+    riichi: List[bool] = field(default_factory=lambda: [False] * 4)
+    turn: int = 0
+    winner: Optional[int] = None
+    game_over: bool = False
+
+def apply_event(state: ReplayState, kind: int, seat: int, tile: int, arg: int, turn: int, extra: int) -> None:
+    """
+    イベント1件を局面に逐次反映します（replay の逐次版）。
+    """
+    if kind == EVENT_GAME_START:
+        vars(state).update(vars(ReplayState(num_players=arg or 4, dealer=seat, round_wind=tile,
+                                            rivers=[np.zeros(0, dtype=np.int8) for _ in range(4)])))
+    elif kind in (EVENT_DEAL, EVENT_DRAW):
+        state.hands[seat, tile] += 1
+    elif kind == EVENT_DISCARD:
+        state.hands[seat, tile] -= 1
+        state.rivers[seat] = np.append(state.rivers[seat], np.int8(tile))
+    elif kind == EVENT_CALL:
+        apply_call(state.hands, state.melds, seat, tile, arg, extra)
+    elif kind == EVENT_RIICHI:
+        state.riichi[seat] = True
+    elif kind == EVENT_DORA:
+        state.dora_indicators.append(tile)
+    elif kind == EVENT_WIN:
+        if state.winner is None:
+            state.winner = seat
+    elif kind == EVENT_GAME_END:
+        state.game_over = True
+    state.turn = turn
+
+def copy_state(state: ReplayState) -> ReplayState:
+    """
+    局面を複製します（配列・リストも複製し、元の局面とは共有しません）。
+    """
+    return ReplayState(state.num_players, state.dealer, state.round_wind, state.hands.copy(), state.melds.copy(),
+                       [river.copy() for river in state.rivers], list(state.dora_indicators), list(state.riichi),
+                       state.turn, state.winner, state.game_over)
+
+def replay(events: np.ndarray, upto: Optional[int] = None, initial: Optional[ReplayState] = None) -> ReplayState:
+    """
+    1局分のイベント列を先頭から upto 件まで適用した局面を復元します。
+    ツモ・打牌は一括集計し、件数の少ない鳴きだけを逐次処理します。
+    initialを渡すと、同じ局の途中の局面（initialは変更しません）から続けて適用します。
+    """
+    events = np.asarray(events[:upto] if upto is not None else events)
+    state = copy_state(initial) if initial is not None else ReplayState()
+    if len(events) == 0:
+        return state
+
+    kinds = events['kind']
+    seats = events['seat'].astype(np.intp)
+    tiles = events['tile'].astype(np.intp)
+
+    start = np.flatnonzero(kinds == EVENT_GAME_START)
+    if len(start):
+        head = events[start[-1]]
+        state.num_players = int(head['arg']) or 4
+        state.dealer = int(head['seat'])
+        state.round_wind = int(head['tile'])
+
+    # 手牌の増減をまとめて集計する
+    sign = np.zeros(len(events), dtype=np.int64)
+    sign[(kinds == EVENT_DEAL) | (kinds == EVENT_DRAW)] = 1
+    sign[kinds == EVENT_DISCARD] = -1
+    moved = sign != 0
+    counts = np.bincount(seats[moved] * NUM_TILE_TYPES + tiles[moved],
+                         weights=sign[moved], minlength=4 * NUM_TILE_TYPES)
+    hands = (state.hands + counts.reshape(4, NUM_TILE_TYPES)).astype(np.int8)
+    melds = state.melds
+
+    for event in events[kinds == EVENT_CALL]:
+        apply_call(hands, melds, int(event['seat']), int(event['tile']), int(event['arg']), int(event['extra']))
+
+    state.hands = hands
+    state.melds = melds
+    discard_mask = kinds == EVENT_DISCARD
+    rivers = [tiles[discard_mask & (seats == seat)].astype(np.int8) for seat in range(4)]
+    if state.rivers:
+        rivers = [np.concatenate([old, new]) for old, new in zip(state.rivers, rivers)]
+    state.rivers = rivers
+    state.dora_indicators += [int(t) for t in tiles[kinds == EVENT_DORA]]
+    for seat in seats[kinds == EVENT_RIICHI]:
+        state.riichi[int(seat)] = True
+    state.turn = int(events['turn'][-1])
+    wins = np.flatnonzero(kinds == EVENT_WIN)
+    if len(wins) and state.winner is None:
+        state.winner = int(seats[wins[0]])
+    state.game_over = state.game_over or bool(np.any(kinds == EVENT_GAME_END))
+    return state
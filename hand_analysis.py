@@ -0,0 +1,208 @@
+# hand_analysis.py
+# 34種の枚数で表した手牌の分析（向聴数・面子分解・待ちの形・役）。記録の索引づけや集計に使います。
+# 役は記録に残っていないため、和了形から判定できる主なものだけを復元します。
+
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+NUM_TILE_TYPES = 34
+WIND_OFFSET = 27
+DRAGONS = (31, 32, 33)
+TERMINALS_AND_HONORS = (0, 8, 9, 17, 18, 26) + tuple(range(27, NUM_TILE_TYPES))
+
+# 待ちの形
+WAIT_RYANMEN = 0
+WAIT_KANCHAN = 1
+WAIT_PENCHAN = 2
+WAIT_SHANPON = 3
+WAIT_TANKI = 4
+WAIT_NAMES = ['両面', '嵌張', '辺張', '双碰', '単騎']
+
+# 役（ビット位置 = リストの添字）
+YAKU_NAMES = ['立直', '門前清自摸和', '断么九', '役牌', '平和', '一盃口', '一気通貫', '三色同順',
+              '対々和', '七対子', '混一色', '清一色', '混全帯么九', '国士無双']
+YAKU_BITS = {name: 1 << bit for bit, name in enumerate(YAKU_NAMES)}
+
+# 面子: ('pon', 牌) または ('chi', 先頭牌)
+Meld = Tuple[str, int]
+
+def _is_suited(tile: int) -> bool:
+    return tile < 27
+
+def _is_terminal_or_honor(tile: int) -> bool:
+    return not _is_suited(tile) or tile % 9 in (0, 8)
+
+def _meld_sets(counts: List[int], start: int = 0, allow_quads: bool = False) -> List[List[Meld]]:
+    """
+    枚数の並びを面子だけに分解する方法をすべて返します（分解できなければ空）。
+    allow_quadsなら4枚を1つの槓子として扱います（副露の分解用）。
+    """
+    tile = start
+    while tile < NUM_TILE_TYPES and counts[tile] == 0:
+        tile += 1
+    if tile == NUM_TILE_TYPES:
+        return [[]]
+    results = []
+    for size in ((4, 3) if allow_quads else (3,)):
+        if counts[tile] >= size:
+            counts[tile] -= size
+            results += [[('pon', tile)] + rest for rest in _meld_sets(counts, tile, allow_quads)]
+            counts[tile] += size
+    if _is_suited(tile) and tile % 9 <= 6 and counts[tile + 1] and counts[tile + 2]:
+        for t in (tile, tile + 1, tile + 2):
+            counts[t] -= 1
+        results += [[('chi', tile)] + rest for rest in _meld_sets(counts, tile, allow_quads)]
+        for t in (tile, tile + 1, tile + 2):
+            counts[t] += 1
+    return results
+
+def decompositions(counts: Sequence[int]) -> List[Tuple[int, List[Meld]]]:
+    """
+    和了形の手牌（副露を除く）を (雀頭, 面子の並び) に分解する方法をすべて返します。
+    """
+    counts = list(counts)
+    results = []
+    for pair in range(NUM_TILE_TYPES):
+        if counts[pair] >= 2:
+            counts[pair] -= 2
+            results += [(pair, melds) for melds in _meld_sets(counts)]
+            counts[pair] += 2
+    return results
+
+def is_chiitoitsu(counts: Sequence[int]) -> bool:
+    return sum(counts) == 14 and sum(1 for c in counts if c == 2) == 7
+
+def is_kokushi(counts: Sequence[int]) -> bool:
+    return sum(counts) == 14 and all(counts[t] for t in TERMINALS_AND_HONORS) and \
+        sum(counts[t] for t in TERMINALS_AND_HONORS) == 14
+
+@lru_cache(maxsize=65536)
+def _regular_shanten(counts: bytes, called: int) -> int:
+    hand = list(counts)
+    best = 8
+
+    def search(tile: int, melds: int, partials: int, pair: int) -> None:
+        nonlocal best
+        while tile < NUM_TILE_TYPES and hand[tile] == 0:
+            tile += 1
+        if tile == NUM_TILE_TYPES:
+            best = min(best, 8 - 2 * melds - min(partials, 4 - melds) - pair)
+            return
+        suited = _is_suited(tile)
+        shapes = []  # (取り除く牌, 面子の増分, 搭子の増分, 雀頭の増分)
+        if hand[tile] >= 3:
+            shapes.append(((tile, tile, tile), 1, 0, 0))
+        if suited and tile % 9 <= 6 and hand[tile + 1] and hand[tile + 2]:
+            shapes.append(((tile, tile + 1, tile + 2), 1, 0, 0))
+        if hand[tile] >= 2:
+            if not pair:
+                shapes.append(((tile, tile), 0, 0, 1))
+            shapes.append(((tile, tile), 0, 1, 0))
+        if suited and tile % 9 <= 7 and hand[tile + 1]:
+            shapes.append(((tile, tile + 1), 0, 1, 0))
+        if suited and tile % 9 <= 6 and hand[tile + 2]:
+            shapes.append(((tile, tile + 2), 0, 1, 0))
+        shapes.append(((tile,), 0, 0, 0))  # 孤立牌
+        for removed, dm, dp, dh in shapes:
+            for t in removed:
+                hand[t] -= 1
+            search(tile, melds + dm, partials + dp, pair + dh)
+            for t in removed:
+                hand[t] += 1
+
+    search(0, called, 0, 0)
+    return best
+
+def shanten(counts: Sequence[int], called_melds: int = 0) -> int:
+    """
+    向聴数（和了形は -1, 聴牌は 0）。副露している場合は鳴いた面子の数を渡します。
+    """
+    counts = list(counts)
+    best = _regular_shanten(bytes(counts), called_melds)
+    if called_melds == 0:
+        pairs = sum(1 for c in counts if c >= 2)
+        kinds = sum(1 for c in counts if c)
+        best = min(best, 6 - pairs + max(0, 7 - kinds))
+        terminals = [counts[t] for t in TERMINALS_AND_HONORS]
+        best = min(best, 13 - sum(1 for c in terminals if c) - (1 if any(c >= 2 for c in terminals) else 0))
+    return best
+
+def wait_type(pair: int, melds: Sequence[Meld], winning_tile: int) -> int:
+    """
+    分解のうち和了牌を含む面子から待ちの形を決めます（複数に取れる場合は両面を優先）。
+    """
+    waits = []
+    for kind, tile in melds:
+        if kind == 'pon' and tile == winning_tile:
+            waits.append(WAIT_SHANPON)
+        elif kind == 'chi' and tile <= winning_tile <= tile + 2:
+            if winning_tile == tile + 1:
+                waits.append(WAIT_KANCHAN)
+            elif (winning_tile == tile and tile % 9 == 6) or (winning_tile == tile + 2 and tile % 9 == 0):
+                waits.append(WAIT_PENCHAN)
+            else:
+                waits.append(WAIT_RYANMEN)
+    if pair == winning_tile:
+        waits.append(WAIT_TANKI)
+    return min(waits) if waits else WAIT_TANKI
+
+def _yaku_for(pair: int, melds: List[Meld], closed: bool, wait: int, yakuhai: Tuple[int, ...]) -> int:
+    flags = 0
+    chis = [tile for kind, tile in melds if kind == 'chi']
+    pons = [tile for kind, tile in melds if kind == 'pon']
+    if any(tile in yakuhai for tile in pons):
+        flags |= YAKU_BITS['役牌']
+    if closed and not pons and pair not in yakuhai and wait == WAIT_RYANMEN:
+        flags |= YAKU_BITS['平和']
+    if closed and len(chis) != len(set(chis)):
+        flags |= YAKU_BITS['一盃口']
+    if any(all(base + 3 * i in chis for i in range(3)) for base in (0, 9, 18)):
+        flags |= YAKU_BITS['一気通貫']
+    if any(all(number + 9 * suit in chis for suit in range(3)) for number in range(7)):
+        flags |= YAKU_BITS['三色同順']
+    if not chis:
+        flags |= YAKU_BITS['対々和']
+    if chis and _is_terminal_or_honor(pair) and \
+            all(_is_terminal_or_honor(tile) for tile in pons) and all(tile % 9 in (0, 6) for tile in chis):
+        flags |= YAKU_BITS['混全帯么九']
+    return flags
+
+def analyze_win(hand: Sequence[int], called: Sequence[int], winning_tile: int, tsumo: bool, riichi: bool,
+                seat_wind: int, round_wind: int) -> Tuple[int, int]:
+    """
+    和了時の手牌（和了牌を含む副露以外の14-3n枚）と副露の枚数から (役のビット集合, 待ちの形) を返します。
+    複数の分解がある場合は、成立する役が多いものを採ります。
+    """
+    hand = list(hand)
+    called = list(called)
+    closed = sum(called) == 0
+    all_tiles = [a + b for a, b in zip(hand, called)]
+    yakuhai = DRAGONS + (WIND_OFFSET + seat_wind, WIND_OFFSET + round_wind)
+    called_melds = (_meld_sets(list(called), allow_quads=True) or [[]])[0]
+
+    flags = 0
+    if riichi:
+        flags |= YAKU_BITS['立直']
+    if tsumo and closed:
+        flags |= YAKU_BITS['門前清自摸和']
+    if not any(all_tiles[t] for t in TERMINALS_AND_HONORS):
+        flags |= YAKU_BITS['断么九']
+    suits = {tile // 9 for tile in range(27) if all_tiles[tile]}
+    if len(suits) == 1:
+        flags |= YAKU_BITS['清一色' if not any(all_tiles[27:]) else '混一色']
+
+    if closed and is_kokushi(hand):
+        return flags | YAKU_BITS['国士無双'], WAIT_TANKI
+    candidates = []
+    for pair, melds in decompositions(hand):
+        wait = wait_type(pair, melds, winning_tile)
+        candidates.append((_yaku_for(pair, melds + called_melds, closed, wait, yakuhai), wait))
+    if closed and is_chiitoitsu(hand):
+        candidates.append((YAKU_BITS['七対子'], WAIT_TANKI))
+    if not candidates:
+        return flags, WAIT_TANKI
+    yaku, wait = max(candidates, key=lambda candidate: (bin(candidate[0]).count('1'), -candidate[1]))
+    return flags | yaku, wait
+
+def yaku_names(flags: int) -> List[str]:
+    return [name for name, bit in YAKU_BITS.items() if flags & bit]
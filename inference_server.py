@@ -0,0 +1,139 @@
+# inference_server.py
+
+from __future__ import annotations
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+import queue
+import threading
+import time
+import numpy as np
+import torch
+from policy_agent import PolicyAgent
+
+class InferenceServer:
+    """
+    1つのモデルを複数の対局・スレッドで共有するプロセス内推論サーバー。
+    届いた観測をmax_latency秒以内、最大max_batch_size件のミニバッチにまとめて推論します。
+    """
+
+    def __init__(self, model: torch.nn.Module, max_batch_size: int = 64, max_latency: float = 0.002,
+                 device: Optional[torch.device] = None):
+        self.model = model
+        self.model.eval()  # 推論中はドロップアウトを無効にする
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.device = device or next(model.parameters()).device
+        self._requests: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._lock = threading.Lock()
+        self.batch_size_histogram: Counter = Counter()
+        self.queue_depth_histogram: Counter = Counter()
+        self.requests_served = 0
+
+    def start(self) -> InferenceServer:
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._serve, name="inference-server", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._running = False
+            self._requests.put(None)  # 待機中のループを起こす
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> InferenceServer:
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def submit(self, obs: Any) -> Future:
+        """
+        観測1件（特徴プレーン [C, 34]）を登録し、(方策ロジット[34], 価値) を返すFutureを受け取ります。
+        """
+        if not self._running:
+            raise RuntimeError("推論サーバーが起動していません。")
+        future: Future = Future()
+        self._requests.put((np.array(obs, copy=True), future))
+        return future
+
+    def infer(self, obs: Any) -> Tuple[np.ndarray, float]:
+        """
+        submitして結果を待つ同期版。
+        """
+        return self.submit(obs).result()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._requests.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'queue_depth': self.queue_depth,
+                'requests': self.requests_served,
+                'batches': sum(self.batch_size_histogram.values()),
+                'batch_size_histogram': dict(sorted(self.batch_size_histogram.items())),
+                'queue_depth_histogram': dict(sorted(self.queue_depth_histogram.items())),
+            }
+
+    def _collect_batch(self):
+        first = self._requests.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._running = False
+                break
+            batch.append(item)
+        return batch
+
+    def _serve(self) -> None:
+        while self._running or not self._requests.empty():
+            # 呼び出し側でキャンセルされたリクエストは推論せずに捨てる
+            batch = [(obs, future) for obs, future in self._collect_batch() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            with self._lock:
+                self.queue_depth_histogram[self.queue_depth] += 1
+                self.batch_size_histogram[len(batch)] += 1
+                self.requests_served += len(batch)
+            futures = [future for _, future in batch]
+            try:
+                obs = torch.from_numpy(np.stack([item for item, _ in batch])).to(self.device)
+                with torch.no_grad():
+                    policy_logits, value = self.model(obs)
+                policy_logits = policy_logits.float().cpu().numpy()
+                value = value.reshape(len(batch)).float().cpu().numpy()
+                for i, future in enumerate(futures):
+                    future.set_result((policy_logits[i], float(value[i])))
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+
+class RemotePolicyAgent(PolicyAgent):
+    """
+    推論を InferenceServer に任せる PolicyAgent。モデルの重みを持ちません。
+    """
+
+    def __init__(self, server: InferenceServer, evaluator=None, temperature: float = 1.0,
+                 seed: Optional[int] = None):
+        super().__init__(None, evaluator, temperature, seed)
+        self.server = server
+
+    def policy(self, obs: torch.Tensor) -> np.ndarray:
+        policy_logits, _ = self.server.infer(obs[0].numpy())
+        return policy_logits
@@ -0,0 +1,282 @@
+# log_import.py
+# 天鳳形式（mjlog XML）の牌譜を読み込み、このプロジェクトのイベント列・学習サンプルに変換して取り込みます。
+# 圧縮ファイル・tarアーカイブは先頭から順に読み、1牌譜ずつワーカープロセスで変換します。
+
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import bz2
+import gzip
+import io
+import lzma
+import multiprocessing as mp
+import tarfile
+import xml.etree.ElementTree as ET
+import numpy as np
+from call_arbiter import is_complete
+from dataset import ChunkedDatasetWriter
+from encoder import SAMPLE_COLUMNS, ObservationEncoder, samples_from_events
+from game_record import (CALL_ANKAN, CALL_CHI, CALL_KAKAN, CALL_KAN, CALL_PON, END_ABORTED, END_EXHAUSTED, END_WIN,
+                         EVENT_CALL, EVENT_DEAL, EVENT_DISCARD, EVENT_DORA, EVENT_DRAW, EVENT_DTYPE, EVENT_GAME_END,
+                         EVENT_GAME_START, EVENT_RIICHI, EVENT_WIN, GameRecordWriter, MemoryRecorder, ReplayState,
+                         apply_event, pack_extra, unpack_extra)
+from tiles import NUM_TILE_TYPES
+
+DRAW_TAGS = 'TUVW'     # <T12/> など。席0-3のツモ
+DISCARD_TAGS = 'DEFG'  # <D12/> など。席0-3の打牌
+YAKUMAN_HAN = 13
+
+_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+_GZIP_MAGIC = b'\x1f\x8b'
+
+def tile_from_tenhou(tile136: int) -> int:
+    """
+    天鳳の136枚の牌番号を34種のインデックスに変換します（並びは萬子・筒子・索子・東南西北白發中で同じ）。
+    """
+    return tile136 // 4
+
+def decode_meld(who: int, m: int) -> Tuple[int, int, int, int]:
+    """
+    天鳳の副露コード（N タグの m）を (鳴きの種類, 鳴いた牌, 面子の先頭牌, 鳴かれた席) に分解します。
+    """
+    from_seat = (who + (m & 3)) % 4
+    if m & 0x4:  # チー
+        t = m >> 10
+        called = t % 3
+        t //= 3
+        base = (t // 7) * 9 + t % 7
+        return CALL_CHI, base + called, base, from_seat
+    if m & 0x18:  # ポン・加槓
+        tile = (m >> 9) // 3
+        return (CALL_PON if m & 0x8 else CALL_KAKAN), tile, tile, from_seat
+    if m & 0x20:
+        raise ValueError("北抜きは対応していません")
+    tile = (m >> 8) // 4
+    if m & 3 == 0:
+        return CALL_ANKAN, tile, tile, who
+    return CALL_KAN, tile, tile, from_seat
+
+def _tiles(text: Optional[str]) -> List[int]:
+    return [tile_from_tenhou(int(value)) for value in text.split(',')] if text else []
+
+def _han(element: ET.Element) -> int:
+    if element.get('yakuman'):
+        return YAKUMAN_HAN * len(element.get('yakuman').split(','))
+    values = [int(value) for value in element.get('yaku', '').split(',') if value]
+    return sum(values[1::2])
+
+def parse_mjlog(source: BinaryIO) -> Iterator[np.ndarray]:
+    """
+    mjlog XMLを要素ごとに読み進め、1局（INITから次のINITまで）ずつイベント列を返すジェネレーター。
+    三人麻雀の局は飛ばします。
+    """
+    recorder: Optional[MemoryRecorder] = None
+    outcome, first_winner = END_ABORTED, 0
+
+    def finish() -> np.ndarray:
+        recorder.record(EVENT_GAME_END, first_winner, arg=outcome)
+        return recorder.events()
+
+    for _, element in ET.iterparse(source, events=('end',)):
+        tag = element.tag
+        if tag == 'INIT':
+            if recorder is not None:
+                yield finish()
+            hands = [_tiles(element.get(f'hai{seat}')) for seat in range(4)]
+            recorder = None
+            if all(hands):
+                seed = [int(value) for value in element.get('seed').split(',')]
+                recorder = MemoryRecorder()
+                outcome, first_winner = END_ABORTED, 0
+                recorder.record(EVENT_GAME_START, int(element.get('oya')), seed[0] // 4, 4)
+                for seat, hand in enumerate(hands):
+                    for tile in hand:
+                        recorder.record(EVENT_DEAL, seat, tile)
+                recorder.record(EVENT_DORA, tile=tile_from_tenhou(seed[5]))
+        elif recorder is None:
+            pass
+        elif tag[0] in DRAW_TAGS and tag[1:].isdigit():
+            recorder.record(EVENT_DRAW, DRAW_TAGS.index(tag[0]), tile_from_tenhou(int(tag[1:])))
+        elif tag[0] in DISCARD_TAGS and tag[1:].isdigit():
+            recorder.record(EVENT_DISCARD, DISCARD_TAGS.index(tag[0]), tile_from_tenhou(int(tag[1:])))
+        elif tag == 'N':
+            who = int(element.get('who'))
+            call_type, called, base, from_seat = decode_meld(who, int(element.get('m')))
+            recorder.record(EVENT_CALL, who, called, call_type, pack_extra(base, from_seat))
+        elif tag == 'REACH' and element.get('step') == '1':
+            recorder.record(EVENT_RIICHI, int(element.get('who')))
+        elif tag == 'DORA':
+            recorder.record(EVENT_DORA, tile=tile_from_tenhou(int(element.get('hai'))))
+        elif tag == 'AGARI':
+            who, from_who = int(element.get('who')), int(element.get('fromWho'))
+            fu = int(element.get('ten').split(',')[0])
+            if outcome != END_WIN:
+                outcome, first_winner = END_WIN, who
+            recorder.record(EVENT_WIN, who, tile_from_tenhou(int(element.get('machi'))), _han(element),
+                            pack_extra(fu, from_who))
+        elif tag == 'RYUUKYOKU':
+            outcome = END_EXHAUSTED
+        element.clear()
+    if recorder is not None:
+        yield finish()
+
+def validate_game(events: np.ndarray) -> Optional[str]:
+    """
+    イベント列をルールに照らして確かめ、問題があれば理由を返します（問題なければNone）。
+    手牌にない牌の打牌・鳴き、打牌後の枚数、和了形を確認します。
+    """
+    state = ReplayState(rivers=[np.zeros(0, dtype=np.int8) for _ in range(4)])
+    melds_called = [0] * 4
+    for kind, seat, tile, arg, turn, extra in events.tolist():
+        if kind in (EVENT_DEAL, EVENT_DRAW, EVENT_DISCARD, EVENT_CALL, EVENT_DORA, EVENT_WIN) and \
+                (seat > 3 or tile >= NUM_TILE_TYPES):
+            return "牌または席の番号が不正です"
+        if kind == EVENT_WIN:
+            hand = state.hands[seat].astype(int)
+            if unpack_extra(extra)[1] != seat:
+                hand[tile] += 1
+            if not is_complete(hand.tolist()):
+                return "和了形になっていません"
+        apply_event(state, kind, seat, tile, arg, turn, extra)
+        if kind in (EVENT_DEAL, EVENT_DRAW, EVENT_DISCARD, EVENT_CALL):
+            if state.hands[seat].min() < 0:
+                return "手牌にない牌を使っています"
+            if (state.hands[seat] + state.melds[seat]).max() > 4:
+                return "同じ牌が5枚以上あります"
+        if kind == EVENT_CALL and arg != CALL_KAKAN:
+            melds_called[seat] += 1
+        if kind == EVENT_DISCARD and int(state.hands[seat].sum()) + 3 * melds_called[seat] != 13:
+            return "打牌後の手牌の枚数が不正です"
+    return None
+
+@dataclass
+class LogResult:
+    """
+    1牌譜分の変換結果。gamesは (イベント列のbytes, 学習サンプル) の並びです。
+    """
+    name: str
+    games: List[Tuple[bytes, Dict[str, np.ndarray]]] = field(default_factory=list)
+    rejected: Dict[str, int] = field(default_factory=dict)
+
+def convert_log(name: str, data: bytes) -> LogResult:
+    """
+    牌譜1つ（XMLのbytes）を変換します。ワーカープロセスで実行されます。
+    """
+    result = LogResult(name)
+    encoder = ObservationEncoder(256, pin_memory=False)
+    try:
+        for events in parse_mjlog(io.BytesIO(data)):
+            reason = validate_game(events)
+            if reason is not None:
+                result.rejected[reason] = result.rejected.get(reason, 0) + 1
+                continue
+            result.games.append((events.tobytes(), samples_from_events(events, encoder)))
+    except (ET.ParseError, ValueError, TypeError, AttributeError) as e:
+        reason = f"読み込めない牌譜: {type(e).__name__}"
+        result.rejected[reason] = result.rejected.get(reason, 0) + 1
+    return result
+
+def _open(path: str) -> BinaryIO:
+    for suffix, opener in _OPENERS.items():
+        if path.endswith(suffix):
+            return opener(path, 'rb')
+    return open(path, 'rb')
+
+def _maybe_gunzip(data: bytes) -> bytes:
+    # 天鳳の .mjlog はgzip圧縮されたXML
+    return gzip.decompress(data) if data[:2] == _GZIP_MAGIC else data
+
+def iter_logs(paths: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+    """
+    牌譜ファイル（XML, .mjlog, .gz/.bz2/.xz）とtarアーカイブから、牌譜を1つずつ (名前, XML) で返します。
+    アーカイブは展開せずに先頭から順に読みます。
+    """
+    for path in paths:
+        if '.tar' in path or path.endswith('.tgz'):
+            with tarfile.open(path, 'r|*') as archive:
+                for member in archive:
+                    if member.isfile():
+                        yield f"{path}:{member.name}", _maybe_gunzip(archive.extractfile(member).read())
+        else:
+            with _open(path) as f:
+                yield path, _maybe_gunzip(f.read())
+
+@dataclass
+class ImportStats:
+    logs: int = 0
+    games: int = 0
+    samples: int = 0
+    rejected: Dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        text = f"{self.logs} 牌譜, {self.games} 局, {self.samples} サンプル"
+        if self.rejected:
+            text += " / 除外: " + ", ".join(f"{reason} {count}" for reason, count in self.rejected.items())
+        return text
+
+class LogImporter:
+    """
+    牌譜を学習データストア（SAMPLE_COLUMNS形式）に取り込みます。record_pathを渡すと変換後のイベント列も記録します。
+    ワーカーに渡す牌譜はワーカー数の2倍までに抑え、読み込みが変換を追い越してもメモリを使い過ぎないようにします。
+    """
+
+    def __init__(self, store_path: str, record_path: Optional[str] = None, num_workers: int = 0):
+        self.store_path = store_path
+        self.record_path = record_path
+        self.num_workers = num_workers
+        self.stats = ImportStats()
+
+    def run(self, paths: Iterable[str]) -> ImportStats:
+        record = GameRecordWriter(self.record_path) if self.record_path else None
+        try:
+            with ChunkedDatasetWriter(self.store_path, SAMPLE_COLUMNS) as store:
+                for result in self._results(iter_logs(paths)):
+                    self._write(result, store, record)
+        finally:
+            if record is not None:
+                record.close()
+        return self.stats
+
+    def _results(self, logs: Iterator[Tuple[str, bytes]]) -> Iterator[LogResult]:
+        if self.num_workers <= 0:
+            for name, data in logs:
+                yield convert_log(name, data)
+            return
+        ctx = mp.get_context('spawn')
+        with ProcessPoolExecutor(self.num_workers, mp_context=ctx) as pool:
+            pending = set()
+            for name, data in logs:
+                pending.add(pool.submit(convert_log, name, data))
+                if len(pending) >= self.num_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in pending:
+                yield future.result()
+
+    def _write(self, result: LogResult, store, record: Optional[GameRecordWriter]) -> None:
+        self.stats.logs += 1
+        for reason, count in result.rejected.items():
+            self.stats.rejected[reason] = self.stats.rejected.get(reason, 0) + count
+        for payload, samples in result.games:
+            if len(samples['action']):
+                store.append_game(**samples)
+                self.stats.samples += len(samples['action'])
+            if record is not None:
+                record.append_events(np.frombuffer(payload, dtype=EVENT_DTYPE))
+            self.stats.games += 1
+
+def main():
+    parser = argparse.ArgumentParser(description="天鳳形式の牌譜を学習データに取り込みます。")
+    parser.add_argument('logs', nargs='+', help="牌譜ファイル（.xml, .mjlog, .gz/.bz2/.xz, tarアーカイブ）")
+    parser.add_argument('--store', required=True, help="追記する学習データストア（HDF5）")
+    parser.add_argument('--record', help="変換したイベント列を書き出す記録ファイル")
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    stats = LogImporter(args.store, args.record, args.workers).run(args.logs)
+    print(stats.summary())
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 # main.py
 
+from typing import Dict
+import argparse
+import os
+import time
 import pygame
 from game import MahjongGame
 import logging
@@ -8,13 +12,72 @@ import logging
 logging.basicConfig(filename='game_error.log', level=logging.ERROR,
                     format='%(asctime)s:%(levelname)s:%(message)s')
 
+# ウィンドウの設定
+WINDOW_WIDTH = 1200
+WINDOW_HEIGHT = 800
+
+def run_turbo(num_games: int, render_every: int = 0, headless: bool = False) -> Dict[str, int]:
+    """
+    AI同士の対局をフレーム制限・ログ出力なしで続けて打ちます。
+
+    Args:
+        num_games (int): 対局数
+        render_every (int): 観戦用にNフレームごとに描画する（0なら描画しない）
+        headless (bool): ウィンドウを作らずSDLのダミードライバーで動かす
+
+    Returns:
+        Dict[str, int]: 和了者ごとの和了数（流局は "流局"）
+    """
+    if headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    window = font = None
+    if render_every:
+        pygame.init()
+        window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption("日本麻雀ゲーム（ターボモード）")
+        font = pygame.font.SysFont(None, 24)
+
+    wins = {}
+    start = time.perf_counter()
+    for _ in range(num_games):
+        game = MahjongGame(human_seats=(), load_images=render_every > 0, verbose=False)
+        if render_every:
+            game.play_game_pygame(window, font, fps=0, render_every=render_every, quit_on_exit=False)
+        else:
+            game.play_headless()
+        name = game.winner.name if game.winner else "流局"
+        wins[name] = wins.get(name, 0) + 1
+    elapsed = time.perf_counter() - start
+    if render_every:
+        pygame.quit()
+
+    print(f"{num_games} 局を {elapsed:.2f} 秒で終えました（{num_games / elapsed:.1f} 局/秒）")
+    for name, count in sorted(wins.items()):
+        print(f"  {name}: {count}")
+    return wins
+
 def main():
+    parser = argparse.ArgumentParser(description="日本麻雀ゲーム")
+    parser.add_argument('--turbo', type=int, metavar='GAMES', default=0,
+                        help="AI同士でGAMES局を最速で続けて打つ")
+    parser.add_argument('--render-every', type=int, default=0,
+                        help="ターボモードでNフレームごとに描画して観戦する（0なら描画しない）")
+    parser.add_argument('--headless', action='store_true', help="ウィンドウを作らずSDLのダミードライバーを使う")
+    parser.add_argument('--replay', metavar='PATH', help="対局記録ファイルを再生する")
+    args = parser.parse_args()
+
+    if args.replay:
+        from replay_viewer import run_replay
+        run_replay(args.replay, size=(WINDOW_WIDTH, WINDOW_HEIGHT))
+        return
+
+    if args.turbo:
+        run_turbo(args.turbo, args.render_every, args.headless)
+        return
+
     # Pygameの初期化
     pygame.init()
 
-    # ウィンドウの設定
-    WINDOW_WIDTH = 1200
-    WINDOW_HEIGHT = 800
     window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption("日本麻雀ゲーム")
 
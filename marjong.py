@@ -1,27 +1,42 @@
+# marjong.py
+# 麻雀のルール・役判定。標準ライブラリだけで読み込めるよう、学習（torch・optuna・h5py）と
+# GUI（PyQt5）のコードは marjong_ai.py・marjong_gui.py に分け、使うときに読み込みます。
+
+import asyncio
+import concurrent.futures
+import importlib
+import queue
 import random
-from collections import Counter
-import itertools
 import sys
-import socket
-import threading
-import unittest
-import h5py
-import numpy as np
-import math
-import optuna
-import torch
-import torch.nn as nn
-import torch.optim as optim
-import torch.nn.functional as F
-from typing import List, Dict, Tuple, Any, Optional
-from optuna.trial import Trial
-from enum import Enum
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QPushButton,
-                             QGridLayout, QVBoxLayout, QHBoxLayout, QLabel, QMessageBox)
-from PyQt5.QtGui import QPixmap, QIcon
-from PyQt5.QtCore import Qt, QSize
-from torch.nn import TransformerEncoder, TransformerEncoderLayer
-from torch.nn.utils.rnn import pad_sequence
+from collections import Counter
+from typing import List, Any, Optional, Sequence
+from call_arbiter import CALL_KAN, CALL_RON, Call, CallArbiter, is_complete, meld_tile_indices
+from hand_analysis import analyze_win
+
+# 遅延読み込みする名前と定義先のモジュール
+_LAZY_ATTRIBUTES = {
+    'MahjongGUI': 'marjong_gui',
+    'DISCARD_COLUMNS': 'marjong_gui',
+    'AIPlayer': 'marjong_ai',
+    'objective': 'marjong_ai',
+    'train_ai_players': 'marjong_ai',
+    'load_game_data': 'marjong_ai',
+    'iter_game_data': 'marjong_ai',
+    'device': 'marjong_ai',
+    'PolicyValueNet': 'models',
+    'QNetwork': 'models',
+}
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
 
 # 定数の定義
 SUITS = ['萬', '索', '筒']
@@ -47,6 +62,22 @@ class Tile:
     def __hash__(self) -> int:
         return hash((self.suit, self.value))
 
+# 34種のインデックスでの各色の先頭（萬子・筒子・索子の順）
+_SUIT_OFFSETS = {'萬': 0, '筒': 9, '索': 18}
+
+def tile_index(tile: Tile) -> int:
+    """牌を34種のインデックス（萬子0-8, 筒子9-17, 索子18-26, 東南西北白發中27-33）に変換します。"""
+    if tile.suit in _SUIT_OFFSETS:
+        return _SUIT_OFFSETS[tile.suit] + int(tile.value) - 1
+    return 27 + HONORS.index(tile.value)
+
+def hand_counts(hand: List[Tile]) -> bytes:
+    """手牌を牌種ごとの枚数に集計します。"""
+    counts = bytearray(34)
+    for tile in hand:
+        counts[tile_index(tile)] += 1
+    return bytes(counts)
+
 class Yaku:
     def __init__(self, name: str, han: int, description: str, is_yakuman: bool = False):
         self.name = name
@@ -311,6 +342,10 @@ class Wall:
         """
         return self.tiles.pop() if self.tiles else None
 
+    def draw_replacement(self) -> Tile:
+        """槓の後の嶺上牌を、ツモとは反対の端から引きます。山が空の場合はNoneを返す。"""
+        return self.tiles.pop(0) if self.tiles else None
+
     def get_dora(self) -> List[Tile]:
         """ドラ牌を取得するメソッド。
 
@@ -487,111 +522,6 @@ def evaluate_yakus(hand, winning_tile, dora_tiles, player, wall):
 
     return yaku_list, total_fu  # 役のリストと符の合計を返す
 
-class MahjongGUI(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("麻雀ゲーム")
-        self.setGeometry(100, 100, 1200, 800)
-        self.central_widget = QWidget()
-        self.setCentralWidget(self.central_widget)
-        self.layout = QVBoxLayout()
-        self.central_widget.setLayout(self.layout)
-        players = [Player(f"プレイヤー{i+1}") for i in range(4)]
-        self.game = Game(players)
-        self.initUI()
-
-        # 背景を緑色に設定
-        self.setStyleSheet("background-color: green;")
-
-    def initUI(self):
-        # 山札表示
-        self.wall_label = QLabel("残り牌: 136")
-        self.layout.addWidget(self.wall_label)
-
-        # プレイヤーの手牌表示
-        self.player_hands = []
-        for i in range(4):
-            hand_layout = QHBoxLayout()
-            self.player_hands.append(hand_layout)
-            self.layout.addLayout(hand_layout)
-
-        # 捨て牌表示
-        discard_layout = QGridLayout()
-        self.layout.addLayout(discard_layout)
-
-        # 操作ボタン
-        button_layout = QHBoxLayout()
-        self.pon_button = QPushButton("ポン")
-        self.chi_button = QPushButton("チー")
-        self.kan_button = QPushButton("カン")
-        self.riichi_button = QPushButton("リーチ")
-        self.tsumo_button = QPushButton("ツモ")
-        self.ron_button = QPushButton("ロン")
-        button_layout.addWidget(self.pon_button)
-        button_layout.addWidget(self.chi_button)
-        button_layout.addWidget(self.kan_button)
-        button_layout.addWidget(self.riichi_button)
-        button_layout.addWidget(self.tsumo_button)
-        button_layout.addWidget(self.ron_button)
-        self.layout.addLayout(button_layout)
-
-        # 河、山、ドラ表示
-        self.river_label = QLabel("河: []")
-        self.layout.addWidget(self.river_label)
-        self.dora_label = QLabel("ドラ: []")
-        self.layout.addWidget(self.dora_label)
-
-        self.update_display()
-
-    def update_display(self):
-        """UIを更新するメソッド"""
-        # 山札の更新
-        self.wall_label.setText(f"残り牌: {len(self.game.wall.tiles)}")
-
-        # 河の更新
-        self.river_label.setText(f"河: {self.game.discard_pile}")
-
-        # ドラの更新（仮の実装）
-        self.dora_label.setText(f"ドラ: {self.game.dora_indicators}")
-
-        # プレイヤーの手牌更新
-        for i, player in enumerate(self.game.players):
-            self.update_player_hand(i, player.hand)
-
-        # 捨て牌の更新
-        discard_layout = self.layout.itemAt(3).layout()  # 捨て牌のレイアウトを取得
-        self.clear_layout(discard_layout)  # 既存の捨て牌をクリア
-        for tile in self.game.discard_pile:  # 捨て牌のリストを取得
-            self.add_tile_button(discard_layout, tile)  # 新しい捨て牌を追加
-
-    def update_player_hand(self, player_index, hand):
-        """プレイヤーの手牌を更新するメソッド"""
-        layout = self.player_hands[player_index]
-        self.clear_layout(layout)  # 既存の手牌をクリア
-        for tile in hand:
-            self.add_tile_button(layout, tile)  # 新しい手牌を追加
-
-    def clear_layout(self, layout):
-        """レイアウト内の全ウィジェットをクリアするヘルパーメソッド"""
-        for i in reversed(range(layout.count())): 
-            layout.itemAt(i).widget().setParent(None)
-
-    def add_tile_button(self, layout, tile):
-        """タイルボタンを追加するヘルパーメソッド"""
-        tile_button = QPushButton(str(tile))
-        tile_button.setFixedSize(40, 60)
-        layout.addWidget(tile_button)
-
-    def tile_clicked(self, tile):
-        """タイルがクリックされたときの処理"""
-        print(f"{tile} がクリックされました")
-        self.game.discard_pile.append(tile)  # タイルを捨て牌に追加
-        self.update_display()  # 表示を更新
-
-    def update_dora(self):
-        # ドラの更新
-        self.dora_label.setText(f"ドラ: {', '.join(map(str, self.game.dora_indicators))}")
-
 def is_special_wait(hand, winning_tile):
     """特定の待ちの判定ロジックを実装"""
     counts = Counter(str(tile) for tile in hand)
@@ -605,19 +535,33 @@ def is_special_wait(hand, winning_tile):
 
 # Playerクラスを定義
 class Player:
-    def __init__(self, name):
+    def __init__(self, name, ai=None):
         self.name = name
         self.hand = []  # ここでhand属性を初期化
+        self.melds = []  # 鳴いた面子
+        self.discards = []  # 自分の捨て牌（鳴かれた牌も含む。フリテンの判定に使う）
+        self.ai = ai  # choose_discard_tile(hand, game) を持つAI。Noneならツモ切り
+        self.won = False
+
+    def has_won(self):
+        return self.won
 
 # Gameクラスを定義
 class Game:
-    def __init__(self, players):
+    def __init__(self, players, human_seats: Sequence[int] = (0,)):
         """ゲームの初期化を行います。"""
+        self.setup_table(players, human_seats)
+        self.initUI()
+
+    def setup_table(self, players, human_seats: Sequence[int] = (0,)):
+        """卓の状態を初期化します（UIには触れません）。human_seatsは人間が座る席です。"""
         self.round_wind = '東'  # 場風
         self.bonus_points = 0  # 本場点数
         self.players = players
-        self.player = players[0]  # 人間プレイヤー
-        self.ai_players = players[1:]  # AIプレイヤー
+        self.human_seats = tuple(human_seats)
+        self.dealer = 0  # 親の席
+        self.player = players[self.human_seats[0]] if self.human_seats else None  # 人間プレイヤー
+        self.ai_players = [p for seat, p in enumerate(players) if seat not in self.human_seats]  # AIプレイヤー
         self.all_players = players
         self.wall = Wall()
         self.current_player_index = 0
@@ -625,10 +569,23 @@ class Game:
         self.dora_indicators = []
         self.first_round = True
         self.first_turn = True
-        self.initUI()
+        self.arbiter = CallArbiter(len(players), can_ron=self.can_ron)
+        self.pending_calls = {}  # 人間の席 -> 返答を待っている鳴きの候補
+        self._call_answers = {}  # 人間の席 -> 返答を受け取るFuture
+        self.human_discards = queue.Queue()  # 人間の打牌（declare_discard で入る）
+        self.must_discard = False  # チー・ポンの直後で、ツモらずに打牌する
+        self.replacement_draw = False  # 大明槓の直後で、嶺上牌を引いてから打牌する
+        self.last_discard = None
+        self.on_change = None  # 卓の状態が変わったときに（ゲームのスレッドから）呼ばれる
+
+    def notify_change(self):
+        """on_change に卓の状態が変わったことを知らせます。"""
+        if self.on_change is not None:
+            self.on_change()
 
     def initUI(self):
         """UIの初期化処理を行います。"""
+        from PyQt5.QtWidgets import QMainWindow, QWidget, QGridLayout, QVBoxLayout, QHBoxLayout
         self.window = QMainWindow()
         self.window.setWindowTitle("麻雀ゲーム")
         self.window.setGeometry(100, 100, 800, 600)
@@ -674,6 +631,8 @@ class Game:
         """初期手牌を配ります。"""
         for player in self.all_players:
             player.hand = [self.wall.draw() for _ in range(13)]
+        for seat, player in enumerate(self.all_players):
+            self.arbiter.update_hand(seat, hand_counts(player.hand))
         print("初期手牌が配られました。")  # デバッグ用
 
     def start_game(self):
@@ -698,21 +657,26 @@ class Game:
                 self.handle_win(current_player, "地和")
                 return
             
-            state = self.get_state()
-            action = self.get_action(current_player, state)
-            self.perform_action(current_player, action)
+            if self.current_player_index in self.human_seats:
+                call = self.handle_player_turn()
+            else:
+                call = self.handle_ai_turn(current_player)
+            if call is not None and call.call_type == CALL_RON:
+                return
             
-            if self.first_round and not self.first_turn:
+            if call is None and self.first_round and not self.first_turn:
                 for player in self.players:
-                    if player != current_player and self.can_win_on_discard(player, action) and self.is_renhou(player):
+                    if player != current_player and self.can_win_on_discard(player, self.last_discard) and self.is_renhou(player):
                         self.handle_win(player, "人和")
                         return
             
             self.first_turn = False
-            if self.current_player_index == 3:
-                self.first_round = False
+            if self.current_player_index == 3 or call is not None:
+                self.first_round = False  # 鳴きが入ると第一巡は終わり
             
-            self.current_player_index = (self.current_player_index + 1) % 4
+            # 鳴きが成立したときは apply_call が鳴いた席に手番を移している
+            if call is None:
+                self.current_player_index = (self.current_player_index + 1) % 4
 
     def is_tenhou(self, player):
         """天和の判定を行います。"""
@@ -730,6 +694,10 @@ class Game:
         """捨て牌で和了できるか判定します。"""
         return self.is_winning_hand(player.hand + [discarded_tile])
 
+    def is_winning_hand(self, hand):
+        """和了形（副露を除く14-3n枚）かどうかを判定します。"""
+        return is_complete(hand_counts(hand))
+
     def handle_win(self, player, yaku_name):
         """和了処理を行います。"""
         print(f"{player.name}の{yaku_name}!")
@@ -752,32 +720,159 @@ class Game:
         
         return yaku_list
 
+    def draw_for_turn(self, player):
+        """手番の牌を引きます。チー・ポンの直後はツモらずにNoneを返し、槓の直後は嶺上牌を引きます。"""
+        if self.must_discard:
+            self.must_discard = False
+            return None
+        if self.replacement_draw:
+            self.replacement_draw = False
+            drawn_tile = self.wall.draw_replacement()
+        else:
+            drawn_tile = self.wall.draw()
+        player.hand.append(drawn_tile)
+        return drawn_tile
+
     def handle_player_turn(self):
-        """プレイヤーの行動を処理します。"""
+        """プレイヤーの行動を処理します。成立した鳴き・ロンを返します。"""
         player = self.all_players[self.current_player_index]
-        drawn_tile = self.wall.draw()
-        player.hand.append(drawn_tile)
+        self.draw_for_turn(player)
         
         self.update_player_hand_display()
         
         discarded_tile = self.get_player_discard()
-        player.hand.remove(discarded_tile)
-        
-        self.update_discard_display(discarded_tile)
-        
-        self.handle_calls(discarded_tile)
+        return self.discard(player, discarded_tile)
 
     def handle_ai_turn(self, ai_player):
-        """AIプレイヤーの行動を処理します。"""
-        drawn_tile = self.wall.draw()
-        ai_player.hand.append(drawn_tile)
-        
-        game_state = self.get_game_state()
-        discarded_tile = ai_player.ai.choose_discard_tile(ai_player.hand, game_state)
-        ai_player.hand.remove(discarded_tile)
+        """AIプレイヤーの行動を処理します。成立した鳴き・ロンを返します。"""
+        drawn_tile = self.draw_for_turn(ai_player)
         
+        if ai_player.ai is not None:
+            discarded_tile = ai_player.ai.choose_discard_tile(ai_player.hand, self)
+        else:
+            discarded_tile = drawn_tile if drawn_tile is not None else ai_player.hand[-1]
+        return self.discard(ai_player, discarded_tile)
+
+    def get_player_discard(self):
+        """人間の打牌を declare_discard から受け取ります。手牌にない牌（手番外の操作）は読み捨てます。"""
+        hand = self.all_players[self.current_player_index].hand
+        while True:
+            tile = self.human_discards.get()
+            if tile in hand:
+                return tile
+
+    def declare_discard(self, tile):
+        """人間の打牌を宣言します（GUIのスレッドから呼べます）。"""
+        self.human_discards.put(tile)
+
+    def update_player_hand_display(self):
+        """手牌の表示を更新します。表示はGUIが on_change を受けて game の状態を読んで行います。"""
+        self.notify_change()
+
+    def update_discard_display(self, tile):
+        """捨て牌を河に加えます。"""
+        self.discard_pile.append(tile)
+        self.notify_change()
+
+    def discard(self, player, discarded_tile):
+        """打牌して、それに対する鳴き・ロンを受け付けます。"""
+        player.hand.remove(discarded_tile)
+        player.discards.append(discarded_tile)
+        self.last_discard = discarded_tile
         self.update_discard_display(discarded_tile)
-        ai_player.ai.handle_calls(discarded_tile)
+        return self.handle_calls(discarded_tile)
+
+    def handle_calls(self, discarded_tile):
+        """
+        捨て牌に対する鳴き・ロンを CallArbiter.collect で受け付け、成立した宣言を反映して返します。
+        AIの席はその場で答え、人間の席は pending_calls に候補を置いて declare_call を待ちます。
+        """
+        discarder = self.current_player_index
+        tile = tile_index(discarded_tile)
+        # 手牌が変わったのは打牌した席だけなので、その席の表だけを引き直す
+        self.arbiter.update_hand(discarder, hand_counts(self.all_players[discarder].hand))
+        if not self.arbiter.candidates(discarder, tile):
+            return None  # 誰も宣言できない打牌ではイベントループを回さない
+        deciders = {seat: self.human_call_decision if seat in self.human_seats else self.ai_call_decision
+                    for seat in range(len(self.players)) if seat != discarder}
+        call = asyncio.run(self.arbiter.collect(discarder, tile, deciders))
+        return self.apply_call(call, discarded_tile)
+
+    def ai_call_decision(self, seat: int, calls: List[Call]) -> Optional[Call]:
+        """AIの宣言。今のところロンだけを宣言します。"""
+        return next((call for call in calls if call.call_type == CALL_RON), None)
+
+    async def human_call_decision(self, seat: int, calls: List[Call]) -> Optional[Call]:
+        """人間の宣言。候補を pending_calls に置き、declare_call の返答を待ちます。"""
+        answer = concurrent.futures.Future()
+        self._call_answers[seat] = answer
+        self.pending_calls[seat] = calls
+        self.notify_change()
+        try:
+            return await asyncio.wrap_future(answer)
+        finally:
+            self.pending_calls.pop(seat, None)
+            self._call_answers.pop(seat, None)
+            self.notify_change()
+
+    def declare_call(self, call_type: Optional[int], seat: Optional[int] = None) -> bool:
+        """
+        人間の返答（Noneは見送り）を保留中の鳴きに渡します。GUIのスレッドから呼べます。
+        チーの候補が複数あるときは先頭を選びます。返答を受け付けたかどうかを返します。
+        """
+        if seat is None:
+            seat = self.human_seats[0]
+        answer = self._call_answers.get(seat)
+        calls = self.pending_calls.get(seat)
+        if answer is None or calls is None:
+            return False
+        choice = next((call for call in calls if call.call_type == call_type), None)
+        try:
+            answer.set_result(choice)
+        except concurrent.futures.InvalidStateError:
+            return False  # 時間切れで見送りになった後
+        return True
+
+    def can_ron(self, call: Call) -> bool:
+        """フリテンでなく、役があるときだけロンできます。"""
+        player = self.all_players[call.seat]
+        ron_mask = self.arbiter.options(call.seat).ron_mask
+        if any(ron_mask >> tile_index(tile) & 1 for tile in player.discards):
+            return False  # 自分の捨て牌に待ちがある（フリテン）
+        hand = bytearray(hand_counts(player.hand))
+        hand[call.tile] += 1
+        called = hand_counts([tile for meld in player.melds for tile in meld])
+        yaku, _ = analyze_win(hand, called, call.tile, False, getattr(player, 'in_riichi', False),
+                              (call.seat - self.dealer) % len(self.players), HONORS.index(self.round_wind))
+        return yaku != 0
+
+    def apply_call(self, call: Optional[Call], discarded_tile):
+        """成立した宣言を手牌・河に反映し、鳴いた席に手番を移します。"""
+        if call is None:
+            return None
+        player = self.all_players[call.seat]
+        if call.call_type == CALL_RON:
+            player.hand.append(discarded_tile)
+            player.won = True
+            self.handle_win(player, "ロン")
+            return call
+        needed = meld_tile_indices(call)
+        meld = [discarded_tile]
+        for tile in list(player.hand):
+            if tile_index(tile) in needed:
+                needed.remove(tile_index(tile))
+                player.hand.remove(tile)
+                meld.append(tile)
+        player.melds.append(meld)
+        if self.discard_pile and self.discard_pile[-1] == discarded_tile:
+            self.discard_pile.pop()
+        self.arbiter.update_hand(call.seat, hand_counts(player.hand))
+        self.current_player_index = call.seat
+        # 槓は3枚を晒すので、嶺上牌で14枚に戻してから打牌する
+        self.must_discard = call.call_type != CALL_KAN
+        self.replacement_draw = call.call_type == CALL_KAN
+        self.notify_change()
+        return call
 
     def is_game_over(self):
         """ゲーム終了条件をチェックします。"""
@@ -836,163 +931,25 @@ class Game:
         additional_score *= self.bonus_points
         
         return base_score + additional_score
-class QNetwork(nn.Module):
-    def __init__(self, input_size: int, output_size: int):
-        super(QNetwork, self).__init__()
-        self.fc1 = nn.Linear(input_size, 128)
-        self.fc2 = nn.Linear(128, 128)
-        self.fc3 = nn.Linear(128, output_size)
-
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
-        x = torch.relu(self.fc1(x))
-        x = torch.relu(self.fc2(x))
-        return self.fc3(x)
-
-# Ensure 'device' is defined before using it
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")  # Add this line
-
-class AIPlayer:
-    def __init__(self, name: str, model_params: Dict[str, Any]):
-        """
-        AIプレイヤーを初期化します。
-
-        Args:
-            name (str): プレイヤーの名前
-            model_params (Dict[str, Any]): モデルのパラメータ
-        """
-        self.name = name
-        self.model = TransformerEncoder(**model_params).to(device)
-        self.monte_carlo_tree_search = Monte_Carlo_Tree_Search(self.model, num_simulations=model_params['num_simulations'])
-        self.optimizer = optim.Adam(
-            self.model.parameters(),
-            lr=model_params['learning_rate'],
-            weight_decay=model_params['weight_decay']
-        )
-
-    def select_action(self, state: Any) -> int:
-        """
-        現在の状態に基づいて行動を選択します。
-
-        Args:
-            state (Any): 現在のゲーム状態
-
-        Returns:
-            int: 選択された行動
-        """
-        action_probs = self.monte_carlo_tree_search.search(state)
-        actions = list(action_probs.keys())
-        probs = list(action_probs.values())
-        return np.random.choice(actions, p=probs / np.sum(probs))
-
-    def train(self, examples: List[Tuple[Any, List[float], float]]):
-        """
-        与えられた例を使用してモデルを訓練します。
-
-        Args:
-            examples (List[Tuple[Any, List[float], float]]): 訓練データ
-                各要素は (state, mcts_probs, winner) のタプル
-        """
-        self.model.train()
-        for state, mcts_probs, winner in examples:
-            state_input = self.monte_carlo_tree_search.prepare_input(state)
-            mcts_probs = torch.FloatTensor(mcts_probs).to(device)
-            winner = torch.FloatTensor([winner]).to(device)
-
-            self.optimizer.zero_grad()
-            policy, value = self.model(state_input)
-            policy_loss = -torch.sum(mcts_probs * torch.log(policy + 1e-10))  # 数値安定性のために小さな値を追加
-            value_loss = F.mse_loss(value.squeeze(-1), winner)
-            loss = policy_loss + value_loss
-            loss.backward()
-            self.optimizer.step()
-
-def objective(trial: Trial) -> float:
-    """
-    Optunaの目的関数。ハイパーパラメータを最適化します。
-
-    Args:
-        trial (Trial): Optunaのトライアルオブジェクト
-
-    Returns:
-        float: 評価スコア（勝率）
-    """
-    model_params = {
-        'input_size': 4 * 4 * 9,  # 4 players, 4 suits, 9 tiles
-        'output_size': 34,  # Number of possible actions
-        'nhead': trial.suggest_int('nhead', 4, 8),
-        'num_layers': trial.suggest_int('num_layers', 2, 6),
-        'dim_feedforward': trial.suggest_int('dim_feedforward', 512, 2048, step=256),
-        'num_simulations': trial.suggest_int('num_simulations', 100, 400, step=50),
-        'learning_rate': trial.suggest_loguniform('learning_rate', 1e-5, 1e-3),
-        'weight_decay': trial.suggest_loguniform('weight_decay', 1e-5, 1e-3),
-    }
-
-    ai_player = AIPlayer("AI", model_params)
-    
-    def evaluate(player: AIPlayer) -> float:
-        """
-        AIプレイヤーの評価を行います。
-
-        Args:
-            player (AIPlayer): 評価対象のAIプレイヤー
-
-        Returns:
-            float: 勝率
-        """
-        test_games = 10
-        wins = 0
-        for _ in range(test_games):
-            game = Game([player] + [AIPlayer(f"Opponent{i+1}", model_params) for i in range(3)])
-            winner = game.play()
-            if winner == player:
-                wins += 0.1
-        return wins / test_games
-
-    return evaluate(ai_player)
-
-def train_ai_players(num_trials: int):
-    """
-    AIプレイヤーをトレーニングします。
-
-    Args:
-        num_trials (int): トライアルの数
-    """
-    study = optuna.create_study(direction="maximize")
-    study.optimize(objective, n_trials=num_trials)
-    print(f"Best trial: {study.best_trial.params}")
-
-def load_game_data(filename='game_data.h5') -> Dict[str, Any]:
-    """
-    ゲームデータをロードします。
-
-    Args:
-        filename (str): データファイル名
-
-    Returns:
-        Dict[str, Any]: プレイヤーごとのデータ
-    """
-    data = {}
-    with h5py.File(filename, 'r') as f:
-        for player_name in f.keys():
-            data[player_name] = {
-                'discarded_tiles': f[player_name]['discarded_tiles'][:],
-                'actions': f[player_name]['actions'][:]
-            }
-    return data
-
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
 
+def main():
     # ゲーム開始時に選択肢を表示
     choice = input("AIとの対戦を選択するには '1' を、強化学習を選択するには '2' を入力してください: ")
 
     if choice == '1':
+        from PyQt5.QtWidgets import QApplication
+        from marjong_gui import MahjongGUI
+        app = QApplication(sys.argv)
         window = MahjongGUI()
         window.show()
         sys.exit(app.exec_())
     elif choice == '2':
         # AIプレイヤーのトレーニング
+        from marjong_ai import train_ai_players
         train_ai_players(100)  # AIをトレーニング
     else:
         print("無効な選択です。プログラムを終了します。")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+# marjong_ai.py
+# marjong のAIプレイヤーと学習・ハイパーパラメータ探索。torch・optuna・h5pyはここで読み込みます。
+
+import functools
+import warnings
+from typing import Callable, Iterator, List, Dict, Tuple, Any, Optional
+import numpy as np
+import optuna
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from optuna.trial import Trial
+from dataset import ChunkedDatasetReader
+from game_record import EVENT_DISCARD
+from encoder import OBS_SIZE
+from models import PolicyValueNet
+from trainer import BatchTrainer, iterate_examples, make_loader
+from tuning import DEFAULT_STORAGE, run_study
+from checkpoint import CheckpointManager
+from augmentation import SymmetryAugmenter
+from ai_agent import AIAgent
+from policy_agent import PolicyAgent
+from tournament import AgentSpec, Tournament
+
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")  # Add this line
+
+class AIPlayer:
+    def __init__(self, name: str, model_params: Dict[str, Any], model: Optional[nn.Module] = None):
+        """
+        AIプレイヤーを初期化します。
+
+        Args:
+            name (str): プレイヤーの名前
+            model_params (Dict[str, Any]): モデルのパラメータ
+            model (Optional[nn.Module]): 他のプレイヤーと共有するモデル（省略時は新規作成）
+        """
+        self.name = name
+        self.model = model if model is not None else PolicyValueNet.from_params(model_params).to(device)
+        self.optimizer = optim.Adam(
+            self.model.parameters(),
+            lr=model_params['learning_rate'],
+            weight_decay=model_params['weight_decay']
+        )
+
+    def select_action(self, state: Any, legal: Optional[np.ndarray] = None) -> int:
+        """
+        現在の状態に基づいて、方策ネットワークの出力する確率に従って行動を選択します。
+
+        Args:
+            state (Any): 現在のゲーム状態（エンコーダーの特徴プレーン）
+            legal (Optional[np.ndarray]): 選べる行動のマスク（省略時はすべて）
+
+        Returns:
+            int: 選択された行動
+        """
+        obs = torch.as_tensor(np.asarray(state, dtype=np.float32))[None].to(device)
+        self.model.eval()
+        with torch.no_grad():
+            logits, _ = self.model(obs)
+        probs = torch.softmax(logits[0].float(), dim=-1).cpu().numpy()
+        if legal is not None:
+            probs = probs * legal
+        return int(np.random.choice(len(probs), p=probs / np.sum(probs)))
+
+    def train(self, examples: List[Tuple[Any, List[float], float]], batch_size: int = 256,
+              accumulation_steps: int = 1, num_threads: Optional[int] = None, augment: bool = False):
+        """
+        与えられた例を使用してモデルをミニバッチ単位で訓練します。
+
+        Args:
+            examples (List[Tuple[Any, List[float], float]]): 訓練データ
+                各要素は (state, mcts_probs, winner) のタプル。stateはエンコーダーの特徴プレーン
+            batch_size (int): ミニバッチの大きさ
+            accumulation_steps (int): 勾配を累積するバッチ数
+            num_threads (Optional[int]): torchが使うCPUスレッド数
+            augment (bool): 萬筒索の入れ替えと席の回転をランダムにかけるかどうか
+
+        Returns:
+            TrainStats: 損失と毎秒サンプル数
+        """
+        trainer = BatchTrainer(self.model, self.optimizer, accumulation_steps, num_threads, device)
+        transform = SymmetryAugmenter() if augment else None
+        return trainer.fit(iterate_examples(examples, batch_size, transform=transform))
+
+    def train_from_store(self, path: str, epochs: int = 1, batch_size: int = 256, num_workers: int = 2,
+                         accumulation_steps: int = 1, num_threads: Optional[int] = None,
+                         checkpoints: Optional[CheckpointManager] = None, augment: bool = False,
+                         checkpoint_every: int = 1000):
+        """
+        学習データストア（HDF5）からワーカープロセス経由でバッチを読み込んで訓練します。
+        checkpointsを渡すと最新のチェックポイントから再開し、checkpoint_every回のパラメータ更新ごとと
+        エポックの終わりに、ワーカーごとの読み出し位置と一緒に保存します。再開時は同じnum_workersが必要です。
+
+        Args:
+            path (str): dataset.ChunkedDatasetWriter で書き出した学習データ
+            epochs (int): 周回数
+            checkpoints (Optional[CheckpointManager]): チェックポイントの保存先
+            augment (bool): 萬筒索の入れ替えと席の回転をランダムにかけるかどうか
+            checkpoint_every (int): チェックポイントを保存する間隔（パラメータの更新回数）
+
+        Returns:
+            List[TrainStats]: このプロセスで学習した各エポックの損失と毎秒サンプル数
+        """
+        trainer = BatchTrainer(self.model, self.optimizer, accumulation_steps, num_threads, device)
+        num_streams = max(num_workers, 1)  # 読み出し位置を持つ単位（ワーカーなしならメインプロセスの1つ）
+        # augment_seed は変換の乱数の元で、再開時もチェックポイントの値を使う
+        cursor = {'epoch': 0, 'batches': [0] * num_streams, 'step': 0,
+                  'augment_seed': int(np.random.randint(2 ** 31))}
+        if checkpoints is not None:
+            restored = checkpoints.restore(self.model, self.optimizer)
+            if restored is not None:
+                cursor = restored['replay_cursor']
+                if len(cursor['batches']) != num_streams:
+                    raise ValueError(f"チェックポイントは num_workers={len(cursor['batches'])} で保存されています。")
+                print(f"チェックポイントから再開します（エポック {cursor['epoch'] + 1}、"
+                      f"{sum(cursor['batches'])} バッチ目の後から）")
+        transform = SymmetryAugmenter(seed=cursor['augment_seed']) if augment else None
+        loader = make_loader(path, batch_size, num_workers, transform=transform)
+        step = cursor['step']
+        history = []
+        for epoch in range(cursor['epoch'], epochs):
+            consumed = list(cursor['batches']) if epoch == cursor['epoch'] else [0] * num_streams
+            loader.dataset.set_epoch(epoch, start=consumed)
+
+            def save(epoch: int, batches: List[int]) -> None:
+                checkpoints.save(step, self.model, self.optimizer,
+                                 replay_cursor=dict(cursor, epoch=epoch, batches=list(batches), step=step))
+
+            def on_batch(batch, updated: bool) -> None:
+                nonlocal step
+                worker, index = batch['cursor'].tolist()
+                consumed[worker] = index + 1
+                if updated:
+                    step += 1
+                    if checkpoints is not None and step % checkpoint_every == 0:
+                        save(epoch, consumed)
+
+            stats = trainer.fit(loader, on_batch=on_batch)
+            print(f"エポック {epoch + 1}: 損失 {stats.loss:.4f}, {stats.samples_per_second:.0f} samples/s")
+            history.append(stats)
+            if checkpoints is not None:
+                save(epoch + 1, [0] * num_streams)
+        return history
+
+def objective(trial: Trial, agent_factory: Optional[Callable[[nn.Module], AIAgent]] = None,
+              num_blocks: int = 10) -> float:
+    """
+    Optunaの目的関数。ハイパーパラメータを最適化します。
+
+    Args:
+        trial (Trial): Optunaのトライアルオブジェクト
+        agent_factory (Optional[Callable[[nn.Module], AIAgent]]): モデルから評価用のエージェントを作る関数
+            （省略時は貪欲に打つPolicyAgent）
+        num_blocks (int): 評価に使うトーナメントのブロック数
+
+    Returns:
+        float: 評価スコア（勝率）
+    """
+    model_params = {
+        'input_size': OBS_SIZE,  # 特徴プレーン数 x 34種
+        'output_size': 34,  # Number of possible actions
+        'nhead': trial.suggest_int('nhead', 4, 8),
+        'num_layers': trial.suggest_int('num_layers', 2, 6),
+        'dim_feedforward': trial.suggest_int('dim_feedforward', 512, 2048, step=256),
+        'learning_rate': trial.suggest_float('learning_rate', 1e-5, 1e-3, log=True),
+        'weight_decay': trial.suggest_float('weight_decay', 1e-5, 1e-3, log=True),
+    }
+
+    ai_player = AIPlayer("AI", model_params)
+    if agent_factory is None:
+        agent_factory = functools.partial(PolicyAgent, temperature=0.0)
+
+    def evaluate(player: AIPlayer) -> float:
+        """
+        AIプレイヤーの評価を行います。
+        席を回転させて同じ山を打つトーナメントで、ヒューリスティックのAIAgent3人と対戦させます。
+
+        Args:
+            player (AIPlayer): 評価対象のAIプレイヤー
+
+        Returns:
+            float: 勝率（和了した対局の割合）
+        """
+        candidate = AgentSpec("AI", functools.partial(agent_factory, player.model.eval()))
+        baseline = AgentSpec("Heuristic")
+        tournament = Tournament([candidate, baseline, baseline, baseline], alpha=None)
+
+        def report(tournament: Tournament, block_index: int) -> None:
+            # 1ブロックごとに途中経過を報告し、見込みのない試行は打ち切る
+            trial.report(tournament.stats["AI"].win_rate, block_index)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+
+        return tournament.run(num_blocks, on_block=report)["AI"].win_rate
+
+    return evaluate(ai_player)
+
+def train_ai_players(num_trials: int, num_workers: int = 1, storage_path: str = DEFAULT_STORAGE,
+                     pruner: str = 'median'):
+    """
+    AIプレイヤーをトレーニングします。
+    試行はローカルのSQLiteに保存され、中断しても同じstorage_pathで再開できます。
+
+    Args:
+        num_trials (int): トライアルの数
+        num_workers (int): 並列に試行するプロセス数
+        storage_path (str): スタディを保存するSQLiteファイル
+        pruner (str): 枝刈り方式（median / hyperband / none）
+    """
+    study = run_study(num_trials, num_workers, storage_path, pruner=pruner)
+    print(f"Best trial: {study.best_trial.params}")
+
+def iter_game_data(filename: str = 'game_data.h5', batch_size: int = 65536) -> Iterator[Dict[str, Any]]:
+    """
+    ゲームデータをバッチ単位で読み込みます。ChunkedDatasetReader.iter_batches で先頭から順に読み、
+    ファイル全体をメモリに載せません。
+
+    Args:
+        filename (str): データファイル名（dataset.ChunkedDatasetWriter で書き出したもの）
+        batch_size (int): 1回に返す行数
+
+    Yields:
+        Dict[str, Any]: そのバッチに含まれるプレイヤーごとのデータ
+    """
+    with ChunkedDatasetReader(filename, columns=['kind', 'seat', 'tile']) as reader:
+        for batch in reader.iter_batches(batch_size, shuffle=False):
+            data = {}
+            for seat in np.unique(batch['seat']):
+                mine = batch['seat'] == seat
+                data[f"Player {seat + 1}"] = {
+                    'discarded_tiles': batch['tile'][mine & (batch['kind'] == EVENT_DISCARD)],
+                    'actions': batch['kind'][mine],
+                }
+            yield data
+
+def load_game_data(filename='game_data.h5') -> Dict[str, Any]:
+    """
+    ゲームデータをまとめてロードします。
+    全対局を連結してメモリに載せるため非推奨です。iter_game_data を使ってください。
+
+    Args:
+        filename (str): データファイル名（dataset.ChunkedDatasetWriter で書き出したもの）
+
+    Returns:
+        Dict[str, Any]: プレイヤーごとのデータ
+    """
+    warnings.warn("load_game_data は非推奨です。iter_game_data を使ってください。", DeprecationWarning,
+                  stacklevel=2)
+    parts: Dict[str, Dict[str, List[np.ndarray]]] = {}
+    for data in iter_game_data(filename):
+        for player, arrays in data.items():
+            for key, values in arrays.items():
+                parts.setdefault(player, {}).setdefault(key, []).append(values)
+    return {player: {key: np.concatenate(values) for key, values in arrays.items()}
+            for player, arrays in sorted(parts.items())}
@@ -0,0 +1,164 @@
+# marjong_gui.py
+# marjong のPyQt5版GUI。PyQt5はこのモジュールを読み込んだときに初めて読み込まれます。
+
+import threading
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtWidgets import QMainWindow, QWidget, QPushButton, QGridLayout, QVBoxLayout, QHBoxLayout, QLabel
+from call_arbiter import CALL_CHI, CALL_KAN, CALL_PON, CALL_RON
+from marjong import Game, Player
+from tile_widgets import TileWidgetPool
+
+DISCARD_COLUMNS = 6  # 捨て牌の1行あたりの枚数
+
+class MahjongGUI(QMainWindow):
+    # ゲームのスレッドからの通知。Qtがメインスレッドのキューに積んで update_display を呼ぶ
+    game_changed = pyqtSignal()
+
+    def __init__(self, autostart=True):
+        super().__init__()
+        self.setWindowTitle("麻雀ゲーム")
+        self.setGeometry(100, 100, 1200, 800)
+        self.central_widget = QWidget()
+        self.setCentralWidget(self.central_widget)
+        self.layout = QVBoxLayout()
+        self.central_widget.setLayout(self.layout)
+        players = [Player(f"プレイヤー{i+1}") for i in range(4)]
+        self.game = Game(players)
+        self.game_thread = None
+        self.initUI()
+
+        # 背景を緑色に設定
+        self.setStyleSheet("background-color: green;")
+
+        self.game_changed.connect(self.update_display)
+        self.game.on_change = self.game_changed.emit
+        if autostart:
+            self.start_game()
+
+    def start_game(self):
+        """
+        ゲームの進行を別スレッドで始めます。鳴きの受付（asyncio.run）や人間の打牌待ちで
+        Qtのイベントループを止めないためです。
+        """
+        self.game_thread = threading.Thread(target=self.game.start_game, daemon=True)
+        self.game_thread.start()
+
+    def initUI(self):
+        # 山札表示
+        self.wall_label = QLabel("残り牌: 136")
+        self.layout.addWidget(self.wall_label)
+
+        # プレイヤーの手牌表示
+        self.player_hands = []
+        for i in range(4):
+            hand_layout = QHBoxLayout()
+            self.player_hands.append(hand_layout)
+            self.layout.addLayout(hand_layout)
+
+        # 捨て牌表示
+        self.discard_layout = QGridLayout()
+        self.layout.addLayout(self.discard_layout)
+
+        # 牌ボタンは使い回し、変わった位置だけ書き換える
+        self.hand_pools = [TileWidgetPool(layout, on_click=self.tile_clicked if seat in self.game.human_seats else None)
+                           for seat, layout in enumerate(self.player_hands)]
+        self.discard_pool = TileWidgetPool(self.discard_layout, columns=DISCARD_COLUMNS)
+
+        # 操作ボタン
+        button_layout = QHBoxLayout()
+        self.pon_button = QPushButton("ポン")
+        self.chi_button = QPushButton("チー")
+        self.kan_button = QPushButton("カン")
+        self.riichi_button = QPushButton("リーチ")
+        self.tsumo_button = QPushButton("ツモ")
+        self.ron_button = QPushButton("ロン")
+        button_layout.addWidget(self.pon_button)
+        button_layout.addWidget(self.chi_button)
+        button_layout.addWidget(self.kan_button)
+        button_layout.addWidget(self.riichi_button)
+        button_layout.addWidget(self.tsumo_button)
+        button_layout.addWidget(self.ron_button)
+        self.layout.addLayout(button_layout)
+
+        # 鳴き・ロンのボタンは、捨て牌に対して宣言できるときだけ押せるようにする
+        self.call_buttons = {CALL_PON: self.pon_button, CALL_CHI: self.chi_button,
+                             CALL_KAN: self.kan_button, CALL_RON: self.ron_button}
+        for call_type, button in self.call_buttons.items():
+            button.clicked.connect(lambda _checked=False, call_type=call_type: self.answer_call(call_type))
+        # 時間内に押さなければ見送り
+        self.call_timer = QTimer(self)
+        self.call_timer.setSingleShot(True)
+        self.call_timer.timeout.connect(lambda: self.answer_call(None))
+
+        # 河、山、ドラ表示
+        self.river_label = QLabel("河: []")
+        self.layout.addWidget(self.river_label)
+        self.dora_label = QLabel("ドラ: []")
+        self.layout.addWidget(self.dora_label)
+
+        self.update_display()
+
+    def update_display(self):
+        """UIを更新するメソッド（再描画は最後に1回だけ行う）"""
+        self.setUpdatesEnabled(False)
+        try:
+            # 山札の更新
+            self.wall_label.setText(f"残り牌: {len(self.game.wall.tiles)}")
+
+            # 河の更新
+            self.river_label.setText(f"河: {self.game.discard_pile}")
+
+            # ドラの更新（仮の実装）
+            self.dora_label.setText(f"ドラ: {self.game.dora_indicators}")
+
+            # プレイヤーの手牌更新
+            for i, player in enumerate(self.game.players):
+                self.update_player_hand(i, player.hand)
+
+            # 捨て牌の更新
+            self.discard_pool.update(self.game.discard_pile)
+
+            self.update_call_buttons()
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def update_call_buttons(self):
+        """保留中の鳴きの候補に合わせてボタンを切り替え、返答の待ち時間を計り始めます。"""
+        pending = self.game.pending_calls.get(self.game.human_seats[0]) if self.game.human_seats else None
+        available = {call.call_type for call in pending} if pending else set()
+        for call_type, button in self.call_buttons.items():
+            button.setEnabled(call_type in available)
+        if pending and not self.call_timer.isActive():
+            self.call_timer.start(int(self.game.arbiter.timeout * 1000))
+        elif not pending:
+            self.call_timer.stop()
+
+    def answer_call(self, call_type):
+        """鳴き・ロンのボタン（Noneは時間切れによる見送り）"""
+        self.call_timer.stop()
+        self.game.declare_call(call_type)
+        self.update_display()
+
+    def update_player_hand(self, player_index, hand):
+        """プレイヤーの手牌を更新するメソッド"""
+        self.hand_pools[player_index].update(hand)
+
+    def clear_layout(self, layout):
+        """レイアウト内の全ウィジェットをクリアするヘルパーメソッド"""
+        for i in reversed(range(layout.count())): 
+            layout.itemAt(i).widget().setParent(None)
+
+    def add_tile_button(self, layout, tile):
+        """タイルボタンを追加するヘルパーメソッド"""
+        tile_button = QPushButton(str(tile))
+        tile_button.setFixedSize(40, 60)
+        layout.addWidget(tile_button)
+
+    def tile_clicked(self, tile):
+        """タイルがクリックされたときの処理"""
+        print(f"{tile} がクリックされました")
+        self.game.declare_discard(tile)  # 打牌はゲームのスレッドが処理し、on_change で表示を更新する
+
+    def update_dora(self):
+        # ドラの更新
+        self.dora_label.setText(f"ドラ: {', '.join(map(str, self.game.dora_indicators))}")
@@ -0,0 +1,52 @@
+# models.py
+
+from typing import Any, Dict, Tuple
+import torch
+import torch.nn as nn
+from encoder import NUM_PLANES, PLANE_SCALE
+from tiles import NUM_TILE_TYPES
+
+class QNetwork(nn.Module):
+    def __init__(self, input_size: int, output_size: int):
+        super(QNetwork, self).__init__()
+        self.fc1 = nn.Linear(input_size, 128)
+        self.fc2 = nn.Linear(128, 128)
+        self.fc3 = nn.Linear(128, output_size)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        x = torch.relu(self.fc1(x))
+        x = torch.relu(self.fc2(x))
+        return self.fc3(x)
+
+class PolicyValueNet(nn.Module):
+    """
+    特徴プレーン [B, NUM_PLANES, 34] を34個の牌トークンとして扱う方策・価値ネットワーク。
+    方策は34種の打牌に対するロジット、価値は[-1, 1]のスカラーを返します。
+    """
+
+    def __init__(self, nhead: int = 4, num_layers: int = 2, dim_feedforward: int = 512,
+                 head_dim: int = 16, dropout: float = 0.1):
+        super(PolicyValueNet, self).__init__()
+        d_model = nhead * head_dim
+        self.register_buffer('plane_scale', torch.from_numpy(PLANE_SCALE.copy()))
+        self.embed = nn.Linear(NUM_PLANES, d_model)
+        self.position = nn.Parameter(torch.zeros(1, NUM_TILE_TYPES, d_model))
+        layer = nn.TransformerEncoderLayer(d_model, nhead, dim_feedforward, dropout, batch_first=True)
+        self.encoder = nn.TransformerEncoder(layer, num_layers)
+        self.policy_head = nn.Linear(d_model, 1)
+        self.value_head = nn.Linear(d_model, 1)
+
+    @classmethod
+    def from_params(cls, model_params: Dict[str, Any]) -> 'PolicyValueNet':
+        """
+        Optunaの探索パラメータ辞書からモデルを生成します（不要なキーは無視）。
+        """
+        keys = ('nhead', 'num_layers', 'dim_feedforward', 'head_dim', 'dropout')
+        return cls(**{key: model_params[key] for key in keys if key in model_params})
+
+    def forward(self, x: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        x = x.reshape(x.shape[0], NUM_PLANES, NUM_TILE_TYPES).float() * self.plane_scale[:, None]
+        h = self.encoder(self.embed(x.transpose(1, 2)) + self.position)
+        policy_logits = self.policy_head(h).squeeze(-1)
+        value = torch.tanh(self.value_head(h.mean(dim=1)))
+        return policy_logits, value
@@ -1,10 +1,21 @@
 # player.py
 
 from typing import List, Optional
-from tiles import Tile
+from tiles import Tile, tile_to_index
 from ai_agent import AIAgent
 from yaku_evaluator import YakuEvaluator
+from game_record import EVENT_DISCARD
 import pygame
+from surface_cache import shared_cache
+
+# 牌の描画レイアウト
+TILE_WIDTH = 50
+TILE_HEIGHT = 70
+TILE_SPACING = 10
+HAND_ORIGIN = (50, 600)
+DISCARD_ORIGIN = (700, 50)
+DISCARD_HEADER_HEIGHT = 30
+MAX_DISCARDS_PER_ROW = 10  # 1行あたりの最大捨て牌数
 
 class Player:
     def __init__(self, name: str, is_human: bool = True, ai_agent: Optional[AIAgent] = None, evaluator: Optional[YakuEvaluator] = None):
@@ -19,6 +30,8 @@ class Player:
         self.initial_hand: Optional[List[Tile]] = None
         self.initial_draw: bool = False
         self.is_closed: bool = True
+        self.seat: int = 0
+        self.recorder = None  # 対局記録のライター（MahjongGameが設定）
 
         # タイル表示用の位置を管理
         self.tile_positions = []  # 各タイルの矩形領域を保持
@@ -30,7 +43,10 @@ class Player:
             return None
         else:
             # AIプレイヤーの場合の処理
-            return self.ai_agent.choose_discard(self.hand, self.discards)
+            discarded_tile = self.ai_agent.choose_discard(self.hand, self.discards)
+            if discarded_tile:
+                self.record_discard(discarded_tile)
+            return discarded_tile
 
     def handle_mouse_click(self, mouse_pos) -> Optional[Tile]:
         """
@@ -40,57 +56,68 @@ class Player:
             if rect.collidepoint(mouse_pos):
                 chosen_tile = self.hand.pop(idx)
                 self.discards.append(chosen_tile)
+                self.record_discard(chosen_tile)
                 return chosen_tile
         return None
 
+    def record_discard(self, tile: Tile):
+        """
+        打牌を対局記録に書き込みます。
+        """
+        if self.recorder is not None:
+            self.recorder.record(EVENT_DISCARD, self.seat, tile_to_index(tile))
+
+    def hand_rect(self) -> pygame.Rect:
+        """
+        手牌の描画領域（牌がなければ幅0）
+        """
+        width = max(len(self.hand) * (TILE_WIDTH + TILE_SPACING) - TILE_SPACING, 0)
+        return pygame.Rect(HAND_ORIGIN[0], HAND_ORIGIN[1], width, TILE_HEIGHT)
+
     def draw_hand(self, window, font):
         """
         手牌を画面に描画し、クリック可能な矩形を設定
         """
         self.tile_positions = []
-        x_start = 50
-        y_start = 600  # 下部に手牌を表示
-        tile_width = 50
-        tile_height = 70
-        spacing = 10
+        x_start, y_start = HAND_ORIGIN  # 下部に手牌を表示
 
         for idx, tile in enumerate(self.hand):
-            x = x_start + idx * (tile_width + spacing)
+            x = x_start + idx * (TILE_WIDTH + TILE_SPACING)
             y = y_start
             if tile.image:
                 window.blit(tile.image, (x, y))
             else:
-                # 画像がない場合は矩形とテキストで代用
-                pygame.draw.rect(window, (255, 255, 255), (x, y, tile_width, tile_height))
-                text_surface = font.render(tile.name, True, (0, 0, 0))
-                window.blit(text_surface, (x + 5, y + 25))
-            rect = pygame.Rect(x, y, tile_width, tile_height)
+                # 画像がない場合は矩形とテキストで代用（描画済みの面を使い回す）
+                window.blit(shared_cache.tile_face(font, tile.name, (TILE_WIDTH, TILE_HEIGHT)), (x, y))
+            rect = pygame.Rect(x, y, TILE_WIDTH, TILE_HEIGHT)
             self.tile_positions.append(rect)
 
+    def discards_rect(self) -> pygame.Rect:
+        """
+        捨て牌の見出しと河を含む描画領域
+        """
+        rows = (len(self.discards) + MAX_DISCARDS_PER_ROW - 1) // MAX_DISCARDS_PER_ROW
+        width = MAX_DISCARDS_PER_ROW * (TILE_WIDTH + TILE_SPACING)
+        height = DISCARD_HEADER_HEIGHT + rows * (TILE_HEIGHT + TILE_SPACING)
+        return pygame.Rect(DISCARD_ORIGIN[0], DISCARD_ORIGIN[1] - DISCARD_HEADER_HEIGHT, width, height)
+
     def draw_discards(self, window, font):
         """
         捨て牌を画面に描画
         """
-        x_start = 700
-        y_start = 50  # 上部に捨て牌を表示
-        tile_width = 50
-        tile_height = 70
-        spacing = 10
-        max_tiles_per_row = 10  # 1行あたりの最大捨て牌数
+        x_start, y_start = DISCARD_ORIGIN  # 上部に捨て牌を表示
 
         discard_text = f"{self.name} の捨て牌: "
-        text_surface = font.render(discard_text, True, (255, 255, 255))
-        window.blit(text_surface, (x_start, y_start - 30))
+        text_surface = shared_cache.text(font, discard_text, (255, 255, 255))
+        window.blit(text_surface, (x_start, y_start - DISCARD_HEADER_HEIGHT))
 
         for idx, tile in enumerate(self.discards):
-            row = idx // max_tiles_per_row
-            col = idx % max_tiles_per_row
-            x = x_start + col * (tile_width + spacing)
-            y = y_start + row * (tile_height + spacing)
+            row = idx // MAX_DISCARDS_PER_ROW
+            col = idx % MAX_DISCARDS_PER_ROW
+            x = x_start + col * (TILE_WIDTH + TILE_SPACING)
+            y = y_start + row * (TILE_HEIGHT + TILE_SPACING)
 
             if tile.image:
                 window.blit(tile.image, (x, y))
             else:
-                pygame.draw.rect(window, (255, 255, 255), (x, y, tile_width, tile_height))
-                text_surface = font.render(tile.name, True, (0, 0, 0))
-                window.blit(text_surface, (x + 5, y + 25))
+                window.blit(shared_cache.tile_face(font, tile.name, (TILE_WIDTH, TILE_HEIGHT)), (x, y))
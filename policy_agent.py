@@ -0,0 +1,55 @@
+# policy_agent.py
+
+from typing import List, Optional
+import numpy as np
+import torch
+from tiles import Tile, tile_to_index, NUM_TILE_TYPES
+from ai_agent import AIAgent
+from encoder import ObservationEncoder, state_arrays_from_game
+from yaku_evaluator import YakuEvaluator
+
+class PolicyAgent(AIAgent):
+    """
+    方策ネットワークの出力から打牌を選ぶエージェント。
+    MahjongGame から bind された局面全体を特徴プレーンにして推論します。
+    """
+
+    def __init__(self, model: torch.nn.Module, evaluator: Optional[YakuEvaluator] = None,
+                 temperature: float = 1.0, seed: Optional[int] = None):
+        super().__init__(evaluator)
+        self.model = model
+        self.temperature = temperature
+        self.rng = np.random.default_rng(seed)
+        self.encoder = ObservationEncoder(1, pin_memory=False)
+        self.game = None
+        self.seat = 0
+
+    def bind(self, game, seat: int) -> None:
+        self.game = game
+        self.seat = seat
+
+    def policy(self, obs: torch.Tensor) -> np.ndarray:
+        """
+        特徴プレーン [1, C, 34] から打牌のロジットを返します。
+        """
+        with torch.no_grad():
+            logits, _ = self.model(obs)
+        return logits[0].float().numpy()
+
+    def choose_discard(self, hand: List[Tile], discards: List[Tile]) -> Optional[Tile]:
+        if self.game is None:
+            return super().choose_discard(hand, discards)
+        logits = self.policy(self.encoder.encode_tensor(**state_arrays_from_game(self.game, self.seat)))
+        legal = np.zeros(NUM_TILE_TYPES, dtype=bool)
+        legal[[tile_to_index(tile) for tile in hand]] = True
+        logits = np.where(legal, logits, -np.inf)
+        if self.temperature <= 0:
+            choice = int(np.argmax(logits))
+        else:
+            scaled = (logits - logits[legal].max()) / self.temperature
+            probs = np.exp(scaled)
+            choice = int(self.rng.choice(NUM_TILE_TYPES, p=probs / probs.sum()))
+        chosen_tile = next(tile for tile in hand if tile_to_index(tile) == choice)
+        hand.remove(chosen_tile)
+        discards.append(chosen_tile)
+        return chosen_tile
@@ -0,0 +1,42 @@
+# policy_runtime.py
+# 推論専用のラッパー。torchとnumpyだけで動き、optuna・h5py・PyQtを読み込みません。
+
+from typing import Any, Dict, Optional, Tuple
+import json
+import numpy as np
+import torch
+
+METADATA_FILE = 'metadata.json'
+
+class ExportedPolicy:
+    """
+    export_policy.export_policy で保存したTorchScript成果物を読み込んで推論します。
+    """
+
+    def __init__(self, path: str, num_threads: Optional[int] = None):
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        extra_files = {METADATA_FILE: ''}
+        self.module = torch.jit.load(path, map_location='cpu', _extra_files=extra_files)
+        self.module.eval()
+        self.metadata: Dict[str, Any] = json.loads(extra_files[METADATA_FILE] or '{}')
+
+    def __call__(self, obs: Any) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        観測のバッチから (方策ロジットまたはQ値, 価値) を返します。価値を持たないモデルではNoneです。
+        """
+        x = obs if isinstance(obs, torch.Tensor) else torch.from_numpy(np.ascontiguousarray(obs))
+        with torch.inference_mode():
+            output = self.module(x)
+        if isinstance(output, (tuple, list)):
+            return output[0].numpy(), output[1].reshape(-1).numpy()
+        return output.numpy(), None
+
+    def act(self, obs: Any, legal_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        合法手の中から最大のロジットを持つ行動を選びます。
+        """
+        scores, _ = self(obs)
+        if legal_mask is not None:
+            scores = np.where(legal_mask, scores, -np.inf)
+        return scores.argmax(axis=-1)
@@ -0,0 +1,197 @@
+# record_index.py
+# 対局記録ファイルを1度だけ走査して、局ごとの結果（役・翻・符・待ち・放銃元・向聴数）を列ごとの配列にまとめた索引。
+# 役・待ち・結果などはビットマップで、翻・符は並べ替えた順序で持ち、記録を読み直さずに絞り込めます。
+
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import argparse
+import numpy as np
+from game_record import EVENT_GAME_END, EVENT_WIN, END_ABORTED, read_events, replay, split_games, unpack_extra
+from hand_analysis import WAIT_NAMES, YAKU_NAMES, analyze_win, shanten, yaku_names
+
+# 局の結果
+OUTCOME_TSUMO = 0
+OUTCOME_RON = 1
+OUTCOME_EXHAUSTED = 2
+OUTCOME_ABORTED = 3
+OUTCOME_NAMES = ['ツモ', 'ロン', '流局', '中断']
+
+NO_SEAT = 0xFF
+NO_SHANTEN = 127  # ロン以外（放銃者がいない）
+
+INDEX_DTYPE = np.dtype([
+    ('file', '<u2'),      # files の添字
+    ('start', '<u8'),     # 対局開始イベントの位置
+    ('length', '<u4'),    # イベント数
+    ('outcome', 'u1'),
+    ('winner', 'u1'),
+    ('from_seat', 'u1'),  # 放銃者（ツモは和了者と同じ）
+    ('han', 'u1'),
+    ('fu', 'u1'),
+    ('yaku', '<u4'),      # hand_analysis.YAKU_BITS の集合
+    ('wait', 'u1'),
+    ('riichi', 'u1'),     # 立直していた席のビット集合
+    ('shanten', 'i1'),    # 放銃した時点の放銃者の向聴数
+    ('turn', '<u2'),
+])
+
+Range = Union[int, Tuple[int, int]]
+
+def _analyze_game(events: np.ndarray) -> tuple:
+    """
+    1局分のイベント列から索引の1行分（file, start を除く）を作ります。
+    """
+    kinds = events['kind']
+    wins = np.flatnonzero(kinds == EVENT_WIN)
+    turn = int(events['turn'][-1])
+    if len(wins) == 0:
+        ends = np.flatnonzero(kinds == EVENT_GAME_END)
+        aborted = len(ends) == 0 or int(events['arg'][ends[0]]) == END_ABORTED
+        riichi = replay(events).riichi
+        return (len(events), OUTCOME_ABORTED if aborted else OUTCOME_EXHAUSTED, NO_SEAT, NO_SEAT, 0, 0, 0, 0,
+                _seat_bits(riichi), NO_SHANTEN, turn)
+
+    win = events[wins[0]]
+    winner, tile = int(win['seat']), int(win['tile'])
+    fu, from_seat = unpack_extra(int(win['extra']))
+    tsumo = from_seat == winner
+    state = replay(events, upto=int(wins[0]))  # 和了直前の局面
+    hand = state.hands[winner].astype(int)
+    if not tsumo:
+        hand[tile] += 1
+    seat_wind = (winner - state.dealer) % 4
+    yaku, wait = analyze_win(hand.tolist(), state.melds[winner].tolist(), tile, tsumo, state.riichi[winner],
+                             seat_wind, state.round_wind % 4)
+    discarder_shanten = NO_SHANTEN
+    if not tsumo:
+        called = int(state.melds[from_seat].sum()) // 3
+        discarder_shanten = shanten(state.hands[from_seat].astype(int).tolist(), called)
+    return (len(events), OUTCOME_TSUMO if tsumo else OUTCOME_RON, winner, from_seat, int(win['arg']), fu, yaku, wait,
+            _seat_bits(state.riichi), discarder_shanten, turn)
+
+def _seat_bits(flags: Sequence[bool]) -> int:
+    return sum(1 << seat for seat, flag in enumerate(flags) if flag)
+
+class RecordIndex:
+    """
+    局ごとの行を列として持つ索引。query で条件に合う行番号を返し、locate で記録ファイル上の位置に戻せます。
+    """
+
+    def __init__(self, files: List[str], rows: np.ndarray):
+        self.files = list(files)
+        self.rows = rows
+        self._build_bitmaps()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _build_bitmaps(self) -> None:
+        """
+        等号条件で使う列のビットマップ（np.packbitsで8行を1バイトに詰めたもの）と、範囲条件用の並び順を作ります。
+        """
+        rows = self.rows
+        self.bitmaps: Dict[Tuple[str, int], np.ndarray] = {}
+        for bit, name in enumerate(YAKU_NAMES):
+            self.bitmaps[('yaku', bit)] = np.packbits((rows['yaku'] >> bit) & 1 == 1)
+        for column, values in (('outcome', range(len(OUTCOME_NAMES))), ('wait', range(len(WAIT_NAMES))),
+                               ('winner', range(4)), ('from_seat', range(4))):
+            for value in values:
+                self.bitmaps[(column, value)] = np.packbits(rows[column] == value)
+        winner = rows['winner'].astype(np.int64)
+        winner_riichi = (winner != NO_SEAT) & ((rows['riichi'].astype(np.int64) >> (winner % 8)) & 1 == 1)
+        self.bitmaps[('winner_riichi', 1)] = np.packbits(winner_riichi)
+        self.sorted_orders = {column: np.argsort(rows[column], kind='stable') for column in ('han', 'fu', 'shanten')}
+
+    def _range_bits(self, column: str, value: Range) -> np.ndarray:
+        low, high = (value, value) if isinstance(value, int) else value
+        order = self.sorted_orders[column]
+        keys = self.rows[column][order]
+        selected = np.zeros(len(self.rows), dtype=bool)
+        selected[order[np.searchsorted(keys, low, 'left'):np.searchsorted(keys, high, 'right')]] = True
+        return np.packbits(selected)
+
+    def query(self, yaku: Sequence[str] = (), wait: Optional[int] = None, outcome: Optional[int] = None,
+              winner: Optional[int] = None, from_seat: Optional[int] = None, winner_riichi: Optional[bool] = None,
+              han: Optional[Range] = None, fu: Optional[Range] = None, shanten: Optional[Range] = None) -> np.ndarray:
+        """
+        条件をすべて満たす行番号を返します。yakuは役名（YAKU_NAMES）で、すべてを含む行を選びます。
+        han・fu・shanten は値か (下限, 上限) を指定します。
+        """
+        result = np.full((len(self.rows) + 7) // 8, 0xFF, dtype=np.uint8)
+        for name in yaku:
+            result &= self.bitmaps[('yaku', YAKU_NAMES.index(name))]
+        for column, value in (('wait', wait), ('outcome', outcome), ('winner', winner), ('from_seat', from_seat)):
+            if value is not None:
+                result &= self.bitmaps[(column, value)]
+        if winner_riichi is not None:
+            bits = self.bitmaps[('winner_riichi', 1)]
+            result &= bits if winner_riichi else ~bits
+        for column, value in (('han', han), ('fu', fu), ('shanten', shanten)):
+            if value is not None:
+                result &= self._range_bits(column, value)
+        return np.flatnonzero(np.unpackbits(result, count=len(self.rows)))
+
+    def locate(self, row: int) -> Tuple[str, slice]:
+        """
+        行に対応する記録ファイルと、その中の局のイベント範囲を返します。
+        """
+        record = self.rows[row]
+        start = int(record['start'])
+        return self.files[int(record['file'])], slice(start, start + int(record['length']))
+
+    def describe(self, row: int) -> str:
+        record = self.rows[row]
+        text = f"{OUTCOME_NAMES[record['outcome']]}"
+        if record['winner'] != NO_SEAT:
+            text += (f" 席{record['winner']} {record['han']}翻{record['fu']}符 {WAIT_NAMES[record['wait']]}待ち "
+                     f"{'・'.join(yaku_names(int(record['yaku'])))}")
+        return text
+
+    def save(self, path: str) -> None:
+        np.savez(path, files=np.array(self.files), rows=self.rows)
+
+    @classmethod
+    def load(cls, path: str) -> RecordIndex:
+        with np.load(path) as data:
+            return cls([str(name) for name in data['files']], data['rows'])
+
+def build_index(paths: Sequence[str]) -> RecordIndex:
+    """
+    記録ファイルを順に1度だけ読み、局ごとの行を作ります。
+    """
+    rows = []
+    for file_id, path in enumerate(paths):
+        events = read_events(path)
+        for game in split_games(events):
+            rows.append((file_id, game.start) + _analyze_game(events[game]))
+    return RecordIndex(list(paths), np.array(rows, dtype=INDEX_DTYPE))
+
+def main():
+    parser = argparse.ArgumentParser(description="対局記録の索引を作り、条件に合う局を検索します。")
+    parser.add_argument('records', nargs='*', help="索引に加える記録ファイル")
+    parser.add_argument('--index', default='records_index.npz', help="索引ファイル（recordsを渡すと作り直す）")
+    parser.add_argument('--yaku', nargs='*', default=[], choices=YAKU_NAMES)
+    parser.add_argument('--wait', choices=WAIT_NAMES)
+    parser.add_argument('--outcome', choices=OUTCOME_NAMES)
+    parser.add_argument('--riichi', action='store_true', help="和了者が立直していた局だけ")
+    parser.add_argument('--shanten', type=int, help="放銃者の向聴数")
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.records:
+        index = build_index(args.records)
+        index.save(args.index)
+    else:
+        index = RecordIndex.load(args.index)
+    rows = index.query(args.yaku,
+                       wait=WAIT_NAMES.index(args.wait) if args.wait else None,
+                       outcome=OUTCOME_NAMES.index(args.outcome) if args.outcome else None,
+                       winner_riichi=True if args.riichi else None,
+                       shanten=args.shanten)
+    print(f"{len(rows)} / {len(index)} 局")
+    for row in rows[:args.limit]:
+        path, span = index.locate(row)
+        print(f"  {path}[{span.start}:{span.stop}] {index.describe(row)}")
+
+if __name__ == "__main__":
+    main()
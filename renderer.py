@@ -0,0 +1,96 @@
+# renderer.py
+
+from typing import Callable, Dict, Hashable, List, Sequence, Tuple
+import pygame
+
+BACKGROUND_COLOR = (0, 128, 0)
+
+# (識別キー, 描画領域, 内容の署名, 描画関数)
+Region = Tuple[Hashable, pygame.Rect, Hashable, Callable[[], None]]
+
+class TableRenderer:
+    """
+    前フレームからの変化だけを描き直す保持モードの描画器。
+    領域ごとに内容の署名を覚えておき、変わった領域（と重なる領域）だけを再描画して
+    その矩形を返します。変化がなければ何も描かず空のリストを返します。
+    """
+
+    def __init__(self, window: pygame.Surface, font, background=BACKGROUND_COLOR):
+        self.window = window
+        self.font = font
+        self.background = background
+        self._previous: Dict[Hashable, Tuple[pygame.Rect, Hashable]] = {}
+        self._full_redraw = True
+
+    def invalidate(self) -> None:
+        """
+        次のフレームで画面全体を描き直します（ウィンドウの再表示時など）。
+        """
+        self._full_redraw = True
+
+    def regions(self, players: Sequence) -> List[Region]:
+        """
+        描画順（河→手牌）に並べた領域の一覧。
+        """
+        regions: List[Region] = []
+        for player in players:
+            regions.append((('discards', player.seat), player.discards_rect(),
+                            (player.name, tuple(tile.name for tile in player.discards)),
+                            lambda player=player: player.draw_discards(self.window, self.font)))
+        for player in players:
+            regions.append((('hand', player.seat), player.hand_rect(), tuple(tile.name for tile in player.hand),
+                            lambda player=player: player.draw_hand(self.window, self.font)))
+        return regions
+
+    def render(self, players: Sequence) -> List[pygame.Rect]:
+        """
+        変化した領域を描き直し、pygame.display.update に渡す矩形のリストを返します。
+        """
+        regions = self.regions(players)
+        current = {key: (rect, signature) for key, rect, signature, _ in regions}
+        if self._full_redraw:
+            self._full_redraw = False
+            self._previous = current
+            self.window.fill(self.background)
+            for _, _, _, draw in regions:
+                draw()
+            return [self.window.get_rect()]
+
+        dirty: List[pygame.Rect] = []
+        for key, (rect, signature) in current.items():
+            previous = self._previous.get(key)
+            if previous is None:
+                dirty.append(rect)
+            elif previous[1] != signature or previous[0] != rect:
+                # 縮んだ場合に残像が残らないよう、前の領域も含める
+                dirty.append(rect.union(previous[0]))
+        for key, (rect, _) in self._previous.items():
+            if key not in current:
+                dirty.append(rect)
+        self._previous = current
+        dirty = self._merge([rect for rect in dirty if rect.width and rect.height])
+
+        for area in dirty:
+            self.window.set_clip(area)
+            self.window.fill(self.background, area)
+            # 重なっている領域は描画順を保ったまま描き直す
+            for _, rect, _, draw in regions:
+                if rect.colliderect(area):
+                    draw()
+        self.window.set_clip(None)
+        return dirty
+
+    @staticmethod
+    def _merge(rects: List[pygame.Rect]) -> List[pygame.Rect]:
+        """
+        重なり合う矩形をまとめ、同じ場所を何度も描かないようにします。
+        """
+        merged: List[pygame.Rect] = []
+        for rect in rects:
+            rect = rect.copy()
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
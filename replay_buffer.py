@@ -0,0 +1,133 @@
+# replay_buffer.py
+
+from typing import Dict, Optional, Tuple
+import numpy as np
+from encoder import NUM_PLANES
+from tiles import NUM_TILE_TYPES
+
+class SumTree:
+    """
+    葉に優先度を持つ二分木。区間和による優先度比例サンプリングと更新をO(log n)で行います。
+    更新・探索はインデックスの配列でまとめて処理します。
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.leaf_offset = 1 << max(int(capacity - 1).bit_length(), 0)
+        self.depth = self.leaf_offset.bit_length() - 1
+        self.tree = np.zeros(2 * self.leaf_offset, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def __getitem__(self, indices) -> np.ndarray:
+        return self.tree[np.asarray(indices) + self.leaf_offset]
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray) -> None:
+        nodes = np.asarray(indices, dtype=np.int64) + self.leaf_offset
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes >> 1)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """
+        累積優先度がvaluesに達する葉のインデックスを返します。
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values > left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = left + go_right
+        return np.minimum(nodes - self.leaf_offset, self.capacity - 1)
+
+class PrioritizedReplayBuffer:
+    """
+    事前確保したリング配列に遷移を保存する優先度付き経験再生バッファ。
+    容量に達すると古い遷移から上書きするため、メモリ使用量はcapacityで固定です。
+
+    次状態は観測を複製せず、同じバッファ内の次の遷移の位置として持ちます
+    （次の遷移は必ず後から書き込まれるので、元の遷移より先に上書きされることはありません）。
+    1遷移あたり約 NUM_PLANES*34 + 30 バイトで、数百万件でも数GBに収まります。
+    """
+
+    def __init__(self, capacity: int, alpha: float = 0.6, epsilon: float = 1e-3, seed: Optional[int] = None):
+        self.capacity = capacity
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.obs = np.zeros((capacity, NUM_PLANES, NUM_TILE_TYPES), dtype=np.uint8)
+        self.actions = np.zeros(capacity, dtype=np.int16)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.next_index = np.zeros(capacity, dtype=np.int32)
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+        self.position = 0
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add_batch(self, obs: np.ndarray, actions: np.ndarray, rewards: np.ndarray, next_index: np.ndarray,
+                  dones: np.ndarray) -> np.ndarray:
+        """
+        遷移をまとめて追加します。新しい遷移には現在の最大優先度を与えます。
+
+        Args:
+            next_index (np.ndarray): 次状態となる遷移のバッチ内インデックス（終端の遷移では無視）
+
+        Returns:
+            np.ndarray: 書き込んだバッファ上の位置
+        """
+        count = len(actions)
+        if count > self.capacity:
+            raise ValueError(f"一度に追加できる遷移は容量（{self.capacity}）までです: {count}")
+        slots = (self.position + np.arange(count)) % self.capacity
+        self.obs[slots] = obs
+        self.actions[slots] = actions
+        self.rewards[slots] = rewards
+        self.dones[slots] = dones
+        self.next_index[slots] = slots[np.where(dones, np.arange(count), next_index)]
+        self.tree.update(slots, np.full(count, self.max_priority ** self.alpha))
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+        return slots
+
+    def sample(self, batch_size: int, beta: float = 0.4) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+        """
+        優先度に比例して層化サンプリングします。
+
+        Returns:
+            (遷移のバッチ, バッファ上の位置, 重要度重み)
+        """
+        if self.size == 0:
+            raise ValueError("バッファが空です。")
+        total = self.tree.total
+        segment = total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        indices = self.tree.find(np.minimum(values, np.nextafter(total, 0)))
+        probabilities = self.tree[indices] / total
+        weights = (self.size * probabilities) ** -beta
+        weights /= weights.max()
+        next_indices = self.next_index[indices]
+        batch = {
+            'obs': self.obs[indices],
+            'action': self.actions[indices],
+            'reward': self.rewards[indices],
+            'next_obs': self.obs[next_indices],
+            'done': self.dones[indices],
+        }
+        return batch, indices, weights.astype(np.float32)
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
+        """
+        学習ステップ後のTD誤差でまとめて優先度を更新します。
+        """
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
@@ -0,0 +1,175 @@
+# replay_viewer.py
+# 記録ファイルを開いて任意の巡目へ飛びながら見返すpygameのリプレイ画面。
+
+from typing import List, Optional, Tuple
+import argparse
+import os
+import numpy as np
+import pygame
+from game_record import ReplayState, apply_event, copy_state, read_events, replay, split_games
+from player import Player
+from renderer import TableRenderer
+from surface_cache import shared_cache
+from tiles import TILE_NAMES, Tile
+
+STATUS_POSITION = (50, 750)
+STATUS_COLOR = (255, 215, 0)
+
+class KeyframeIndex:
+    """
+    記録のイベント列を局ごとに分け、interval件ごとの局面（キーフレーム）を持つ索引。
+    任意の位置の局面は、直前のキーフレームを複製してinterval件未満のイベントを足すだけで求まります。
+    イベント列はメモリマップのままでよく、キーフレームの作成もイベントを区間ごとに一括で集計します。
+    """
+
+    def __init__(self, events: np.ndarray, interval: int = 32):
+        if interval < 1:
+            raise ValueError("キーフレームの間隔は1以上にしてください。")
+        self.events = events
+        self.interval = interval
+        self.games: List[slice] = split_games(events)
+        self.keyframes: List[List[ReplayState]] = []
+        for game in self.games:
+            game_events = events[game]
+            frames = [ReplayState()]
+            for start in range(0, len(game_events) - interval + 1, interval):
+                frames.append(replay(game_events[start:start + interval], initial=frames[-1]))
+            self.keyframes.append(frames)
+
+    @property
+    def num_games(self) -> int:
+        return len(self.games)
+
+    def game_length(self, game: int) -> int:
+        return self.games[game].stop - self.games[game].start
+
+    def state_at(self, game: int, position: int) -> ReplayState:
+        """
+        game局目の先頭からposition件のイベントを適用した局面を返します。
+        """
+        position = max(0, min(position, self.game_length(game)))
+        frame, offset = divmod(position, self.interval)
+        state = copy_state(self.keyframes[game][frame])
+        start = self.games[game].start + frame * self.interval
+        for event in self.events[start:start + offset].tolist():
+            apply_event(state, *event)
+        return state
+
+    def position_for_turn(self, game: int, turn: int) -> int:
+        """
+        game局目で巡目turnの最後のイベントまで進めた位置を返します。
+        """
+        return int(np.searchsorted(self.events['turn'][self.games[game]], turn, side='right'))
+
+class ReplayViewer:
+    """
+    KeyframeIndexで局面を復元し、Playerの描画処理で1席分の手牌と河を表示します。
+
+    操作: ←→ 1イベント, ↑↓ 1巡, PageUp/PageDown 前後の局, Home/End 局の先頭・末尾, 1-4 表示する席, Esc 終了
+    """
+
+    def __init__(self, path: str, window: pygame.Surface, font, interval: int = 32, load_images: bool = True):
+        self.index = KeyframeIndex(read_events(path), interval)
+        if self.index.num_games == 0:
+            raise ValueError(f"対局が記録されていません: {path}")
+        self.window = window
+        self.font = font
+        self.renderer = TableRenderer(window, font)
+        self.tiles = [Tile(name=name) for name in TILE_NAMES]  # 同じ牌種は同じ画像を使い回す
+        if load_images:
+            for tile in self.tiles:
+                tile.load_image()
+        self.players = []
+        for seat in range(4):
+            player = Player(f"Player {seat + 1}")
+            player.seat = seat
+            self.players.append(player)
+        self.seat = 0
+        self.game = 0
+        self.position = 0
+        self.state: Optional[ReplayState] = None
+        self.seek(0, 0)
+
+    def seek(self, game: int, position: int) -> None:
+        self.game = max(0, min(game, self.index.num_games - 1))
+        self.position = max(0, min(position, self.index.game_length(self.game)))
+        self.state = self.index.state_at(self.game, self.position)
+        for player, hand, river in zip(self.players, self.state.hands, self.state.rivers or [[]] * 4):
+            player.hand = [self.tiles[tile] for tile in np.repeat(np.arange(len(hand)), np.maximum(hand, 0))]
+            player.discards = [self.tiles[int(tile)] for tile in river]
+
+    def seek_turn(self, turn: int) -> None:
+        self.seek(self.game, self.index.position_for_turn(self.game, max(turn, 0)))
+
+    def handle_key(self, key: int) -> bool:
+        """
+        キー操作を反映します。終了するときはFalseを返します。
+        """
+        if key == pygame.K_ESCAPE:
+            return False
+        if key == pygame.K_RIGHT:
+            self.seek(self.game, self.position + 1)
+        elif key == pygame.K_LEFT:
+            self.seek(self.game, self.position - 1)
+        elif key == pygame.K_UP:
+            self.seek_turn(self.state.turn + 1)
+        elif key == pygame.K_DOWN:
+            self.seek_turn(self.state.turn - 1)
+        elif key == pygame.K_PAGEDOWN:
+            self.seek(self.game + 1, 0)
+        elif key == pygame.K_PAGEUP:
+            self.seek(self.game - 1, 0)
+        elif key == pygame.K_HOME:
+            self.seek(self.game, 0)
+        elif key == pygame.K_END:
+            self.seek(self.game, self.index.game_length(self.game))
+        elif pygame.K_1 <= key <= pygame.K_4:
+            self.seat = key - pygame.K_1
+        return True
+
+    def status_text(self) -> str:
+        return (f"{self.game + 1}/{self.index.num_games} 局  {self.state.turn} 巡目  "
+                f"{self.position}/{self.index.game_length(self.game)}  席 {self.seat + 1}")
+
+    def present(self) -> None:
+        dirty_rects = self.renderer.render([self.players[self.seat]])
+        status = shared_cache.text(self.font, self.status_text(), STATUS_COLOR)
+        area = pygame.Rect(STATUS_POSITION, (self.window.get_width() - STATUS_POSITION[0], status.get_height()))
+        self.window.fill(self.renderer.background, area)
+        self.window.blit(status, STATUS_POSITION)
+        pygame.display.update(dirty_rects + [area])
+
+    def run(self) -> None:
+        self.renderer.invalidate()
+        self.present()
+        running = True
+        while running:
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                running = self.handle_key(event.key)
+                self.present()
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.renderer.invalidate()
+                self.present()
+
+def run_replay(path: str, interval: int = 32, size: Tuple[int, int] = (1200, 800)):
+    pygame.init()
+    window = pygame.display.set_mode(size)
+    pygame.display.set_caption(f"リプレイ: {os.path.basename(path)}")
+    font = pygame.font.SysFont(None, 24)
+    try:
+        ReplayViewer(path, window, font, interval).run()
+    finally:
+        pygame.quit()
+
+def main():
+    parser = argparse.ArgumentParser(description="対局記録を再生します。")
+    parser.add_argument('path', help="GameRecordWriterで書いた記録ファイル")
+    parser.add_argument('--interval', type=int, default=32, help="キーフレームの間隔（イベント数）")
+    args = parser.parse_args()
+    run_replay(args.path, args.interval)
+
+if __name__ == "__main__":
+    main()
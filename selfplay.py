@@ -0,0 +1,160 @@
+# selfplay.py
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import multiprocessing as mp
+import os
+import queue
+import random
+import time
+import numpy as np
+import torch
+from checkpoint import load_weights
+from dataset import ChunkedDatasetWriter
+from encoder import SAMPLE_COLUMNS, samples_from_events
+from game import MahjongGame
+from game_record import EVENT_DTYPE, GameRecordWriter, MemoryRecorder
+from models import PolicyValueNet
+from policy_agent import PolicyAgent
+
+def play_selfplay_game(model: torch.nn.Module, seed: int, temperature: float = 1.0,
+                       num_players: int = 4) -> np.ndarray:
+    """
+    全席を同じモデルにしてヘッドレスで1局打ち、イベント列を返します。
+    """
+    random.seed(seed)
+    recorder = MemoryRecorder()
+    agents = [PolicyAgent(model, temperature=temperature, seed=seed * num_players + seat)
+              for seat in range(num_players)]
+    game = MahjongGame(num_players, recorder=recorder, human_seats=(), agents=agents,
+                       load_images=False, verbose=False)
+    game.play_headless()
+    return recorder.events()
+
+def selfplay_worker(worker_id: int, weights_path: str, model_params: Dict[str, Any], results: mp.Queue,
+                    stop: mp.Event, seed: int, temperature: float = 1.0, max_games: Optional[int] = None) -> None:
+    """
+    ワーカープロセス本体。checkpoint.export_weights で書き出された重みのバージョンが変わるたびに読み直しながら
+    対局を続け、終わった対局を (worker_id, 重みのバージョン, イベント列, 所要秒数) としてキューに送ります。
+    """
+    torch.set_num_threads(1)
+    model = PolicyValueNet.from_params(model_params)
+    model.eval()
+    version = None
+    last_mtime = None
+    games = 0
+    while not stop.is_set() and (max_games is None or games < max_games):
+        mtime = os.stat(weights_path).st_mtime_ns if os.path.exists(weights_path) else None
+        if mtime is not None and mtime != last_mtime:
+            checkpoint = load_weights(weights_path)
+            if checkpoint['version'] != version:
+                model.load_state_dict(checkpoint['state_dict'])
+                version = checkpoint['version']
+            last_mtime = mtime
+        start = time.perf_counter()
+        events = play_selfplay_game(model, seed + games * 7919, temperature)
+        results.put((worker_id, version, events.tobytes(), time.perf_counter() - start))
+        games += 1
+
+@dataclass
+class WorkerStats:
+    games: int = 0
+    seconds: float = 0.0
+    version: Optional[int] = None
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def games_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.games / elapsed if elapsed > 0 else 0.0
+
+class SelfPlayOrchestrator:
+    """
+    K個のワーカープロセスで自己対局を並列に行い、結果を学習データストアへ書き込みます。
+    """
+
+    def __init__(self, weights_path: str, store_path: str, model_params: Dict[str, Any], num_workers: int = 4,
+                 record_path: Optional[str] = None, temperature: float = 1.0, seed: int = 0,
+                 queue_size: int = 256):
+        self.weights_path = weights_path
+        self.store_path = store_path
+        self.model_params = model_params
+        self.num_workers = num_workers
+        self.record_path = record_path
+        self.temperature = temperature
+        self.seed = seed
+        self._ctx = mp.get_context('spawn')
+        self._results = self._ctx.Queue(maxsize=queue_size)
+        self._stop = self._ctx.Event()
+        self._workers: List[mp.Process] = []
+        self.stats: Dict[int, WorkerStats] = {}
+
+    def start(self, games_per_worker: Optional[int] = None) -> None:
+        for worker_id in range(self.num_workers):
+            process = self._ctx.Process(
+                target=selfplay_worker,
+                args=(worker_id, self.weights_path, self.model_params, self._results, self._stop,
+                      self.seed + worker_id * 1_000_003, self.temperature, games_per_worker),
+                daemon=True,
+            )
+            process.start()
+            self._workers.append(process)
+            self.stats[worker_id] = WorkerStats()
+
+    def collect(self, num_games: int, timeout: Optional[float] = None) -> int:
+        """
+        終わった対局を最大num_games局受け取り、サンプルに変換してストアへ追記します。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        collected = 0
+        record = GameRecordWriter(self.record_path) if self.record_path else None
+        try:
+            with ChunkedDatasetWriter(self.store_path, SAMPLE_COLUMNS) as store:
+                while collected < num_games:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    try:
+                        worker_id, version, payload, seconds = self._results.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    events = np.frombuffer(payload, dtype=EVENT_DTYPE)
+                    samples = samples_from_events(events)
+                    if len(samples['action']):
+                        store.append_game(**samples)
+                    if record is not None:
+                        record.append_events(events)
+                    stats = self.stats[worker_id]
+                    stats.games += 1
+                    stats.seconds += seconds
+                    stats.version = version
+                    collected += 1
+        finally:
+            if record is not None:
+                record.close()
+        return collected
+
+    def games_per_second(self) -> Dict[int, float]:
+        return {worker_id: stats.games_per_second for worker_id, stats in self.stats.items()}
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        # キューに残った結果を捨ててワーカーのputを解放する
+        deadline = time.monotonic() + timeout
+        while any(process.is_alive() for process in self._workers) and time.monotonic() < deadline:
+            try:
+                self._results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for process in self._workers:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        self._workers = []
+
+    def __enter__(self) -> SelfPlayOrchestrator:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
@@ -0,0 +1,160 @@
+# state_stream.py
+# 卓の局面を差分（イベント1件ごと）と定期的なキーフレームで配信する仕組み。
+
+from typing import Callable, List, Optional
+import struct
+import numpy as np
+from game_record import (EVENT_DEAL, EVENT_DRAW, EVENT_GAME_START, EVENT_SIZE, ReplayState, apply_event,
+                         pack_event, unpack_event)
+from tiles import NUM_TILE_TYPES
+
+MESSAGE_DELTA = 1
+MESSAGE_KEYFRAME = 2
+
+_DELTA_HEADER = struct.Struct('<BI')            # 種別, 通し番号
+_KEYFRAME_HEADER = struct.Struct('<BIBBBBBH')   # 種別, 通し番号, 人数, 親, 場風, 和了者(0xFF=なし), 終局, 巡目
+NO_WINNER = 0xFF
+HIDDEN_TILE = 0xFF  # 伏せた配牌・ツモの牌種
+
+def apply_public_event(state: ReplayState, kind: int, seat: int, tile: int, arg: int, turn: int,
+                       extra: int) -> None:
+    """
+    伏せた牌を含むイベントも反映できる apply_event。伏せた配牌・ツモは巡目だけを進め、
+    手牌の枚数は打牌・鳴きで負にならないよう0で止めます（手牌を伏せた配信では常に0になります）。
+    """
+    if kind in (EVENT_DEAL, EVENT_DRAW) and tile == HIDDEN_TILE:
+        state.turn = turn
+        return
+    apply_event(state, kind, seat, tile, arg, turn, extra)
+    np.maximum(state.hands, 0, out=state.hands)
+
+def encode_delta(seq: int, event: bytes) -> bytes:
+    return _DELTA_HEADER.pack(MESSAGE_DELTA, seq) + event
+
+def encode_keyframe(seq: int, state: ReplayState) -> bytes:
+    """
+    局面全体を1つのメッセージにします（途中参加や取りこぼしからの復帰用）。
+    """
+    winner = NO_WINNER if state.winner is None else state.winner
+    rivers = list(state.rivers) + [np.zeros(0, dtype=np.int8)] * (4 - len(state.rivers))
+    parts = [
+        _KEYFRAME_HEADER.pack(MESSAGE_KEYFRAME, seq, state.num_players, state.dealer, state.round_wind, winner,
+                              int(state.game_over), state.turn),
+        state.hands.astype(np.int8).tobytes(),
+        state.melds.astype(np.int8).tobytes(),
+        bytes(int(flag) for flag in state.riichi),
+        bytes(len(river) for river in rivers),
+    ]
+    parts.extend(np.asarray(river, dtype=np.int8).tobytes() for river in rivers)
+    parts.append(bytes([len(state.dora_indicators)]) + bytes(state.dora_indicators))
+    return b''.join(parts)
+
+def decode_keyframe(message: bytes):
+    """
+    Returns:
+        (通し番号, ReplayState)
+    """
+    _, seq, num_players, dealer, round_wind, winner, game_over, turn = _KEYFRAME_HEADER.unpack_from(message)
+    offset = _KEYFRAME_HEADER.size
+    size = 4 * NUM_TILE_TYPES
+    hands = np.frombuffer(message, np.int8, size, offset).reshape(4, NUM_TILE_TYPES).copy()
+    melds = np.frombuffer(message, np.int8, size, offset + size).reshape(4, NUM_TILE_TYPES).copy()
+    offset += 2 * size
+    riichi = [bool(flag) for flag in message[offset:offset + 4]]
+    lengths = message[offset + 4:offset + 8]
+    offset += 8
+    rivers = []
+    for length in lengths:
+        rivers.append(np.frombuffer(message, np.int8, length, offset).copy())
+        offset += length
+    dora_indicators = list(message[offset + 1:offset + 1 + message[offset]])
+    state = ReplayState(num_players, dealer, round_wind, hands, melds, rivers, dora_indicators, riichi, turn,
+                        None if winner == NO_WINNER else winner, bool(game_over))
+    return seq, state
+
+class StatePublisher:
+    """
+    記録と同じ record で受け取ったイベントを、通し番号付きの差分として購読者に配ります。
+    差分の符号化は1イベントにつき1回だけで、購読者が何人でも同じbytesを渡します。
+    keyframe_interval件ごとにキーフレームを作り、途中参加者には直近のキーフレームとそれ以降の差分を渡します。
+    concealなら配牌・ツモの牌を伏せて配信し、キーフレームにも手牌を含めません（着席者と同じ情報だけを流す）。
+    """
+
+    def __init__(self, keyframe_interval: int = 64, wrap: Optional[Callable[[bytes], bytes]] = None,
+                 conceal: bool = False):
+        self.keyframe_interval = keyframe_interval
+        self.conceal = conceal
+        self.wrap = wrap or (lambda message: message)  # 送信用のフレームへの包み方
+        self.state = ReplayState(rivers=[np.zeros(0, dtype=np.int8) for _ in range(4)])
+        self.seq = 0
+        self.turn = 0
+        self._keyframe = self.wrap(encode_keyframe(0, self.state))
+        self._tail: List[bytes] = []
+        self._subscribers: List[Callable[[bytes], object]] = []
+
+    def record(self, kind: int, seat: int = 0, tile: int = 0, arg: int = 0, extra: int = 0) -> None:
+        if kind == EVENT_GAME_START:
+            self.turn = 0
+        elif kind == EVENT_DRAW:
+            self.turn += 1
+        turn = min(self.turn, 0xFFFF)
+        if self.conceal and kind in (EVENT_DEAL, EVENT_DRAW):
+            tile = HIDDEN_TILE
+        apply_public_event(self.state, kind, seat, tile, min(arg, 255), turn, extra)
+        self.seq += 1
+        self._publish(self.wrap(encode_delta(self.seq, pack_event(kind, seat, tile, arg, turn, extra))))
+        if len(self._tail) >= self.keyframe_interval:
+            self._keyframe = self.wrap(encode_keyframe(self.seq, self.state))
+            self._tail = []
+            self._publish(self._keyframe, keep=False)
+
+    def _publish(self, message: bytes, keep: bool = True) -> None:
+        if keep:
+            self._tail.append(message)
+        for send in list(self._subscribers):
+            if send(message) is False:
+                self._subscribers.remove(send)  # 送れなくなった購読者は外す
+
+    def subscribe(self, send: Callable[[bytes], object]) -> List[bytes]:
+        """
+        購読者を登録し、追いつくために先に送るべきメッセージ（キーフレーム + 以降の差分）を返します。
+        sendがFalseを返すと購読を解除します。
+        """
+        self._subscribers.append(send)
+        return [self._keyframe] + self._tail
+
+    def unsubscribe(self, send: Callable[[bytes], object]) -> None:
+        if send in self._subscribers:
+            self._subscribers.remove(send)
+
+class StateMirror:
+    """
+    受け取ったキーフレームと差分から局面を手元に再現します。
+    通し番号が飛んだら次のキーフレームまで差分を無視し、needs_keyframe を立てます。
+    """
+
+    def __init__(self):
+        self.state: Optional[ReplayState] = None
+        self.seq = -1
+        self.needs_keyframe = True
+
+    def apply(self, message: bytes) -> bool:
+        """
+        メッセージを1件反映し、局面が更新されたかどうかを返します。
+        """
+        if message[0] == MESSAGE_KEYFRAME:
+            seq, state = decode_keyframe(message)
+            if seq < self.seq:
+                return False
+            self.seq, self.state, self.needs_keyframe = seq, state, False
+            return True
+        _, seq = _DELTA_HEADER.unpack_from(message)
+        if self.needs_keyframe or seq <= self.seq:
+            return False
+        if seq != self.seq + 1:
+            self.needs_keyframe = True
+            return False
+        event = unpack_event(message[_DELTA_HEADER.size:_DELTA_HEADER.size + EVENT_SIZE])
+        apply_public_event(self.state, *event)
+        self.seq = seq
+        return True
@@ -0,0 +1,64 @@
+# surface_cache.py
+
+from collections import OrderedDict
+from typing import Hashable, Tuple
+import pygame
+
+TILE_FACE_COLOR = (255, 255, 255)
+TILE_TEXT_COLOR = (0, 0, 0)
+TILE_TEXT_OFFSET = (5, 25)
+
+class SurfaceCache:
+    """
+    文字列や牌の面を描いたSurfaceを (文字列, フォント, 色, 大きさ) をキーに保持するLRUキャッシュ。
+    上限を超えると最も長く使われていないものから捨てます。
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._surfaces: 'OrderedDict[Hashable, pygame.Surface]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    def clear(self) -> None:
+        self._surfaces.clear()
+
+    def _lookup(self, key: Hashable):
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+        return surface
+
+    def _store(self, key: Hashable, surface: pygame.Surface) -> pygame.Surface:
+        self.misses += 1
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def text(self, font, string: str, color: Tuple[int, int, int], antialias: bool = True) -> pygame.Surface:
+        """
+        font.render の結果を返します。
+        """
+        key = ('text', string, font, tuple(color), antialias)
+        return self._lookup(key) or self._store(key, font.render(string, antialias, color))
+
+    def tile_face(self, font, name: str, size: Tuple[int, int]) -> pygame.Surface:
+        """
+        画像のない牌の代わりに、白い矩形に牌名を重ねた面を返します。
+        """
+        key = ('tile', name, font, TILE_TEXT_COLOR, tuple(size))
+        surface = self._lookup(key)
+        if surface is None:
+            surface = pygame.Surface(size)
+            surface.fill(TILE_FACE_COLOR)
+            surface.blit(font.render(name, True, TILE_TEXT_COLOR), TILE_TEXT_OFFSET)
+            surface = self._store(key, surface)
+        return surface
+
+# 全プレイヤーで共有するキャッシュ
+shared_cache = SurfaceCache()
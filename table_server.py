@@ -0,0 +1,416 @@
+# table_server.py
+# 1プロセスで多数の卓をホストするasyncioの対局サーバー。
+# 通信は「4バイトの長さ（ビッグエンディアン）+ 1バイトの種別 + 本体」のフレームで行います。
+
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import itertools
+import logging
+import struct
+import numpy as np
+from ai_agent import AIAgent
+from game import MahjongGame
+from game_record import (EVENT_DEAL, EVENT_DRAW, EVENT_GAME_END, EVENT_GAME_START, END_ABORTED, EVENT_SIZE,
+                         pack_event, unpack_event)
+from state_stream import HIDDEN_TILE, StateMirror, StatePublisher
+from tiles import NUM_TILE_TYPES, tile_to_index
+from yaku_evaluator import YakuEvaluator
+
+# クライアント → サーバー
+MSG_JOIN = 1         # 本体なし
+MSG_DISCARD = 2      # 本体: 牌種 (u8)
+MSG_SPECTATE = 3     # 本体: 卓番号 (u32)
+# サーバー → クライアント
+MSG_WELCOME = 16     # 本体: 卓番号 (u32), 席 (u8), 人数 (u8)
+MSG_EVENT = 17       # 本体: game_record と同じ8バイトのイベント
+MSG_YOUR_TURN = 18   # 本体: 手牌の牌種ごとの枚数 (34 x u8), 持ち時間ミリ秒 (u32)
+MSG_GAME_OVER = 19   # 本体: 和了者の席 (u8, 流局・中断は NO_WINNER)
+MSG_ERROR = 20       # 本体: UTF-8のメッセージ
+MSG_STATE = 21       # 本体: state_stream の差分またはキーフレーム（観戦用）
+
+NO_WINNER = 0xFF
+MAX_FRAME_SIZE = 1024
+
+_FRAME_HEADER = struct.Struct('!IB')
+_WELCOME = struct.Struct('!IBB')
+_TIMEOUT = struct.Struct('!I')
+_SPECTATE = struct.Struct('!I')
+
+def encode_frame(kind: int, body: bytes = b'') -> bytes:
+    return _FRAME_HEADER.pack(len(body) + 1, kind) + body
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """
+    フレームを1つ読みます。接続が閉じられた場合は asyncio.IncompleteReadError を送出します。
+    """
+    length, kind = _FRAME_HEADER.unpack(await reader.readexactly(_FRAME_HEADER.size))
+    if not 1 <= length <= MAX_FRAME_SIZE:
+        raise ValueError(f"フレームの長さが不正です: {length}")
+    return kind, await reader.readexactly(length - 1)
+
+def heuristic_agent() -> AIAgent:
+    return AIAgent(YakuEvaluator(is_dealer=False, verbose=False))
+
+class Connection:
+    """
+    1接続（=1席）。送信は上限付きのキューを通し、読み切れない遅いクライアントは切断します。
+    受信した打牌は手番（MSG_YOUR_TURN への返答待ち）のあいだだけ1つ受け付け、それ以外は捨てます。
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, send_queue_size: int = 256):
+        self.reader = reader
+        self.writer = writer
+        self.outbox: asyncio.Queue = asyncio.Queue(send_queue_size)
+        self.actions: asyncio.Queue = asyncio.Queue(1)
+        self.awaiting_action = False  # MSG_YOUR_TURN を送って打牌を待っている
+        self.closed = False
+        self._writer_task = asyncio.ensure_future(self._write_loop())
+
+    def send(self, frame: bytes) -> bool:
+        if self.closed:
+            return False
+        try:
+            self.outbox.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            logging.warning("送信キューがあふれたため接続を切ります")
+            self.close()
+            return False
+
+    def close(self) -> None:
+        """
+        キューに残ったフレームを送り終えてから接続を閉じます。
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self.actions.full():
+            self.actions.get_nowait()
+        self.actions.put_nowait(None)  # 手番待ちを起こす
+        if self.outbox.full():
+            self._writer_task.cancel()
+            self.writer.close()
+        else:
+            self.outbox.put_nowait(None)
+
+    async def _write_loop(self) -> None:
+        try:
+            while True:
+                frame = await self.outbox.get()
+                if frame is None:
+                    break
+                self.writer.write(frame)
+                await self.writer.drain()  # 相手の受信が追いつくまで待つ
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.closed = True
+            self.writer.close()
+
+    async def read_loop(self) -> None:
+        """
+        クライアントからの打牌を受け取り、卓の手番待ちに渡します。
+        手番外の打牌や、前の打牌が処理される前に届いた打牌は捨てるので、受信側のキューは伸びません。
+        """
+        try:
+            while not self.closed:
+                kind, body = await read_frame(self.reader)
+                if kind == MSG_DISCARD and len(body) == 1 and self.awaiting_action and not self.actions.full():
+                    self.actions.put_nowait(body[0])
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.close()
+
+class BroadcastRecorder:
+    """
+    対局のイベントを卓の全席に送るレコーダー。他家の配牌・ツモは牌を伏せます。
+    1イベントあたりの符号化は、公開用と本人用の2通りだけです。
+    spectatorsを渡すと、イベントを観戦用の配信にも流します（伏せるかどうかは配信側の conceal で決まります）。
+    """
+
+    def __init__(self, seats: Dict[int, Connection], spectators: Optional[StatePublisher] = None):
+        self.seats = seats
+        self.spectators = spectators
+        self.turn = 0
+
+    def record(self, kind: int, seat: int = 0, tile: int = 0, arg: int = 0, extra: int = 0) -> None:
+        if kind == EVENT_GAME_START:
+            self.turn = 0
+        elif kind == EVENT_DRAW:
+            self.turn += 1
+        frame = encode_frame(MSG_EVENT, pack_event(kind, seat, tile, arg, self.turn, extra))
+        hidden = frame
+        if kind in (EVENT_DEAL, EVENT_DRAW):
+            hidden = encode_frame(MSG_EVENT, pack_event(kind, seat, HIDDEN_TILE, arg, self.turn, extra))
+        for other, connection in self.seats.items():
+            connection.send(frame if other == seat else hidden)
+        if self.spectators is not None:
+            self.spectators.record(kind, seat, tile, arg, extra)
+
+class Table:
+    """
+    1卓分の対局。接続のある席はクライアントの打牌を待ち、それ以外はローカルのエージェントが打ちます。
+    持ち時間を過ぎた・切断した席はツモ切りします。
+    観戦者には局面を差分とキーフレームで配信します。接続のある席がある卓では、着席者が観戦用の接続から
+    他家の手牌をのぞけないよう、着席者と同じく配牌・ツモを伏せて配信します。
+    """
+
+    def __init__(self, table_id: int, connections: List[Connection], num_players: int = 4,
+                 action_timeout: float = 10.0, agent_factory: Callable[[], AIAgent] = heuristic_agent,
+                 max_turns: int = 1000):
+        self.table_id = table_id
+        self.seats = dict(enumerate(connections))
+        self.num_players = num_players
+        self.action_timeout = action_timeout
+        self.agent_factory = agent_factory
+        self.max_turns = max_turns
+        self.game: Optional[MahjongGame] = None
+        self.publisher = StatePublisher(wrap=lambda message: encode_frame(MSG_STATE, message),
+                                        conceal=bool(self.seats))
+        self.spectators: List[Connection] = []
+
+    def add_spectator(self, connection: Connection) -> None:
+        """
+        観戦者を加え、直近のキーフレームとそれ以降の差分を送って現在の局面に追いつかせます。
+        """
+        for frame in self.publisher.subscribe(connection.send):
+            connection.send(frame)
+        self.spectators.append(connection)
+
+    async def run(self) -> Optional[int]:
+        for seat, connection in self.seats.items():
+            connection.send(encode_frame(MSG_WELCOME, _WELCOME.pack(self.table_id, seat, self.num_players)))
+        agents = [None if seat in self.seats else self.agent_factory() for seat in range(self.num_players)]
+        game = MahjongGame(self.num_players, recorder=BroadcastRecorder(self.seats, self.publisher), human_seats=tuple(self.seats),
+                           agents=agents, load_images=False, verbose=False)
+        self.game = game
+        try:
+            for _ in range(self.max_turns):
+                if game.game_over:
+                    break
+                player = game.players[game.current_player_index]
+                connection = self.seats.get(player.seat)
+                if connection is None:
+                    if game.play_ai_turn(player) is None and not game.game_over:
+                        break
+                else:
+                    await self._remote_turn(game, player, connection)
+                await asyncio.sleep(0)  # 他の卓・接続に順番を譲る
+            if not game.game_over:
+                game.game_over = True
+                game.recorder.record(EVENT_GAME_END, arg=END_ABORTED)
+        finally:
+            winner = game.winner.seat if game.winner is not None else NO_WINNER
+            for connection in list(self.seats.values()) + self.spectators:
+                connection.send(encode_frame(MSG_GAME_OVER, bytes([winner])))
+                connection.close()
+        return None if winner == NO_WINNER else winner
+
+    async def _remote_turn(self, game: MahjongGame, player, connection: Connection) -> None:
+        game.draw_tile(player)
+        if game.game_over:
+            return
+        fallback = tile_to_index(player.hand[-1])  # ツモ切り
+        choice = None
+        if not connection.closed:
+            while not connection.actions.empty():
+                connection.actions.get_nowait()  # 手番外に届いた打牌は捨てる
+            counts = np.bincount([tile_to_index(tile) for tile in player.hand], minlength=NUM_TILE_TYPES)
+            connection.awaiting_action = True
+            connection.send(encode_frame(MSG_YOUR_TURN, bytes(counts.astype(np.uint8))
+                                         + _TIMEOUT.pack(int(self.action_timeout * 1000))))
+            try:
+                choice = await asyncio.wait_for(self._next_action(connection, counts), self.action_timeout)
+            except asyncio.TimeoutError:
+                choice = None
+            finally:
+                connection.awaiting_action = False
+        if choice is None or game.discard_by_index(player, choice) is None:
+            game.discard_by_index(player, fallback)
+        game.finish_human_discard(player)
+
+    @staticmethod
+    async def _next_action(connection: Connection, counts: np.ndarray) -> Optional[int]:
+        while True:
+            choice = await connection.actions.get()
+            if choice is None:
+                return None  # 切断
+            if choice < NUM_TILE_TYPES and counts[choice] > 0:
+                return choice
+
+class TableServer:
+    """
+    接続をロビーに集め、humans_per_table人そろうごとに卓を作ってタスクとして進めます。
+    残りの席はローカルのエージェントが打ちます。
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, num_players: int = 4, humans_per_table: int = 1,
+                 action_timeout: float = 10.0, join_timeout: float = 10.0, send_queue_size: int = 256,
+                 agent_factory: Callable[[], AIAgent] = heuristic_agent):
+        if not 1 <= humans_per_table <= num_players:
+            raise ValueError("1卓あたりの人数が不正です。")
+        self.host = host
+        self.port = port
+        self.num_players = num_players
+        self.humans_per_table = humans_per_table
+        self.action_timeout = action_timeout
+        self.join_timeout = join_timeout
+        self.send_queue_size = send_queue_size
+        self.agent_factory = agent_factory
+        self.lobby: List[Connection] = []
+        self.tables: Dict[int, asyncio.Task] = {}
+        self.rooms: Dict[int, Table] = {}  # 観戦の受付用に進行中の卓を引けるようにする
+        self.results: List[Optional[int]] = []
+        self._table_ids = itertools.count(1)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> TableServer:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in list(self.tables.values()):
+            task.cancel()
+        await asyncio.gather(*self.tables.values(), return_exceptions=True)
+
+    async def __aenter__(self) -> TableServer:
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        await self._server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = Connection(reader, writer, self.send_queue_size)
+        try:
+            kind, body = await asyncio.wait_for(read_frame(reader), self.join_timeout)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            connection.close()
+            return
+        if kind == MSG_SPECTATE and len(body) == _SPECTATE.size:
+            table = self.rooms.get(_SPECTATE.unpack(body)[0])
+            if table is None:
+                connection.send(encode_frame(MSG_ERROR, "その卓は進行していません".encode()))
+                connection.close()
+                return
+            table.add_spectator(connection)
+            await connection.read_loop()
+            return
+        if kind != MSG_JOIN:
+            connection.send(encode_frame(MSG_ERROR, "最初にJOINを送ってください".encode()))
+            connection.close()
+            return
+        self.lobby.append(connection)
+        self._start_tables()
+        await connection.read_loop()
+
+    def _start_tables(self) -> None:
+        self.lobby = [connection for connection in self.lobby if not connection.closed]
+        while len(self.lobby) >= self.humans_per_table:
+            seated, self.lobby = self.lobby[:self.humans_per_table], self.lobby[self.humans_per_table:]
+            table_id = next(self._table_ids)
+            table = Table(table_id, seated, self.num_players, self.action_timeout, self.agent_factory)
+            task = asyncio.ensure_future(table.run())
+            self.tables[table_id] = task
+            self.rooms[table_id] = table
+            task.add_done_callback(lambda task, table_id=table_id: self._table_done(table_id, task))
+
+    def _table_done(self, table_id: int, task: asyncio.Task) -> None:
+        self.tables.pop(table_id, None)
+        self.rooms.pop(table_id, None)
+        if not task.cancelled():
+            if task.exception() is not None:
+                logging.error("卓 %d でエラーが発生しました", table_id, exc_info=task.exception())
+            else:
+                self.results.append(task.result())
+
+class TableClient:
+    """
+    動作確認・負荷試験用のクライアント。手番が来たら choose(手牌の枚数) が返す牌種を捨てます。
+    """
+
+    def __init__(self, choose: Optional[Callable[[np.ndarray], Optional[int]]] = None):
+        self.choose = choose or (lambda counts: int(np.flatnonzero(counts)[0]))
+        self.table_id: Optional[int] = None
+        self.seat: Optional[int] = None
+        self.events: List[tuple] = []
+        self.turns = 0
+        self.winner: Optional[int] = None
+        self.finished = False
+        self.mirror: Optional[StateMirror] = None
+
+    async def play(self, host: str, port: int) -> TableClient:
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(encode_frame(MSG_JOIN))
+            while True:
+                try:
+                    kind, body = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                if kind == MSG_WELCOME:
+                    self.table_id, self.seat, _ = _WELCOME.unpack(body)
+                elif kind == MSG_EVENT and len(body) == EVENT_SIZE:
+                    self.events.append(unpack_event(body))
+                elif kind == MSG_YOUR_TURN:
+                    self.turns += 1
+                    choice = self.choose(np.frombuffer(body[:NUM_TILE_TYPES], dtype=np.uint8))
+                    if choice is not None:
+                        writer.write(encode_frame(MSG_DISCARD, bytes([choice])))
+                        await writer.drain()
+                elif kind == MSG_GAME_OVER:
+                    self.winner = None if body[0] == NO_WINNER else body[0]
+                    self.finished = True
+                    break
+        finally:
+            writer.close()
+        return self
+
+    async def spectate(self, host: str, port: int, table_id: int) -> StateMirror:
+        """
+        卓を観戦し、配信された差分で局面を手元に再現します。終局または切断まで戻りません。
+        """
+        self.mirror = StateMirror()
+        self.table_id = table_id
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(encode_frame(MSG_SPECTATE, _SPECTATE.pack(table_id)))
+            while True:
+                try:
+                    kind, body = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                if kind == MSG_STATE:
+                    self.mirror.apply(body)
+                elif kind == MSG_GAME_OVER:
+                    self.winner = None if body[0] == NO_WINNER else body[0]
+                    self.finished = True
+                    break
+                elif kind == MSG_ERROR:
+                    break
+        finally:
+            writer.close()
+        return self.mirror
+
+def main():
+    parser = argparse.ArgumentParser(description="麻雀の対局サーバーを起動します。")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7000)
+    parser.add_argument('--humans', type=int, default=1, help="1卓あたりの接続数（残りはAI）")
+    parser.add_argument('--timeout', type=float, default=10.0, help="1手の持ち時間（秒）")
+    args = parser.parse_args()
+    server = TableServer(args.host, args.port, humans_per_table=args.humans, action_timeout=args.timeout)
+    asyncio.run(server.serve_forever())
+
+if __name__ == "__main__":
+    main()
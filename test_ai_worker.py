@@ -0,0 +1,29 @@
+# test_ai_worker.py
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import threading
+import time
+import pygame
+from ai_agent import AIAgent
+from game import MahjongGame
+from yaku_evaluator import YakuEvaluator
+
+class SlowAgent(AIAgent):
+    def choose_discard(self, hand, discards):
+        time.sleep(0.3)
+        return super().choose_discard(hand, discards)
+
+def test_window_stays_responsive_during_slow_ai_turn():
+    pygame.init()
+    window = pygame.display.set_mode((1200, 800))
+    font = pygame.font.Font(None, 24)
+    agents = [SlowAgent(YakuEvaluator(is_dealer=False, verbose=False)) for _ in range(4)]
+    game = MahjongGame(human_seats=(), agents=agents, load_images=False, verbose=False)
+    threading.Timer(0.05, lambda: pygame.event.post(pygame.event.Event(pygame.QUIT))).start()
+    start = time.perf_counter()
+    game.play_game_pygame(window, font, fps=0, quit_on_exit=False)
+    # AIの思考中でも終了イベントを受け付け、最初の1手を待つだけで抜ける
+    assert time.perf_counter() - start < 1.0
+    assert not game.game_over
+    pygame.quit()
@@ -0,0 +1,40 @@
+# test_augmentation.py
+
+import numpy as np
+from augmentation import SUIT_PERMUTATIONS, SymmetryAugmenter, apply_symmetry, expand_symmetries
+from encoder import ObservationEncoder, empty_state_arrays, PLANE_SEAT_WIND, WIND_OFFSET
+
+def test_suit_permutation_matches_reencoding():
+    rng = np.random.default_rng(0)
+    arrays = empty_state_arrays(6)
+    arrays['hands'][:] = rng.integers(0, 3, arrays['hands'].shape)
+    arrays['rivers'][:, :, :5] = rng.integers(0, 34, (6, 4, 5))
+    arrays['dora_indicators'][:, 0] = 8
+    encoder = ObservationEncoder(6, pin_memory=False)
+    obs = encoder.encode_batch(**arrays).copy()
+    policy = np.eye(34, dtype=np.float32)[[0, 9, 18, 26, 30, 5]]
+    suit_ids = np.arange(6)
+    out = apply_symmetry({'obs': obs, 'policy': policy, 'action': policy.argmax(1)}, suit_ids)
+
+    # 元の牌種を並べ替えてから符号化した結果と一致する
+    forward = np.argsort(SUIT_PERMUTATIONS, axis=1)
+    permuted = {name: values.copy() for name, values in arrays.items()}
+    permuted['hands'] = np.take_along_axis(arrays['hands'], SUIT_PERMUTATIONS, axis=1)
+    mapping = forward[suit_ids]
+    rivers = np.maximum(arrays['rivers'], 0).astype(np.intp)
+    permuted['rivers'] = np.where(arrays['rivers'] >= 0, np.take_along_axis(mapping[:, None, :], rivers, axis=2), -1)
+    dora = np.maximum(arrays['dora_indicators'], 0).astype(np.intp)
+    permuted['dora_indicators'] = np.where(arrays['dora_indicators'] >= 0, np.take_along_axis(mapping, dora, axis=1), -1)
+    assert np.array_equal(out['obs'], encoder.encode_batch(**permuted))
+    assert np.array_equal(out['policy'].argmax(1), out['action'])
+    assert out['action'][3] in (8, 17, 26) and out['action'][4] == 30
+
+def test_exhaustive_and_random_augmentation():
+    obs = np.zeros((2, 19, 34), dtype=np.uint8)
+    obs[:, PLANE_SEAT_WIND, WIND_OFFSET] = 1
+    batch = {'obs': obs, 'policy': np.zeros((2, 34), np.float32), 'value': np.array([1.0, -1.0], np.float32)}
+    expanded = expand_symmetries(batch, rotate_seats=True)
+    assert len(expanded['obs']) == 2 * 6 * 4
+    assert sorted(set(expanded['obs'][:, PLANE_SEAT_WIND].argmax(1).tolist())) == [27, 28, 29, 30]
+    augmented = SymmetryAugmenter(seed=0)(batch)
+    assert augmented['obs'].shape == obs.shape and augmented['value'].tolist() == [1.0, -1.0]
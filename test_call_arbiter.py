@@ -0,0 +1,64 @@
+# test_call_arbiter.py
+
+import asyncio
+from call_arbiter import (CALL_CHI, CALL_KAN, CALL_PON, CALL_RON, Call, CallArbiter, arbitrate, call_options,
+                          is_complete)
+from marjong import Tile, hand_counts, tile_index
+
+def counts(*tiles):
+    result = [0] * 34
+    for tile in tiles:
+        result[tile] += 1
+    return result
+
+# 1-9萬 + 東東東 + 白 の白単騎待ち
+TANKI_TILES = [0, 1, 2, 3, 4, 5, 6, 7, 8, 27, 27, 27, 31]
+TANKI = counts(*TANKI_TILES)
+
+def test_is_complete():
+    assert is_complete(counts(*TANKI_TILES, 31))
+    assert not is_complete(counts(*TANKI_TILES, 30))
+    assert is_complete(counts(*[t for t in range(0, 14, 2) for _ in range(2)]))  # 七対子
+    assert is_complete(counts(0, 8, 9, 17, 18, 26, 27, 28, 29, 30, 31, 32, 33, 33))  # 国士無双
+
+def test_call_options_table():
+    options = call_options(bytes(TANKI))
+    assert options.ron_mask == 1 << 31
+    assert options.pon_mask & (1 << 27) and options.kan_mask & (1 << 27)
+    assert options.chi[9] == ()
+    assert options.chi[4] == (2, 3, 4)
+
+def test_priority_and_seat_skipping():
+    arbiter = CallArbiter()
+    arbiter.update_hand(1, counts(10, 11, 20, 25, 29))  # 下家: 4筒のチー
+    arbiter.update_hand(2, counts(12, 12, 5))        # 対面: 4筒のポン
+    arbiter.update_hand(3, counts(33))               # 何もできない
+    candidates = arbiter.candidates(0, 12)
+    assert set(candidates) == {1, 2}
+    assert candidates[1] == [Call(1, CALL_CHI, 12, 10)]
+    assert arbitrate(0, [candidates[1][0], candidates[2][0]]).call_type == CALL_PON
+    # ロン同士は下家に近い方（頭ハネ）
+    assert arbitrate(0, [Call(3, CALL_RON, 1, 1), Call(2, CALL_RON, 1, 1), Call(1, CALL_KAN, 1, 1)]).seat == 2
+    assert arbitrate(0, []) is None
+
+def test_collect_times_out_human_seat():
+    arbiter = CallArbiter(timeout=0.05)
+    arbiter.update_hand(1, TANKI)
+    arbiter.update_hand(2, counts(31, 31))
+
+    async def silent_human(seat, calls):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        passing = await arbiter.collect(0, 31, {1: silent_human, 2: lambda seat, calls: calls[0]})
+        ron = await arbiter.collect(0, 31, {1: lambda seat, calls: calls[0], 2: lambda seat, calls: calls[0]})
+        return passing, ron
+
+    passing, ron = asyncio.run(scenario())
+    assert passing == Call(2, CALL_PON, 31, 31)
+    assert ron == Call(1, CALL_RON, 31, 31)
+
+def test_marjong_tiles_map_to_indices():
+    assert [tile_index(Tile('萬', 1)), tile_index(Tile('筒', 9)), tile_index(Tile('索', 5)),
+            tile_index(Tile(None, '中'))] == [0, 17, 22, 33]
+    assert hand_counts([Tile(None, '東'), Tile(None, '東')])[27] == 2
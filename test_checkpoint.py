@@ -0,0 +1,31 @@
+# test_checkpoint.py
+
+import os
+import torch
+from checkpoint import CheckpointManager, export_weights, load_weights
+from models import QNetwork
+
+def test_checkpoint_rotation_and_restore(tmp_path):
+    model = QNetwork(8, 4)
+    optimizer = torch.optim.Adam(model.parameters())
+    manager = CheckpointManager(str(tmp_path), keep_last=2)
+    for step in range(1, 4):
+        manager.save(step, model, optimizer, replay_cursor={'epoch': step})
+    assert [os.path.basename(p) for p in manager.checkpoints()] == ['checkpoint-00000002.pt', 'checkpoint-00000003.pt']
+
+    expected = torch.rand(3)
+    restored_model = QNetwork(8, 4)
+    restored = manager.restore(restored_model, torch.optim.Adam(restored_model.parameters()))
+    assert restored['step'] == 3 and restored['replay_cursor'] == {'epoch': 3}
+    assert torch.equal(torch.rand(3), expected)  # 乱数状態も保存時点に戻る
+    for a, b in zip(model.parameters(), restored_model.parameters()):
+        assert torch.equal(a, b)
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('.tmp-')]
+
+def test_export_weights(tmp_path):
+    model = QNetwork(8, 4)
+    path = str(tmp_path / "weights.pt")
+    export_weights(model, path, version=7)
+    checkpoint = load_weights(path)
+    assert checkpoint['version'] == 7
+    assert set(checkpoint['state_dict']) == set(model.state_dict())
@@ -0,0 +1,45 @@
+# test_dataset.py
+
+import numpy as np
+import pytest
+from dataset import ChunkedDatasetWriter, ChunkedDatasetReader
+
+COLUMNS = {'x': ((3,), np.float32), 'y': ((), np.int64)}
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = str(tmp_path / "store.h5")
+    with ChunkedDatasetWriter(path, COLUMNS, chunk_rows=16) as writer:
+        start = 0
+        for rows in [10, 25, 7, 40]:
+            y = np.arange(start, start + rows)
+            writer.append_game(x=np.repeat(y[:, None], 3, axis=1).astype(np.float32), y=y)
+            start += rows
+    return path
+
+def test_append_and_random_access(store_path):
+    with ChunkedDatasetReader(store_path) as reader:
+        assert len(reader) == 82
+        assert reader.num_games == 4
+        assert list(reader.game(2)['y']) == list(range(35, 42))
+        rows = reader.take([80, 3, 17, 3])
+        assert list(rows['y']) == [80, 3, 17, 3]
+        assert np.all(rows['x'][:, 0] == rows['y'])
+
+def test_iter_batches_covers_every_row_once(store_path):
+    with ChunkedDatasetReader(store_path) as reader:
+        batches = list(reader.iter_batches(batch_size=8, seed=0, prefetch=2, shuffle_chunks=2))
+    seen = np.concatenate([b['y'] for b in batches])
+    assert sorted(seen) == list(range(82)), "全行がちょうど1回ずつ返されていません"
+    assert all(len(b['y']) == 8 for b in batches[:-1])
+    assert not np.array_equal(seen, np.arange(82)), "シャッフルされていません"
+
+@pytest.mark.parametrize('shuffle', [True, False])
+def test_iter_batches_resumes_from_start(store_path, shuffle):
+    with ChunkedDatasetReader(store_path) as reader:
+        full = [b['y'] for b in reader.iter_batches(batch_size=8, seed=3, shuffle=shuffle, shuffle_chunks=2)]
+        for start in (1, 4, 6, len(full) - 1, len(full)):
+            resumed = [b['y'] for b in reader.iter_batches(batch_size=8, seed=3, shuffle=shuffle, shuffle_chunks=2,
+                                                           start=start)]
+            assert len(resumed) == len(full) - start
+            assert all(np.array_equal(a, b) for a, b in zip(resumed, full[start:]))
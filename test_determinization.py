@@ -0,0 +1,36 @@
+# test_determinization.py
+
+import numpy as np
+from determinization import DeterminizationSampler, VisibleState, discard_weights
+
+def make_state() -> VisibleState:
+    hand = np.zeros(34, dtype=np.int64)
+    hand[[0, 1, 2, 9, 9, 18, 27, 28, 29, 30, 31, 32, 33]] = 1
+    hand[9] = 2
+    discards = np.zeros((4, 34), dtype=np.int64)
+    discards[1, [4, 5, 6]] = 1
+    discards[2, 33] = 2
+    return VisibleState(0, hand, discards, np.zeros((4, 34), dtype=np.int64), dora_indicators=[8],
+                        hand_sizes=[13, 13, 13, 13])
+
+def test_samples_are_consistent_and_reproducible():
+    state = make_state()
+    result = DeterminizationSampler(seed=1).sample(state, 64)
+    unseen = state.unseen_counts()
+    assert unseen[33] == 1 and unseen[8] == 3
+    for i in range(64):
+        counts = result.hands[i, 1:].sum(axis=0) + np.bincount(result.walls[i], minlength=34)
+        assert np.array_equal(counts, unseen)
+    assert result.hands[:, 1:].sum(axis=2).tolist() == [[13, 13, 13]] * 64
+    again = DeterminizationSampler(seed=1).sample(state, 64)
+    assert np.array_equal(result.hands, again.hands) and np.array_equal(result.walls, again.walls)
+
+def test_weighted_sampling_follows_opponent_model():
+    state = make_state()
+    weights = discard_weights(state, strength=0.9)
+    assert weights[1, 4] < weights[1, 7] < weights[1, 10]  # 現物 < 筋 < その他
+    result = DeterminizationSampler(seed=2).sample(state, 2000, weights)
+    uniform = DeterminizationSampler(seed=2).sample(state, 2000)
+    assert result.hands[:, 1, 4].mean() < uniform.hands[:, 1, 4].mean() / 2
+    assert result.hands[:, 1:].sum(axis=2).tolist() == [[13, 13, 13]] * 2000
+    assert result.walls.shape == uniform.walls.shape
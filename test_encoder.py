@@ -0,0 +1,35 @@
+# test_encoder.py
+
+import numpy as np
+import torch
+from encoder import (ObservationEncoder, empty_state_arrays, samples_from_events, NUM_PLANES,
+                     PLANE_HAND, PLANE_RIVER, PLANE_RIVER_ORDER, PLANE_DORA, PLANE_SEAT_WIND)
+from game_record import EVENT_DTYPE, EVENT_GAME_START, EVENT_DEAL, EVENT_DISCARD
+
+def test_encode_batch_planes():
+    arrays = empty_state_arrays(2)
+    arrays['hands'][0, 0] = 3
+    arrays['rivers'][1, 2, :3] = [5, 6, 5]
+    arrays['dora_indicators'][0, 0] = 8  # 9m -> 1m
+    arrays['seats'][:] = [0, 2]
+    encoder = ObservationEncoder(4, pin_memory=False)
+    planes = encoder.encode_tensor(**arrays)
+    assert planes.shape == (2, NUM_PLANES, 34)
+    assert planes[0, PLANE_HAND:PLANE_HAND + 4, 0].tolist() == [1, 1, 1, 0]
+    assert planes[0, PLANE_DORA, 0] == 1
+    # 席2から見ると自分の河は相対席0
+    assert planes[1, PLANE_RIVER, 5] == 2
+    assert planes[1, PLANE_RIVER_ORDER, 5] == 3
+    assert planes[1, PLANE_SEAT_WIND, 29] == 1
+    assert np.shares_memory(planes.numpy(), encoder._buffer), "バッファがコピーされています"
+
+def test_samples_from_events():
+    events = np.zeros(5, dtype=EVENT_DTYPE)
+    events['kind'] = [EVENT_GAME_START, EVENT_DEAL, EVENT_DEAL, EVENT_DISCARD, EVENT_DISCARD]
+    events['seat'] = [0, 1, 1, 1, 1]
+    events['tile'] = [0, 10, 11, 10, 11]
+    samples = samples_from_events(events)
+    assert samples['action'].tolist() == [10, 11]
+    assert samples['obs'][1, PLANE_HAND, 10] == 0
+    assert samples['obs'][1, PLANE_HAND, 11] == 1
+    assert torch.allclose(torch.from_numpy(samples['policy'].sum(axis=1)), torch.ones(2))
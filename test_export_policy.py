@@ -0,0 +1,37 @@
+# test_export_policy.py
+
+import numpy as np
+import torch
+from export_policy import benchmark, export_policy
+from models import PolicyValueNet
+from policy_runtime import ExportedPolicy
+
+def make_inputs(batch_size=64):
+    return torch.from_numpy(np.random.default_rng(0).integers(0, 3, (batch_size, 19, 34)).astype(np.uint8))
+
+def make_model():
+    torch.manual_seed(0)
+    return PolicyValueNet(nhead=2, num_layers=1, dim_feedforward=64).eval()
+
+def test_unquantized_export_matches_model(tmp_path):
+    model = make_model()
+    path = export_policy(model, str(tmp_path / "policy.pt"), quantized=False, metadata={'version': 3})
+    exported = ExportedPolicy(path)
+    assert exported.metadata == {'version': 3, 'model': 'PolicyValueNet', 'quantized': False}
+    inputs = make_inputs()
+    policy, value = exported(inputs)
+    assert policy.shape == (64, 34) and value.shape == (64,)
+    with torch.no_grad():
+        expected_policy, expected_value = model(inputs)
+    assert np.allclose(policy, expected_policy.numpy(), atol=1e-5)
+    assert np.allclose(value, expected_value.reshape(-1).numpy(), atol=1e-5)
+    legal = np.zeros((64, 34), dtype=bool)
+    legal[:, 5] = True
+    assert np.all(exported.act(inputs, legal) == 5)
+
+def test_quantized_export_keeps_top1_agreement(tmp_path):
+    model = make_model()
+    exported = ExportedPolicy(export_policy(model, str(tmp_path / "policy_int8.pt")))
+    assert exported.metadata['quantized']
+    result = benchmark(model, exported, make_inputs(), repeats=1)
+    assert result['top1_agreement'] >= 0.8
@@ -0,0 +1,56 @@
+# test_game_record.py
+
+import numpy as np
+import pytest
+from tiles import tile_to_index, NUM_TILE_TYPES
+from game import MahjongGame
+from game_record import (GameRecordWriter, read_events, split_games, replay,
+                         EVENT_GAME_START, EVENT_DRAW, EVENT_DISCARD, EVENT_CALL, CALL_PON, pack_extra)
+
+def hand_counts(hand):
+    counts = np.zeros(NUM_TILE_TYPES, dtype=np.int8)
+    for tile in hand:
+        counts[tile_to_index(tile)] += 1
+    return counts
+
+@pytest.fixture
+def record_path(tmp_path):
+    return str(tmp_path / "game.mjr")
+
+def test_replay_matches_game(record_path):
+    with GameRecordWriter(record_path, buffer_events=16) as writer:
+        game = MahjongGame(recorder=writer)
+        for _ in range(12):
+            player = game.players[game.current_player_index]
+            game.draw_tile(player)
+            if player.is_human:
+                player.tile_positions = []
+                tile = player.hand.pop()
+                player.discards.append(tile)
+                player.record_discard(tile)
+            else:
+                player.choose_discard()
+            game.current_player_index = (game.current_player_index + 1) % game.num_players
+
+    events = read_events(record_path)
+    assert len(split_games(events)) == 1
+    state = replay(events)
+    for player in game.players:
+        assert np.array_equal(state.hands[player.seat], hand_counts(player.hand)), "手牌の復元が誤っています"
+        assert list(state.rivers[player.seat]) == [tile_to_index(t) for t in player.discards]
+
+def test_append_and_call(record_path):
+    for _ in range(2):
+        with GameRecordWriter(record_path) as writer:
+            writer.record(EVENT_GAME_START, 0, 0, 4)
+            writer.record(EVENT_DRAW, 1, 5)
+            writer.record(EVENT_DRAW, 1, 5)
+            writer.record(EVENT_DISCARD, 0, 5)
+            writer.record(EVENT_CALL, 1, 5, CALL_PON, pack_extra(5, 0))
+    events = read_events(record_path, mmap=False)
+    games = split_games(events)
+    assert len(games) == 2
+    state = replay(events[games[1]])
+    assert state.hands[1, 5] == 0
+    assert state.melds[1, 5] == 3
+    assert state.turn == 2
@@ -0,0 +1,8 @@
+# test_imports.py
+
+from bench_imports import import_profile
+
+def test_marjong_rules_import_without_heavy_dependencies():
+    total, entries, heavy = import_profile('marjong')
+    assert heavy == []
+    assert any(name == 'marjong' for _, name in entries)
@@ -0,0 +1,38 @@
+# test_inference_server.py
+
+import numpy as np
+import torch
+from concurrent.futures import ThreadPoolExecutor
+from models import PolicyValueNet
+from inference_server import InferenceServer
+
+def test_requests_are_batched_and_match_model():
+    torch.manual_seed(0)
+    model = PolicyValueNet(num_layers=1, dropout=0.0)
+    model.eval()
+    obs = np.random.default_rng(0).integers(0, 3, size=(32, 19, 34)).astype(np.uint8)
+    with InferenceServer(model, max_batch_size=8, max_latency=0.05) as server:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(server.infer, obs))
+        stats = server.stats()
+    with torch.no_grad():
+        expected_policy, expected_value = model(torch.from_numpy(obs))
+    for i, (policy, value) in enumerate(results):
+        assert np.allclose(policy, expected_policy[i].numpy(), atol=1e-5)
+        assert abs(value - float(expected_value[i])) < 1e-5
+    assert stats['requests'] == 32
+    assert stats['batches'] < 32, "リクエストがまとめられていません"
+    assert max(stats['batch_size_histogram']) <= 8
+
+def test_cancelled_request_does_not_stop_server():
+    model = PolicyValueNet(num_layers=1)
+    obs = np.zeros((19, 34), dtype=np.uint8)
+    with InferenceServer(model, max_batch_size=8, max_latency=0.2) as server:
+        assert not model.training
+        futures = [server.submit(obs) for _ in range(3)]
+        assert futures[1].cancel()
+        assert futures[0].result(timeout=5)[0].shape == (34,)
+        assert futures[2].result(timeout=5)[0].shape == (34,)
+        policy, _ = server.submit(obs).result(timeout=5)
+        assert policy.shape == (34,)
+        assert server.stats()['requests'] == 3
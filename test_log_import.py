@@ -0,0 +1,80 @@
+# test_log_import.py
+
+import gzip
+import io
+import tarfile
+from dataset import ChunkedDatasetReader
+from game_record import CALL_CHI, CALL_PON, END_EXHAUSTED, END_WIN, EVENT_GAME_END, EVENT_WIN, read_events
+from log_import import LogImporter, convert_log, decode_meld, iter_logs, parse_mjlog, validate_game
+
+def hai(*tiles):
+    """34種の牌を、重ならない136枚の番号にしてカンマ区切りにします。"""
+    used = {}
+    result = []
+    for tile in tiles:
+        copy = used.get(tile, 0)
+        used[tile] = copy + 1
+        result.append(str(tile * 4 + copy))
+    return ','.join(result)
+
+HANDS = [
+    hai(0, 1, 2, 3, 4, 5, 6, 7, 8, 27, 27, 27, 31),  # 白単騎
+    hai(9, 10, 11, 12, 13, 14, 15, 16, 17, 28, 28, 28, 32),
+    hai(18, 19, 20, 21, 22, 23, 24, 25, 26, 29, 29, 29, 33),
+    hai(0, 1, 2, 9, 10, 11, 18, 19, 20, 30, 30, 30, 33),
+]
+
+def init(oya=0):
+    return (f'<INIT seed="0,0,0,1,2,{4 * 4}" ten="250,250,250,250" oya="{oya}" '
+            + ' '.join(f'hai{seat}="{hand}"' for seat, hand in enumerate(HANDS)) + '/>')
+
+MJLOG = ('<mjloggm ver="2.3"><GO type="169"/>'
+         # 1局目: 全員1回ずつツモ切りして流局
+         + init() + '<T132/><D132/><U133/><V134/><W135/><G135/><RYUUKYOKU ba="0,0"/>'
+         # 2局目: 白をツモって和了
+         + init(1) + '<T125/><AGARI who="0" fromWho="0" machi="125" ten="40,2000,0" yaku="0,1"/>'
+         # 3局目: 持っていない牌を打牌
+         + init(2) + '<T132/><D60/><RYUUKYOKU ba="0,0"/>'
+         + '</mjloggm>').encode('utf-8')
+
+def test_decode_meld():
+    assert decode_meld(1, 27031) == (CALL_CHI, 12, 10, 0)
+    call_type, tile, base, from_seat = decode_meld(0, 34314)
+    assert (call_type, tile, base, from_seat) == (CALL_PON, 22, 22, 2)
+
+def test_parse_and_validate():
+    games = list(parse_mjlog(io.BytesIO(MJLOG)))
+    assert len(games) == 3
+    assert [int(game['arg'][-1]) for game in games[:2]] == [END_EXHAUSTED, END_WIN]
+    assert all(int(game['kind'][-1]) == EVENT_GAME_END for game in games)
+    win = games[1][games[1]['kind'] == EVENT_WIN][0]
+    assert (int(win['seat']), int(win['tile']), int(win['arg'])) == (0, 31, 1)
+    assert validate_game(games[0]) is None
+    assert validate_game(games[1]) is None
+    assert validate_game(games[2]) is not None
+
+def test_convert_rejects_broken_logs():
+    result = convert_log('ok', MJLOG)
+    assert len(result.games) == 2 and sum(result.rejected.values()) == 1
+    broken = convert_log('broken', MJLOG[:-20])
+    assert sum(broken.rejected.values()) == 1
+
+def test_import_from_archives(tmp_path):
+    gz_path = tmp_path / "a.mjlog"
+    gz_path.write_bytes(gzip.compress(MJLOG))
+    tar_path = tmp_path / "logs.tar.gz"
+    with tarfile.open(tar_path, 'w:gz') as archive:
+        for name, data in (('b.xml', MJLOG), ('c.mjlog', gzip.compress(MJLOG))):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    paths = [str(gz_path), str(tar_path)]
+    assert [data for _, data in iter_logs(paths)] == [MJLOG] * 3
+
+    store = str(tmp_path / "store.h5")
+    record = str(tmp_path / "imported.rec")
+    stats = LogImporter(store, record).run(paths)
+    assert (stats.logs, stats.games, sum(stats.rejected.values())) == (3, 6, 3)
+    with ChunkedDatasetReader(store) as reader:
+        assert len(reader) == stats.samples > 0
+    assert int((read_events(record)['kind'] == EVENT_GAME_END).sum()) == 6
@@ -0,0 +1,32 @@
+# test_main.py
+
+import os
+import pygame
+import game
+import main
+from ai_worker import TurnWorker
+
+def test_turbo_runs_headless_without_window(monkeypatch, capsys):
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'x11')  # run_turbo が書き換えた値は終了後に戻る
+
+    def no_window(*args, **kwargs):
+        raise AssertionError("ウィンドウを作っています")
+
+    monkeypatch.setattr(pygame.display, 'set_mode', no_window)
+    wins = main.run_turbo(2, render_every=0, headless=True)
+    assert sum(wins.values()) == 2
+    assert os.environ['SDL_VIDEODRIVER'] == 'dummy'
+    assert "2 局を" in capsys.readouterr().out
+
+def test_watched_turbo_has_no_frame_cap(monkeypatch):
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+    workers = []
+
+    def make_worker(min_turn_time=0.0):
+        workers.append(min_turn_time)
+        return TurnWorker(min_turn_time)
+
+    monkeypatch.setattr(game, 'TurnWorker', make_worker)
+    wins = main.run_turbo(1, render_every=20, headless=True)
+    assert sum(wins.values()) == 1
+    assert workers == [0.0]
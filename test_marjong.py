@@ -0,0 +1,127 @@
+# test_marjong.py
+
+import threading
+import time
+from call_arbiter import CALL_KAN, CALL_PON, CALL_RON, Call
+from marjong import HONORS, Game, Player, Tile
+
+_SUITS = ['萬', '筒', '索']
+
+def tile(index):
+    if index >= 27:
+        return Tile(None, HONORS[index - 27])
+    return Tile(_SUITS[index // 9], index % 9 + 1)
+
+# 234萬 567筒 345索 678索 + 5萬 の5萬単騎（断么九）
+TANYAO_WAIT = [1, 2, 3, 13, 14, 15, 20, 21, 22, 23, 24, 25, 4]
+# 123萬 567筒 345索 678索 + 東 の東単騎（役なし）
+YAKULESS_WAIT = [0, 1, 2, 13, 14, 15, 20, 21, 22, 23, 24, 25, 27]
+
+def make_game(hands, human_seats=(), game_class=Game):
+    """initUI を通さずに卓だけを用意します。"""
+    game = game_class.__new__(game_class)
+    game.setup_table([Player(f"P{seat}") for seat in range(4)], human_seats)
+    for seat, (player, hand) in enumerate(zip(game.players, hands)):
+        player.hand = [tile(index) for index in hand]
+        game.arbiter.update_hand(seat, bytes(hand.count(t) for t in range(34)))
+    return game
+
+def discard_from_dealer(game, index):
+    game.players[0].hand.append(tile(index))
+    return game.discard(game.players[0], tile(index))
+
+def test_ai_declares_ron_only_with_yaku():
+    game = make_game([[], TANYAO_WAIT, [], []])
+    assert discard_from_dealer(game, 4) == Call(1, CALL_RON, 4, 4)
+    assert game.players[1].has_won() and game.is_game_over()
+
+    game = make_game([[], YAKULESS_WAIT, [], []])
+    assert discard_from_dealer(game, 27) is None
+    assert not game.players[1].has_won()
+    assert game.discard_pile == [tile(27)]
+
+def test_furiten_blocks_ron():
+    game = make_game([[], TANYAO_WAIT, [], []])
+    game.players[1].discards.append(tile(4))
+    assert discard_from_dealer(game, 4) is None
+    assert not game.players[1].has_won()
+
+def test_human_declares_call_from_another_thread():
+    game = make_game([[], [], [4, 4, 30], []], human_seats=(2,))
+    results = []
+    worker = threading.Thread(target=lambda: results.append(discard_from_dealer(game, 4)))
+    worker.start()
+    deadline = time.monotonic() + 2.0
+    while 2 not in game.pending_calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [call.call_type for call in game.pending_calls[2]] == [CALL_PON]
+    assert game.declare_call(CALL_PON, seat=2)
+    worker.join(2.0)
+
+    assert results == [Call(2, CALL_PON, 4, 4)]
+    assert game.pending_calls == {}
+    assert game.players[2].hand == [tile(30)]
+    assert game.players[2].melds == [[tile(4)] * 3]
+    assert game.discard_pile == []
+    assert game.current_player_index == 2 and game.must_discard
+
+def test_silent_human_passes_after_timeout():
+    game = make_game([[], [], [4, 4, 30], []], human_seats=(2,))
+    game.arbiter.timeout = 0.05
+    assert discard_from_dealer(game, 4) is None
+    assert game.pending_calls == {}
+    assert not game.declare_call(CALL_PON, seat=2)
+    assert game.discard_pile == [tile(4)]
+
+class PonGame(Game):
+    def ai_call_decision(self, seat, calls):
+        return next((call for call in calls if call.call_type in (CALL_PON, CALL_RON)), None)
+
+def test_turn_passes_to_caller_without_draw():
+    hands = [[0, 1, 2, 9, 10, 11, 18, 19, 20, 27, 28, 29, 30],
+             [5, 6, 7, 8, 15, 16, 17, 24, 25, 26, 31, 32, 33],
+             [4, 4, 12, 13, 14, 21, 22, 23, 24, 25, 26, 32, 33],
+             [0, 3, 6, 9, 12, 15, 18, 21, 24, 27, 29, 31, 33]]
+    game = make_game(hands, game_class=PonGame)
+    game.wall.tiles = [tile(16), tile(4)]  # 親が5萬、その次に8筒を引く
+
+    game.play_game()
+
+    # 親の5萬を対面（席2）がポンし、ツモらずに中を切る。席1は飛ばされ、席3が8筒をツモ切る
+    assert game.players[2].melds == [[tile(4)] * 3]
+    assert game.players[2].discards == [tile(33)]
+    assert len(game.players[2].hand) == 10
+    assert game.players[1].discards == [] and len(game.players[1].hand) == 13
+    assert game.players[3].discards == [tile(16)]
+    assert game.discard_pile == [tile(33), tile(16)]
+    assert game.current_player_index == 0
+
+class KanGame(Game):
+    def ai_call_decision(self, seat, calls):
+        return next((call for call in calls if call.call_type == CALL_KAN), None)
+
+class RecordingAI:
+    def __init__(self):
+        self.tile_counts = []
+
+    def choose_discard_tile(self, hand, game):
+        player = game.players[game.current_player_index]
+        self.tile_counts.append(len(hand) + 3 * len(player.melds))
+        return hand[-1]
+
+def test_kan_caller_draws_replacement_before_discard():
+    hands = [[0, 1, 2, 9, 10, 11, 18, 19, 20, 27, 28, 29, 30],
+             [5, 6, 7, 8, 15, 16, 17, 24, 25, 26, 31, 32, 33],
+             [4, 4, 4, 12, 13, 14, 21, 22, 23, 24, 25, 26, 33],
+             [0, 3, 6, 9, 12, 15, 18, 21, 24, 27, 29, 31, 32]]
+    game = make_game(hands, game_class=KanGame)
+    game.players[2].ai = RecordingAI()
+    game.wall.tiles = [tile(16), tile(4)]  # 親が5萬を引き、8筒が嶺上牌になる
+
+    game.play_game()
+
+    assert game.players[2].melds == [[tile(4)] * 4]
+    assert game.players[2].ai.tile_counts == [14]
+    assert game.players[2].discards == [tile(16)]
+    assert len(game.players[2].hand) + 3 * len(game.players[2].melds) == 13
+    assert game.players[1].discards == []
@@ -0,0 +1,117 @@
+# test_marjong_ai.py
+
+import functools
+import os
+import shutil
+import numpy as np
+import optuna
+import pytest
+import torch
+from checkpoint import CheckpointManager
+from dataset import ChunkedDatasetWriter
+from encoder import NUM_PLANES, SAMPLE_COLUMNS
+from game_record import EVENT_DISCARD, EVENT_DRAW, EVENT_DTYPE
+from marjong_ai import AIPlayer, iter_game_data, load_game_data, objective
+from tiles import NUM_TILE_TYPES
+from tournament import heuristic_agent
+
+SMALL_MODEL = {'nhead': 2, 'num_layers': 1, 'dim_feedforward': 32, 'head_dim': 4,
+               'learning_rate': 1e-2, 'weight_decay': 0.0}
+
+def write_records(path):
+    with ChunkedDatasetWriter(path, chunk_rows=4) as writer:
+        for game in range(3):
+            events = np.zeros(6, dtype=EVENT_DTYPE)
+            events['kind'] = [EVENT_DRAW, EVENT_DISCARD] * 3
+            events['seat'] = [0, 0, 1, 1, 2, 2]
+            events['tile'] = np.arange(6) + game
+            writer.append_game(**{name: events[name] for name in EVENT_DTYPE.names})
+
+def test_game_data_is_streamed_in_batches(tmp_path):
+    path = str(tmp_path / "records.h5")
+    write_records(path)
+    batches = list(iter_game_data(path, batch_size=4))
+    assert len(batches) == 5
+    assert sum(len(data['Player 1']['actions']) for data in batches if 'Player 1' in data) == 6
+    with pytest.warns(DeprecationWarning):
+        data = load_game_data(path)
+    assert sorted(data) == ['Player 1', 'Player 2', 'Player 3']
+    assert list(data['Player 2']['discarded_tiles']) == [3, 4, 5]
+
+def write_samples(path, rows=8, chunk_rows=8192):
+    rng = np.random.default_rng(0)
+    policy = rng.random((rows, NUM_TILE_TYPES)).astype(np.float32)
+    with ChunkedDatasetWriter(path, SAMPLE_COLUMNS, chunk_rows=chunk_rows) as writer:
+        writer.append_game(obs=rng.integers(0, 2, (rows, NUM_PLANES, NUM_TILE_TYPES), dtype=np.uint8),
+                           policy=policy / policy.sum(axis=1, keepdims=True),
+                           value=rng.uniform(-1, 1, rows).astype(np.float32),
+                           action=rng.integers(0, NUM_TILE_TYPES, rows).astype(np.int16))
+
+def test_ai_player_trains_from_store(tmp_path):
+    path = str(tmp_path / "samples.h5")
+    write_samples(path)
+    player = AIPlayer("AI", SMALL_MODEL)
+    before = [p.detach().clone() for p in player.model.parameters()]
+    history = player.train_from_store(path, epochs=1, batch_size=8, num_workers=0)
+    assert len(history) == 1
+    assert history[0].steps == 1 and history[0].samples == 8
+    assert any(not torch.equal(a, b) for a, b in zip(before, player.model.parameters()))
+
+def test_training_resumes_exactly_from_a_mid_epoch_checkpoint(tmp_path):
+    path = str(tmp_path / "samples.h5")
+    write_samples(path, rows=40, chunk_rows=8)
+    full = CheckpointManager(str(tmp_path / "full"), keep_last=100)
+    torch.manual_seed(0)
+    player = AIPlayer("AI", SMALL_MODEL)
+    player.train_from_store(path, epochs=2, batch_size=4, num_workers=0, checkpoints=full, augment=True,
+                            checkpoint_every=3)
+    expected = [p.detach().clone() for p in player.model.parameters()]
+    names = [os.path.basename(p) for p in full.checkpoints()]
+    assert names[:3] == ['checkpoint-00000003.pt', 'checkpoint-00000006.pt', 'checkpoint-00000009.pt']
+
+    # 2エポック目の途中（更新13回目）で落ちたことにして、そのチェックポイントだけから再開する
+    resumed = CheckpointManager(str(tmp_path / "resumed"))
+    shutil.copy(os.path.join(full.directory, 'checkpoint-00000012.pt'), resumed.directory)
+    player = AIPlayer("AI", SMALL_MODEL)
+    history = player.train_from_store(path, epochs=2, batch_size=4, num_workers=0, checkpoints=resumed,
+                                      augment=True, checkpoint_every=3)
+    assert [stats.steps for stats in history] == [8]
+    assert all(torch.equal(a, b) for a, b in zip(expected, player.model.parameters()))
+
+def test_ai_player_selects_legal_action():
+    player = AIPlayer("AI", SMALL_MODEL)
+    legal = np.zeros(NUM_TILE_TYPES)
+    legal[[3, 30]] = 1
+    state = np.zeros((NUM_PLANES, NUM_TILE_TYPES), dtype=np.uint8)
+    assert all(player.select_action(state, legal) in (3, 30) for _ in range(10))
+
+class AlwaysPrune(optuna.pruners.BasePruner):
+    def prune(self, study, trial) -> bool:
+        return True
+
+def run_objective(pruner):
+    models = []
+
+    def stub_agent(model):
+        models.append(model)
+        return heuristic_agent()
+
+    study = optuna.create_study(direction='maximize', pruner=pruner)
+    study.enqueue_trial({'nhead': 4, 'num_layers': 2, 'dim_feedforward': 512,
+                         'learning_rate': 1e-4, 'weight_decay': 1e-4})
+    study.optimize(functools.partial(objective, agent_factory=stub_agent, num_blocks=2), n_trials=1)
+    return study.trials[0], models
+
+def test_objective_reports_tournament_score():
+    trial, models = run_objective(optuna.pruners.NopPruner())
+    assert trial.state == optuna.trial.TrialState.COMPLETE
+    assert sorted(trial.intermediate_values) == [0, 1]
+    assert trial.value == trial.intermediate_values[1]
+    assert len(models) == 8  # 2ブロック x 4席の回転
+    assert all(not model.training for model in models)
+
+def test_objective_is_pruned_after_first_block():
+    trial, models = run_objective(AlwaysPrune())
+    assert trial.state == optuna.trial.TrialState.PRUNED
+    assert sorted(trial.intermediate_values) == [0]
+    assert len(models) == 4
@@ -0,0 +1,55 @@
+# test_marjong_gui.py
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+import time
+from PyQt5.QtWidgets import QApplication
+from marjong import HONORS, Tile, hand_counts
+
+_SUITS = ['萬', '筒', '索']
+
+def tile(index):
+    if index >= 27:
+        return Tile(None, HONORS[index - 27])
+    return Tile(_SUITS[index // 9], index % 9 + 1)
+
+def wait_until(app, condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+def test_pon_button_follows_the_running_game():
+    app = QApplication.instance() or QApplication([])
+    from marjong_gui import MahjongGUI
+    gui = MahjongGUI(autostart=False)
+    game = gui.game
+    hands = [[4, 4, 12, 13, 14, 21, 22, 23, 24, 25, 26, 32, 33],
+             [0, 1, 2, 9, 10, 11, 18, 19, 20, 27, 28, 29, 30],
+             [5, 6, 7, 8, 15, 16, 17, 24, 25, 26, 31, 32, 33],
+             [0, 3, 6, 9, 12, 15, 18, 21, 24, 27, 29, 31, 33]]
+    for seat, player in enumerate(game.players):
+        player.hand = [tile(index) for index in hands[seat]]
+        game.arbiter.update_hand(seat, hand_counts(player.hand))
+    game.deal_initial_hands = lambda: None
+    game.wall.tiles = [tile(16), tile(4)]  # 北家が5萬、南家が8筒をツモ切って山が尽きる
+    game.current_player_index = 3
+    game.arbiter.timeout = 10.0
+    assert not gui.pon_button.isEnabled()
+
+    gui.start_game()
+    assert wait_until(app, gui.pon_button.isEnabled)
+    assert gui.call_timer.isActive() and not gui.kan_button.isEnabled()
+
+    gui.pon_button.click()
+    assert wait_until(app, lambda: game.players[0].melds and not gui.pon_button.isEnabled())
+    assert not gui.call_timer.isActive()
+
+    # ポンした後はツモらずに、手牌のボタンで打牌する
+    next(button for button in gui.hand_pools[0].buttons if button.text() == str(tile(33))).click()
+    game_thread = gui.game_thread
+    game_thread.join(3.0)
+    assert not game_thread.is_alive()
+    assert game.players[0].discards == [tile(33)]
+    assert game.discard_pile == [tile(33), tile(16)]
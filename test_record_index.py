@@ -0,0 +1,64 @@
+# test_record_index.py
+
+import pytest
+from game_record import (GameRecordWriter, pack_extra, END_EXHAUSTED, END_WIN, EVENT_DEAL, EVENT_DISCARD,
+                         EVENT_DRAW, EVENT_GAME_END, EVENT_GAME_START, EVENT_RIICHI, EVENT_WIN)
+from hand_analysis import WAIT_KANCHAN, WAIT_RYANMEN, shanten
+from record_index import OUTCOME_EXHAUSTED, OUTCOME_RON, OUTCOME_TSUMO, RecordIndex, build_index
+
+# 1-9萬 + 2筒4筒 + 東東（3筒の嵌張待ち）
+ITTSU_HAND = [0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 12, 27, 27]
+# 123索 456索 11筒 79筒 2萬 5萬 8萬（2向聴）
+SLOW_HAND = [18, 19, 20, 21, 22, 23, 9, 9, 15, 17, 1, 4, 7]
+# 234萬 567萬 234筒 55索 67索（5索8索の両面待ち）
+PINFU_HAND = [1, 2, 3, 4, 5, 6, 10, 11, 12, 22, 22, 23, 24]
+
+def write_games(path):
+    with GameRecordWriter(path) as writer:
+        writer.record(EVENT_GAME_START, 0, 0, 4)
+        for tile in ITTSU_HAND:
+            writer.record(EVENT_DEAL, 1, tile)
+        for tile in SLOW_HAND:
+            writer.record(EVENT_DEAL, 2, tile)
+        writer.record(EVENT_RIICHI, 1)
+        writer.record(EVENT_DRAW, 2, 11)
+        writer.record(EVENT_DISCARD, 2, 11)
+        writer.record(EVENT_WIN, 1, 11, 2, pack_extra(40, 2))
+        writer.record(EVENT_GAME_END, 1, arg=END_WIN)
+
+        writer.record(EVENT_GAME_START, 0, 0, 4)
+        for tile in PINFU_HAND:
+            writer.record(EVENT_DEAL, 0, tile)
+        writer.record(EVENT_DRAW, 0, 25)
+        writer.record(EVENT_WIN, 0, 25, 3, pack_extra(20, 0))
+        writer.record(EVENT_GAME_END, 0, arg=END_WIN)
+
+        writer.record(EVENT_GAME_START, 1, 0, 4)
+        writer.record(EVENT_GAME_END, arg=END_EXHAUSTED)
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "games.mjr")
+    write_games(path)
+    return build_index([path])
+
+def test_queries(index):
+    counts = [0] * 34
+    for tile in SLOW_HAND:
+        counts[tile] += 1
+    assert shanten(counts) == 2
+    assert list(index.query(yaku=['一気通貫'], wait=WAIT_KANCHAN)) == [0]
+    assert list(index.query(outcome=OUTCOME_RON, winner_riichi=True, shanten=2)) == [0]
+    assert list(index.query(yaku=['断么九', '平和', '門前清自摸和'], wait=WAIT_RYANMEN)) == [1]
+    assert list(index.query(outcome=OUTCOME_TSUMO, han=(3, 5))) == [1]
+    assert list(index.query(outcome=OUTCOME_EXHAUSTED)) == [2]
+    assert list(index.query(yaku=['一気通貫'], winner_riichi=False)) == []
+
+def test_save_load_and_locate(index, tmp_path):
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = RecordIndex.load(path)
+    assert list(loaded.query(fu=(30, 50))) == [0]
+    record_path, span = loaded.locate(1)
+    assert record_path == index.files[0] and span.stop - span.start == 17
+    assert '平和' in loaded.describe(1)
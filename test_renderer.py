@@ -0,0 +1,27 @@
+# test_renderer.py
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+from game import MahjongGame
+from renderer import TableRenderer
+
+def test_only_changed_regions_are_redrawn():
+    pygame.init()
+    window = pygame.Surface((1200, 800))
+    font = pygame.font.Font(None, 24)
+    game = MahjongGame(human_seats=(), load_images=False, verbose=False)
+    renderer = TableRenderer(window, font)
+    assert renderer.render(game.players) == [window.get_rect()]
+    assert renderer.render(game.players) == []  # 変化がなければ何も描かない
+
+    game.play_ai_turn(game.players[game.current_player_index])
+    dirty = renderer.render(game.players)
+    assert dirty and all(rect.width < 1200 for rect in dirty)
+
+    # 差分描画の結果は全体を描き直した結果と一致する
+    expected = pygame.Surface((1200, 800))
+    expected.fill((0, 128, 0))
+    game.draw_game_state(expected, font)
+    assert pygame.image.tobytes(window, 'RGB') == pygame.image.tobytes(expected, 'RGB')
+    pygame.quit()
@@ -0,0 +1,40 @@
+# test_replay_buffer.py
+
+import numpy as np
+import torch
+from dqn import DQNTrainer, transitions_from_events
+from encoder import OBS_SIZE
+from game_record import EVENT_DTYPE, EVENT_GAME_START, EVENT_DEAL, EVENT_DISCARD, EVENT_GAME_END
+from models import QNetwork
+from replay_buffer import PrioritizedReplayBuffer, SumTree
+
+def test_sum_tree_sampling():
+    tree = SumTree(5)
+    tree.update(np.arange(5), np.array([1.0, 0.0, 3.0, 0.0, 4.0]))
+    assert tree.total == 8.0
+    assert tree.find(np.array([0.5, 1.5, 3.9, 4.1, 7.9])).tolist() == [0, 2, 2, 4, 4]
+    tree.update(np.array([2]), np.array([0.0]))
+    assert tree.total == 5.0
+
+def test_ring_buffer_and_dqn_step():
+    events = np.zeros(7, dtype=EVENT_DTYPE)
+    events['kind'] = [EVENT_GAME_START, EVENT_DEAL, EVENT_DEAL, EVENT_DISCARD, EVENT_DISCARD, EVENT_DISCARD,
+                      EVENT_GAME_END]
+    events['seat'] = [0, 0, 1, 0, 1, 0, 0]
+    events['tile'] = [0, 3, 4, 3, 4, 5, 0]
+    transitions = transitions_from_events(events)
+    assert transitions['next_index'].tolist() == [2, 1, 2]
+    assert transitions['dones'].tolist() == [False, True, True]
+
+    buffer = PrioritizedReplayBuffer(4, seed=0)
+    buffer.add_batch(**transitions)
+    slots = buffer.add_batch(**transitions)
+    assert len(buffer) == 4 and slots.tolist() == [3, 0, 1]
+    assert buffer.next_index[3] == 1  # リングの末尾から先頭へ続く
+
+    model = QNetwork(OBS_SIZE, 34)
+    trainer = DQNTrainer(model, torch.optim.Adam(model.parameters()), buffer, target_update=2)
+    before = buffer.tree.total
+    trainer.fit(2, batch_size=4)
+    assert trainer.steps == 2
+    assert buffer.tree.total != before
@@ -0,0 +1,49 @@
+# test_replay_viewer.py
+
+import os
+import numpy as np
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+from game import MahjongGame
+from game_record import GameRecordWriter, read_events, replay, split_games
+from replay_viewer import KeyframeIndex, ReplayViewer
+
+def record_games(path, num_games=3):
+    with GameRecordWriter(path) as writer:
+        for _ in range(num_games):
+            MahjongGame(recorder=writer, human_seats=(), load_images=False, verbose=False).play_headless()
+
+def test_keyframe_seek_matches_full_replay(tmp_path):
+    path = str(tmp_path / "session.mjr")
+    record_games(path)
+    events = read_events(path)
+    index = KeyframeIndex(events, interval=7)
+    assert index.num_games == 3
+    for game, span in enumerate(split_games(events)):
+        for position in (0, 1, 6, 7, 8, 50, index.game_length(game)):
+            expected = replay(events[span], upto=position)
+            state = index.state_at(game, position)
+            assert np.array_equal(state.hands, expected.hands)
+            assert [list(r) for r in state.rivers] == [list(r) for r in expected.rivers]
+            assert (state.turn, state.winner, state.game_over) == (expected.turn, expected.winner, expected.game_over)
+    # キーフレームから復元しても索引の局面は書き換わらない
+    assert index.keyframes[0][1].turn == replay(events[split_games(events)[0]], upto=7).turn
+
+def test_viewer_keys(tmp_path):
+    path = str(tmp_path / "session.mjr")
+    record_games(path, num_games=2)
+    pygame.init()
+    try:
+        window = pygame.display.set_mode((1200, 800))
+        viewer = ReplayViewer(path, window, pygame.font.Font(None, 24), load_images=False)
+        viewer.handle_key(pygame.K_END)
+        assert viewer.position == viewer.index.game_length(0)
+        viewer.seek_turn(5)
+        assert viewer.state.turn == 5
+        assert len(viewer.players[viewer.state.turn % 4].hand) > 0
+        viewer.handle_key(pygame.K_PAGEDOWN)
+        assert (viewer.game, viewer.position) == (1, 0)
+        viewer.present()
+        assert not viewer.handle_key(pygame.K_ESCAPE)
+    finally:
+        pygame.quit()
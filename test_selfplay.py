@@ -0,0 +1,38 @@
+# test_selfplay.py
+
+import numpy as np
+from checkpoint import export_weights
+from dataset import ChunkedDatasetReader
+from game import MahjongGame
+from game_record import EVENT_DISCARD, EVENT_GAME_END, MemoryRecorder, read_events
+from log_import import validate_game
+from models import PolicyValueNet
+from policy_agent import PolicyAgent
+from selfplay import SelfPlayOrchestrator
+
+MODEL_PARAMS = {'nhead': 2, 'num_layers': 1, 'dim_feedforward': 32, 'head_dim': 4}
+
+def test_bound_policy_agents_discard_from_their_hands():
+    model = PolicyValueNet.from_params(MODEL_PARAMS).eval()
+    recorder = MemoryRecorder()
+    agents = [PolicyAgent(model, seed=seat) for seat in range(4)]
+    game = MahjongGame(4, recorder=recorder, human_seats=(), agents=agents, load_images=False, verbose=False)
+    assert [(agent.game, agent.seat) for agent in agents] == [(game, seat) for seat in range(4)]
+    game.play_headless()
+    events = recorder.events()
+    assert (events['kind'] == EVENT_DISCARD).sum() > 0
+    assert validate_game(events) is None  # 手牌にない牌は切っていない
+
+def test_orchestrator_writes_records_and_samples(tmp_path):
+    weights = str(tmp_path / "weights.pt")
+    store = str(tmp_path / "samples.h5")
+    record = str(tmp_path / "selfplay.rec")
+    export_weights(PolicyValueNet.from_params(MODEL_PARAMS), weights, version=1)
+    with SelfPlayOrchestrator(weights, store, MODEL_PARAMS, num_workers=1, record_path=record) as orchestrator:
+        orchestrator.start(games_per_worker=2)
+        assert orchestrator.collect(2, timeout=120) == 2
+    assert orchestrator.stats[0].games == 2 and orchestrator.stats[0].version == 1
+    assert int((read_events(record)['kind'] == EVENT_GAME_END).sum()) == 2
+    with ChunkedDatasetReader(store) as reader:
+        assert reader.num_games == 2 and len(reader) > 0
+        assert np.all(reader.read(0, len(reader), ['action'])['action'] >= 0)
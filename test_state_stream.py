@@ -0,0 +1,110 @@
+# test_state_stream.py
+
+import asyncio
+import numpy as np
+from game_record import (MemoryRecorder, replay, pack_extra, CALL_PON, EVENT_CALL, EVENT_DEAL, EVENT_DISCARD,
+                         EVENT_DORA, EVENT_DRAW, EVENT_GAME_END, EVENT_GAME_START, EVENT_RIICHI, EVENT_WIN,
+                         unpack_event)
+from state_stream import HIDDEN_TILE, StateMirror, StatePublisher
+from table_server import TableClient, TableServer
+
+def play_events(recorders):
+    events = [(EVENT_GAME_START, 0, 0, 4), (EVENT_DORA, 0, 3)]
+    for seat in range(4):
+        events += [(EVENT_DEAL, seat, (seat * 7 + i) % 34) for i in range(13)]
+    for turn in range(40):
+        seat = turn % 4
+        events += [(EVENT_DRAW, seat, (turn * 5) % 34), (EVENT_DISCARD, seat, (turn * 5) % 34)]
+    events += [(EVENT_DRAW, 1, 9), (EVENT_DRAW, 1, 9), (EVENT_DISCARD, 0, 9),
+               (EVENT_CALL, 1, 9, CALL_PON, pack_extra(9, 0)), (EVENT_RIICHI, 2),
+               (EVENT_WIN, 2, 0, 3, pack_extra(30, 1)), (EVENT_GAME_END, 0, 0, 1)]
+    for event in events:
+        for recorder in recorders:
+            recorder.record(*event)
+
+def assert_same_state(a, b):
+    assert np.array_equal(a.hands, b.hands) and np.array_equal(a.melds, b.melds)
+    assert [list(r) for r in a.rivers] == [list(r) for r in b.rivers]
+    assert (a.dora_indicators, a.riichi, a.turn, a.winner, a.game_over) == \
+        (b.dora_indicators, b.riichi, b.turn, b.winner, b.game_over)
+    assert (a.num_players, a.dealer, a.round_wind) == (b.num_players, b.dealer, b.round_wind)
+
+def test_mirror_and_late_joiner_match_replay():
+    memory = MemoryRecorder()
+    publisher = StatePublisher(keyframe_interval=16)
+    early = StateMirror()
+    sent = []
+    for message in publisher.subscribe(sent.append):
+        early.apply(message)
+
+    class LateJoin:
+        count = 0
+        def record(self, *event):
+            self.count += 1
+            if self.count == 100:
+                self.received = publisher.subscribe(lambda message: self.received.append(message))
+
+    late = LateJoin()
+    play_events([memory, publisher, late])
+    for message in sent:
+        early.apply(message)
+    late_mirror = StateMirror()
+    assert late.received[0][0] == 2  # 途中参加はキーフレームから始まる
+    for message in late.received:
+        late_mirror.apply(message)
+    expected = replay(memory.events())
+    assert_same_state(early.state, expected)
+    assert_same_state(late_mirror.state, expected)
+    assert late_mirror.seq == early.seq == publisher.seq
+
+def test_gap_waits_for_keyframe():
+    publisher = StatePublisher(keyframe_interval=8)
+    sent = []
+    publisher.subscribe(sent.append)
+    play_events([publisher])
+    deltas = [m for m in sent if m[0] == 1]
+    mirror = StateMirror()
+    assert not mirror.apply(deltas[0])  # キーフレームなしでは適用できない
+    keyframes = [i for i, m in enumerate(sent) if m[0] == 2]
+    assert mirror.apply(sent[keyframes[0]])
+    assert mirror.apply(sent[keyframes[0] + 1])
+    assert not mirror.apply(sent[keyframes[0] + 3])  # 1件抜けた
+    assert mirror.needs_keyframe
+    assert mirror.apply(sent[keyframes[1]])
+    assert not mirror.needs_keyframe
+
+def test_spectator_follows_table():
+    async def scenario():
+        async with TableServer(humans_per_table=1, action_timeout=0.02) as server:
+            player = asyncio.ensure_future(TableClient(choose=lambda counts: None).play('127.0.0.1', server.port))
+            while 1 not in server.rooms:
+                await asyncio.sleep(0.01)
+            spectator = TableClient()
+            mirror = await spectator.spectate('127.0.0.1', server.port, 1)
+            return await player, spectator, mirror
+
+    player, spectator, mirror = asyncio.run(asyncio.wait_for(scenario(), 60))
+    assert spectator.finished and spectator.winner == player.winner
+    assert mirror.state.game_over and not mirror.needs_keyframe
+    own_discards = [event[2] for event in player.events if event[0] == EVENT_DISCARD and event[1] == player.seat]
+    assert list(mirror.state.rivers[player.seat]) == own_discards
+    # 人間の席がある卓の観戦では、誰の手牌も見えない
+    assert not mirror.state.hands.any()
+
+def test_concealed_stream_hides_dealt_and_drawn_tiles():
+    memory = MemoryRecorder()
+    publisher = StatePublisher(keyframe_interval=16, conceal=True)
+    sent = []
+    mirror = StateMirror()
+    for message in publisher.subscribe(sent.append):
+        mirror.apply(message)
+    play_events([memory, publisher])
+    deltas = [unpack_event(message[5:]) for message in sent if message[0] == 1]
+    assert all(tile == HIDDEN_TILE for kind, _, tile, *_ in deltas if kind in (EVENT_DEAL, EVENT_DRAW))
+    for message in sent:
+        mirror.apply(message)
+    expected = replay(memory.events())
+    assert not mirror.state.hands.any() and not publisher.state.hands.any()
+    assert np.array_equal(mirror.state.melds, expected.melds)
+    assert [list(r) for r in mirror.state.rivers] == [list(r) for r in expected.rivers]
+    assert (mirror.state.turn, mirror.state.winner) == (expected.turn, expected.winner)
@@ -0,0 +1,19 @@
+# test_surface_cache.py
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+from surface_cache import SurfaceCache
+
+def test_cache_hits_and_eviction():
+    pygame.init()
+    font = pygame.font.Font(None, 24)
+    cache = SurfaceCache(max_entries=2)
+    first = cache.tile_face(font, '1m', (50, 70))
+    assert cache.tile_face(font, '1m', (50, 70)) is first
+    assert first.get_at((0, 0))[:3] == (255, 255, 255)
+    cache.text(font, 'East', (255, 255, 255))
+    cache.text(font, 'South', (255, 255, 255))
+    assert len(cache) == 2 and (cache.hits, cache.misses) == (1, 3)
+    assert cache.tile_face(font, '1m', (50, 70)) is not first  # 最も古いものから捨てられている
+    pygame.quit()
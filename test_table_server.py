@@ -0,0 +1,63 @@
+# test_table_server.py
+
+import asyncio
+from game_record import EVENT_DEAL, EVENT_DISCARD, EVENT_GAME_START
+from table_server import HIDDEN_TILE, MSG_DISCARD, Connection, TableClient, TableServer, encode_frame
+
+def test_tables_play_to_the_end_over_loopback():
+    async def scenario():
+        async with TableServer(humans_per_table=2, action_timeout=5.0) as server:
+            clients = await asyncio.gather(*(TableClient().play('127.0.0.1', server.port) for _ in range(6)))
+            return clients, len(server.results)
+
+    clients, finished_tables = asyncio.run(asyncio.wait_for(scenario(), 60))
+    assert finished_tables == 3
+    assert sorted((client.table_id, client.seat) for client in clients) == [(t, s) for t in (1, 2, 3) for s in (0, 1)]
+    for client in clients:
+        assert client.finished and client.turns > 0
+        assert client.events[0][0] == EVENT_GAME_START
+        deals = [event for event in client.events if event[0] == EVENT_DEAL]
+        # 自分の配牌だけが見え、他家の配牌は伏せられている
+        assert all((tile == HIDDEN_TILE) == (seat != client.seat) for _, seat, tile, *_ in deals)
+        own_discards = [event for event in client.events if event[0] == EVENT_DISCARD and event[1] == client.seat]
+        assert len(own_discards) == client.turns
+
+def test_silent_client_is_played_by_timeout():
+    async def scenario():
+        async with TableServer(humans_per_table=1, action_timeout=0.005) as server:
+            return await TableClient(choose=lambda counts: None).play('127.0.0.1', server.port)
+
+    client = asyncio.run(asyncio.wait_for(scenario(), 60))
+    assert client.finished and client.turns > 0
+    assert sum(1 for event in client.events if event[0] == EVENT_DISCARD and event[1] == client.seat) == client.turns
+
+def test_discard_flood_is_dropped_outside_the_turn():
+    async def scenario():
+        accepted = asyncio.get_running_loop().create_future()
+
+        async def handle(reader, writer):
+            connection = Connection(reader, writer)
+            accepted.set_result(connection)
+            await connection.read_loop()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+        connection = await accepted
+        writer.write(encode_frame(MSG_DISCARD, bytes([3])) * 1000)  # 手番外の連打
+        await writer.drain()
+        await asyncio.sleep(0.1)
+        outside_turn = connection.actions.qsize()
+        connection.awaiting_action = True
+        writer.write(encode_frame(MSG_DISCARD, bytes([5])) + encode_frame(MSG_DISCARD, bytes([7])))
+        await writer.drain()
+        await asyncio.sleep(0.1)
+        during_turn = [connection.actions.get_nowait() for _ in range(connection.actions.qsize())]
+        writer.close()
+        connection.close()
+        server.close()
+        await server.wait_closed()
+        return outside_turn, during_turn
+
+    outside_turn, during_turn = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert outside_turn == 0
+    assert during_turn == [5]  # 受け付けるのは手番ごとに1つだけ
@@ -0,0 +1,22 @@
+# test_tile_widgets.py
+
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtWidgets import QApplication, QGridLayout, QWidget
+from tile_widgets import TileWidgetPool
+
+def test_pool_reuses_buttons_and_updates_only_changed_slots():
+    app = QApplication.instance() or QApplication([])
+    parent = QWidget()
+    layout = QGridLayout(parent)
+    clicked = []
+    pool = TileWidgetPool(layout, columns=3, on_click=clicked.append)
+    assert pool.update(['1m', '2m', '3m', '4m']) == 4
+    buttons = list(pool.buttons)
+    assert pool.update(['1m', '2m', '3m', '4m']) == 0
+    assert pool.update(['1m', '9p', '3m']) == 2  # 書き換え1つ・非表示1つ
+    assert pool.buttons == buttons and buttons[3].isHidden()
+    assert pool.update(['1m', '9p', '3m', 'E']) == 2  # 隠したボタンを再利用
+    assert pool.buttons == buttons and layout.itemAtPosition(1, 0).widget() is buttons[3]
+    buttons[1].click()
+    assert clicked == ['9p']
@@ -0,0 +1,38 @@
+# test_tournament.py
+
+import numpy as np
+from game_record import EVENT_DTYPE, EVENT_GAME_START, EVENT_WIN, pack_extra
+from tournament import AgentSpec, Tournament, play_match, score_events
+
+def test_score_events():
+    events = np.zeros(2, dtype=EVENT_DTYPE)
+    events['kind'] = [EVENT_GAME_START, EVENT_WIN]
+    events['seat'] = [0, 2]
+    events['arg'] = [4, 3]
+    events['extra'][1] = pack_extra(30, 1)  # 3翻30符を席1から
+    result = score_events(events)
+    assert result.points == [0, -3900, 3900, 0]
+    assert result.placements == [2.5, 4.0, 1.0, 2.5]
+    assert result.winner == 2 and result.dealt_in == 1
+
+def test_tournament_rotates_seats():
+    lineup = [AgentSpec("A"), AgentSpec("B")]
+    blocks = []
+    stats = Tournament(lineup, seed=3, alpha=None).run(2, on_block=lambda t, i: blocks.append(i))
+    assert blocks == [0, 1]
+    assert stats["A"].games == stats["B"].games == 4
+    assert stats["A"].mean_placement + stats["B"].mean_placement == 3.0
+
+def test_real_games_populate_only_measurable_stats():
+    lineup = [AgentSpec(name) for name in "ABCD"]
+    result = play_match(lineup, seed=5)
+    assert sum(result.points) == 0 and len(result.placements) == 4
+    assert result.dealt_in is None  # エンジンにロンがないので、和了してもツモ
+
+    stats = Tournament(lineup, seed=5, alpha=None).run(1)
+    for agent in stats.values():
+        assert agent.games == len(agent.placements) == 4
+        assert 0.0 <= agent.win_rate <= 1.0
+        assert set(agent.confidence_intervals()) == {'win_rate', 'placement', 'points'}
+        assert agent.deal_in_rate is None and "放銃率 未計測" in agent.summary()
+    assert sum(agent.mean_placement for agent in stats.values()) == 10.0
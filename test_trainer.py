@@ -0,0 +1,22 @@
+# test_trainer.py
+
+import numpy as np
+import torch
+from encoder import NUM_PLANES
+from models import PolicyValueNet
+from tiles import NUM_TILE_TYPES
+from trainer import BatchTrainer, iterate_examples
+
+def examples(count):
+    rng = np.random.default_rng(1)
+    return [(rng.integers(0, 2, (NUM_PLANES, NUM_TILE_TYPES), dtype=np.uint8),
+             np.full(NUM_TILE_TYPES, 1 / NUM_TILE_TYPES), float(rng.uniform(-1, 1))) for _ in range(count)]
+
+def test_accumulated_steps_update_once_per_group():
+    model = PolicyValueNet(nhead=2, num_layers=1, dim_feedforward=32, head_dim=4)
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+    steps = []
+    optimizer.register_step_post_hook(lambda *args: steps.append(1))
+    stats = BatchTrainer(model, optimizer, accumulation_steps=2).fit(iterate_examples(examples(10), 4))
+    assert (stats.steps, stats.samples) == (3, 10)
+    assert len(steps) == 2  # 2バッチ分と、端数の1バッチ分
@@ -0,0 +1,55 @@
+# test_tuning.py
+
+import time
+import warnings
+import optuna
+import pytest
+from tuning import DEFAULT_STUDY, FINISHED_STATES, create_storage, run_study
+
+def quadratic(trial: optuna.Trial) -> float:
+    x = trial.suggest_float('x', -1.0, 1.0)
+    for step in range(3):
+        trial.report(-x * x - step, step)
+        if trial.should_prune():
+            raise optuna.TrialPruned()
+    return -x * x
+
+def finished(study):
+    return len(study.get_trials(states=FINISHED_STATES))
+
+def test_parallel_study_resumes_to_exact_trial_count(tmp_path):
+    storage = str(tmp_path / "study.db")
+    study = run_study(5, num_workers=2, storage_path=storage, objective_ref='test_tuning:quadratic', seed=0)
+    assert finished(study) == len(study.trials) == 5
+    # 同じストレージで再開すると、既存の5試行に足して合計8試行で止まる
+    study = run_study(8, num_workers=2, storage_path=storage, objective_ref='test_tuning:quadratic', seed=1)
+    assert finished(study) == len(study.trials) == 8
+    assert run_study(8, num_workers=2, storage_path=storage, objective_ref='test_tuning:quadratic').trials == \
+        study.trials
+
+def test_default_objective_completes_a_trial(tmp_path):
+    storage = str(tmp_path / "study.db")
+    study = optuna.create_study(study_name=DEFAULT_STUDY, storage=create_storage(storage), direction='maximize')
+    study.enqueue_trial({'nhead': 4, 'num_layers': 2, 'dim_feedforward': 512,
+                         'learning_rate': 1e-4, 'weight_decay': 1e-4})
+    study = run_study(1, storage_path=storage, pruner='none')
+    trial = study.trials[0]
+    assert trial.state == optuna.trial.TrialState.COMPLETE
+    assert 0.0 <= trial.value <= 1.0
+    assert len(trial.intermediate_values) == 10
+
+# 異常終了したワーカーの試行を Study.optimize の外で再現するため、その警告は無視する
+@pytest.mark.filterwarnings('ignore::optuna.exceptions.ExperimentalWarning')
+@pytest.mark.filterwarnings('ignore:Heartbeat of storage')
+def test_stale_trial_is_retried_without_deprecated_callbacks(tmp_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        storage = create_storage(str(tmp_path / "study.db"), heartbeat_interval=1)
+    study = optuna.create_study(study_name=DEFAULT_STUDY, storage=storage)
+    trial = study.ask({'x': optuna.distributions.FloatDistribution(-1.0, 1.0)})
+    storage.record_heartbeat(trial._trial_id)
+    time.sleep(3.2)  # grace_period（2秒）を過ぎる。SQLiteの時刻は秒単位で切り捨てられるため余裕を持たせる
+    optuna.storages.fail_stale_trials(study)
+    states = [t.state for t in study.trials]
+    assert states == [optuna.trial.TrialState.FAIL, optuna.trial.TrialState.WAITING]
+    assert study.trials[1].params == study.trials[0].params
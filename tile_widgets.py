@@ -0,0 +1,63 @@
+# tile_widgets.py
+
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QGridLayout, QLayout, QPushButton
+
+class TileWidgetPool:
+    """
+    牌ボタンを使い回すレイアウト管理。前回の牌の並びと比べて、変わった位置だけ文字やアイコンを差し替えます。
+    余ったボタンは破棄せず隠しておき、次に牌が増えたときに再利用します。
+    """
+
+    def __init__(self, layout: QLayout, size: Tuple[int, int] = (40, 60), columns: Optional[int] = None,
+                 icon_for: Optional[Callable[[Any], Optional[QIcon]]] = None,
+                 on_click: Optional[Callable[[Any], None]] = None):
+        self.layout = layout
+        self.size = size
+        self.columns = columns  # QGridLayoutの場合の1行あたりの枚数
+        self.icon_for = icon_for
+        self.on_click = on_click
+        self.buttons: List[QPushButton] = []
+        self._labels: List[Optional[str]] = []
+        self._tiles: List[Any] = []
+
+    def _create_button(self, index: int) -> QPushButton:
+        button = QPushButton()
+        button.setFixedSize(*self.size)
+        button.clicked.connect(lambda _checked=False, index=index: self._clicked(index))
+        if isinstance(self.layout, QGridLayout) and self.columns:
+            self.layout.addWidget(button, index // self.columns, index % self.columns)
+        else:
+            self.layout.addWidget(button)
+        self.buttons.append(button)
+        self._labels.append(None)
+        return button
+
+    def _clicked(self, index: int) -> None:
+        if self.on_click is not None and index < len(self._tiles):
+            self.on_click(self._tiles[index])
+
+    def update(self, tiles: Sequence[Any]) -> int:
+        """
+        表示を牌の並びに合わせ、実際に書き換えたボタンの数を返します。
+        """
+        self._tiles = list(tiles)
+        changed = 0
+        for index, tile in enumerate(self._tiles):
+            button = self.buttons[index] if index < len(self.buttons) else self._create_button(index)
+            label = str(tile)
+            if self._labels[index] != label:
+                button.setText(label)
+                if self.icon_for is not None:
+                    button.setIcon(self.icon_for(tile) or QIcon())
+                self._labels[index] = label
+                changed += 1
+            if button.isHidden():
+                button.show()
+                changed += 1
+        for index in range(len(self._tiles), len(self.buttons)):
+            if not self.buttons[index].isHidden():
+                self.buttons[index].hide()
+                changed += 1
+        return changed
@@ -1,7 +1,7 @@
 # tiles.py
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Optional, List
+from typing import Optional, List, Union
 import pygame
 import os
 
@@ -91,3 +91,16 @@ def create_tiles() -> List[Tile]:
             tiles.append(Tile(name=honor))
     
     return tiles
+
+# 牌種の一覧（萬子・筒子・索子・字牌の順で34種）。記録・学習データ共通のインデックス
+TILE_NAMES: List[str] = [f"{number}{suit}" for suit in ['m', 'p', 's'] for number in range(1, 10)] + \
+    ['E', 'S', 'W', 'N', 'P', 'F', 'C']
+TILE_INDEX = {name: index for index, name in enumerate(TILE_NAMES)}
+NUM_TILE_TYPES = len(TILE_NAMES)
+
+def tile_to_index(tile: Union[Tile, str]) -> int:
+    """
+    牌（または牌名）を0〜33の牌種インデックスに変換します。
+    """
+    name = tile if isinstance(tile, str) else tile.name
+    return TILE_INDEX[name]
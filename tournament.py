@@ -0,0 +1,312 @@
+# tournament.py
+
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+import argparse
+import importlib
+import math
+import multiprocessing as mp
+import random
+import numpy as np
+from ai_agent import AIAgent
+from game import MahjongGame
+from game_record import EVENT_GAME_START, EVENT_WIN, MemoryRecorder, unpack_extra
+from yaku_evaluator import YakuEvaluator
+
+@dataclass
+class AgentSpec:
+    """
+    対局者の作り方。factoryは 'モジュール:関数' 形式の参照か呼び出し可能オブジェクトで、
+    kwargsを受け取ってAIAgentを返します（別プロセスで使う場合は参照文字列にしてください）。
+    """
+    name: str
+    factory: Union[str, Callable[..., AIAgent]] = 'tournament:heuristic_agent'
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+    def build(self) -> AIAgent:
+        factory = self.factory
+        if isinstance(factory, str):
+            module_name, function_name = factory.split(':')
+            factory = getattr(importlib.import_module(module_name), function_name)
+        return factory(**self.kwargs)
+
+def heuristic_agent() -> AIAgent:
+    return AIAgent(YakuEvaluator(is_dealer=False, verbose=False))
+
+def policy_agent(weights: str, model_params: Optional[Dict[str, Any]] = None, temperature: float = 0.0,
+                 seed: Optional[int] = None) -> AIAgent:
+    """
+    checkpoint.export_weights 形式の重みから PolicyAgent を作ります。
+    """
+    from checkpoint import load_weights
+    from models import PolicyValueNet
+    from policy_agent import PolicyAgent
+    model = PolicyValueNet.from_params(model_params or {})
+    model.load_state_dict(load_weights(weights)['state_dict'])
+    return PolicyAgent(model.eval(), temperature=temperature, seed=seed)
+
+def hand_points(han: int, fu: int) -> int:
+    """
+    翻数と符数から基本点を求めます（満貫以上は切り上げ）。
+    """
+    if han >= 13:
+        return 8000
+    if han >= 11:
+        return 6000
+    if han >= 8:
+        return 4000
+    if han >= 6:
+        return 3000
+    return min(fu * 2 ** (han + 2), 2000)
+
+def _round_up(points: float) -> int:
+    return int(math.ceil(points / 100) * 100)
+
+@dataclass
+class GameResult:
+    """
+    1局の席ごとの結果。
+    """
+    points: List[int]
+    placements: List[float]
+    winner: Optional[int] = None
+    dealt_in: Optional[int] = None
+
+def score_events(events: np.ndarray) -> GameResult:
+    """
+    1局分のイベント列から各席の収支・順位・和了・放銃を求めます。
+    """
+    events = np.asarray(events)
+    start = events[events['kind'] == EVENT_GAME_START][0]
+    num_players, dealer = int(start['arg']), int(start['seat'])
+    points = [0] * num_players
+    winner = dealt_in = None
+    wins = events[events['kind'] == EVENT_WIN]
+    if len(wins):
+        win = wins[0]
+        winner, han = int(win['seat']), int(win['arg'])
+        fu, from_seat = unpack_extra(int(win['extra']))
+        base = hand_points(han, fu)
+        if from_seat != winner:
+            dealt_in = from_seat
+            payment = _round_up(base * (6 if winner == dealer else 4))
+            points[from_seat] -= payment
+            points[winner] += payment
+        else:
+            for seat in range(num_players):
+                if seat != winner:
+                    payment = _round_up(base * (2 if dealer in (seat, winner) else 1))
+                    points[seat] -= payment
+                    points[winner] += payment
+    # 同点は順位を平均する
+    placements = [1 + sum(p > mine for p in points) + (sum(p == mine for p in points) - 1) / 2 for mine in points]
+    return GameResult(points, placements, winner, dealt_in)
+
+def play_match(lineup: Sequence[AgentSpec], seed: int) -> GameResult:
+    """
+    lineup[i] を席iに座らせ、seedで山を固定してヘッドレスで1局打ちます。
+    """
+    random.seed(seed)
+    recorder = MemoryRecorder()
+    game = MahjongGame(len(lineup), recorder=recorder, human_seats=(), agents=[spec.build() for spec in lineup],
+                       load_images=False, verbose=False)
+    game.play_headless()
+    return score_events(recorder.events())
+
+def play_block(lineup: Sequence[AgentSpec], seed: int) -> List[List[tuple]]:
+    """
+    同じ山（seed）で席を一周回して打ち、対局ごとに (名前, 収支, 順位, 和了, 放銃) の一覧を返します。
+    """
+    games = []
+    size = len(lineup)
+    for rotation in range(size):
+        seated = [lineup[(seat - rotation) % size] for seat in range(size)]
+        result = play_match(seated, seed)
+        games.append([(spec.name, result.points[seat], result.placements[seat], result.winner == seat,
+                       result.dealt_in == seat) for seat, spec in enumerate(seated)])
+    return games
+
+@dataclass
+class AgentStats:
+    """
+    参加者ごとの集計。deal_ins_measuredがFalseのとき（対局エンジンにロンがない）は放銃が起こりえないため、
+    放銃率は None とし、信頼区間・要約にも含めません。
+    """
+    name: str
+    points: List[int] = field(default_factory=list)
+    placements: List[float] = field(default_factory=list)
+    wins: int = 0
+    deal_ins: int = 0
+    deal_ins_measured: bool = True
+
+    @property
+    def games(self) -> int:
+        return len(self.points)
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    @property
+    def deal_in_rate(self) -> Optional[float]:
+        if not self.deal_ins_measured:
+            return None
+        return self.deal_ins / self.games if self.games else 0.0
+
+    @property
+    def mean_placement(self) -> float:
+        return float(np.mean(self.placements)) if self.placements else 0.0
+
+    @property
+    def mean_points(self) -> float:
+        return float(np.mean(self.points)) if self.points else 0.0
+
+    def confidence_intervals(self, confidence: float = 0.95) -> Dict[str, tuple]:
+        """
+        正規近似による信頼区間（勝率・放銃率はWilson区間）。
+        """
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        n = max(self.games, 1)
+
+        def wilson(successes: int) -> tuple:
+            p = successes / n
+            center = (p + z * z / (2 * n)) / (1 + z * z / n)
+            half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+            return center - half, center + half
+
+        def normal(values: List[float]) -> tuple:
+            mean = float(np.mean(values)) if values else 0.0
+            half = z * float(np.std(values, ddof=1)) / math.sqrt(n) if len(values) > 1 else math.inf
+            return mean - half, mean + half
+
+        intervals = {
+            'win_rate': wilson(self.wins),
+            'placement': normal(self.placements),
+            'points': normal(self.points),
+        }
+        if self.deal_ins_measured:
+            intervals['deal_in_rate'] = wilson(self.deal_ins)
+        return intervals
+
+    def summary(self) -> str:
+        ci = self.confidence_intervals()
+        low, high = ci['placement']
+        deal_in = f"{self.deal_in_rate:.3f}" if self.deal_ins_measured else "未計測"
+        return (f"{self.name}: {self.games}局 和了率 {self.win_rate:.3f} 放銃率 {deal_in} "
+                f"平均順位 {self.mean_placement:.2f} [{low:.2f}, {high:.2f}] 平均収支 {self.mean_points:+.0f}")
+
+class Tournament:
+    """
+    席を回転させ、同じ山を全員が打つ（シード複製）ブロック単位で対局をプロセスプールに割り振ります。
+    lineup[0] を評価対象とし、他の参加者との平均順位の差が有意になった時点で打ち切れます。
+    """
+
+    def __init__(self, lineup: Sequence[AgentSpec], num_workers: int = 0, seed: int = 0,
+                 alpha: Optional[float] = 0.05, min_blocks: int = 8):
+        if len(lineup) < 2 or len(lineup) > 4:
+            raise ValueError("参加者は2人から4人までです。")
+        self.lineup = list(lineup)
+        self.num_workers = num_workers
+        self.seed = seed
+        self.alpha = alpha
+        self.min_blocks = min_blocks
+        self.stats: Dict[str, AgentStats] = {spec.name: AgentStats(spec.name, deal_ins_measured=MahjongGame.SUPPORTS_RON)
+                                             for spec in lineup}
+        self.block_differences: List[float] = []
+
+    def _add_block(self, games: List[List[tuple]]) -> None:
+        candidate = self.lineup[0].name
+        mine, others = [], []
+        for game in games:
+            for name, points, placement, won, dealt_in in game:
+                stats = self.stats[name]
+                stats.points.append(points)
+                stats.placements.append(placement)
+                stats.wins += int(won)
+                stats.deal_ins += int(dealt_in)
+                (mine if name == candidate else others).append(placement)
+        if others:
+            self.block_differences.append(float(np.mean(others) - np.mean(mine)))
+
+    def z_score(self) -> float:
+        """
+        ブロックごとの順位差（他家の平均順位 − 評価対象の平均順位）の平均に対するz値。正なら評価対象が優勢です。
+        """
+        diffs = np.asarray(self.block_differences)
+        if len(diffs) < 2:
+            return 0.0
+        std = diffs.std(ddof=1)
+        if std == 0:
+            return 0.0 if diffs.mean() == 0 else math.copysign(math.inf, diffs.mean())
+        return float(diffs.mean() / (std / math.sqrt(len(diffs))))
+
+    def significant(self) -> bool:
+        if self.alpha is None or len(self.block_differences) < self.min_blocks:
+            return False
+        return abs(self.z_score()) > NormalDist().inv_cdf(1 - self.alpha / 2)
+
+    def run(self, num_blocks: int, on_block: Optional[Callable[[Tournament, int], None]] = None
+            ) -> Dict[str, AgentStats]:
+        """
+        最大num_blocksブロック（各ブロックは参加人数分の対局）を打ちます。
+        on_blockはブロックを集計するたびに呼ばれます（例外を投げると中断します）。
+        """
+        seeds = [self.seed + block for block in range(num_blocks)]
+        if self.num_workers <= 0:
+            for index, seed in enumerate(seeds):
+                self._add_block(play_block(self.lineup, seed))
+                if on_block is not None:
+                    on_block(self, index)
+                if self.significant():
+                    break
+            return self.stats
+
+        ctx = mp.get_context('spawn')
+        with ProcessPoolExecutor(self.num_workers, mp_context=ctx) as pool:
+            pending = set()
+            completed = 0
+            seed_iter = iter(seeds)
+            try:
+                while True:
+                    # 打ち切りに素早く反応できるよう、先行投入はワーカー数の2倍までにする
+                    for seed in seed_iter:
+                        pending.add(pool.submit(play_block, self.lineup, seed))
+                        if len(pending) >= self.num_workers * 2:
+                            break
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._add_block(future.result())
+                        if on_block is not None:
+                            on_block(self, completed)
+                        completed += 1
+                    if self.significant():
+                        break
+            finally:
+                for future in pending:
+                    future.cancel()
+        return self.stats
+
+def main():
+    parser = argparse.ArgumentParser(description="AI同士のトーナメントを実行します。")
+    parser.add_argument('agents', nargs='+', help="名前=モジュール:関数 形式。最初の参加者を評価対象とします")
+    parser.add_argument('--blocks', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--alpha', type=float, default=0.05)
+    args = parser.parse_args()
+    lineup = []
+    for item in args.agents:
+        name, _, factory = item.partition('=')
+        lineup.append(AgentSpec(name, factory or 'tournament:heuristic_agent'))
+    tournament = Tournament(lineup, args.workers, args.seed, args.alpha)
+    for stats in tournament.run(args.blocks).values():
+        print(stats.summary())
+    print(f"z = {tournament.z_score():.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# trainer.py
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.data import DataLoader, IterableDataset, get_worker_info
+from dataset import ChunkedDatasetReader
+
+Batch = Dict[str, torch.Tensor]
+TRAIN_COLUMNS = ['obs', 'policy', 'value']
+
+@dataclass
+class TrainStats:
+    samples: int = 0
+    steps: int = 0
+    seconds: float = 0.0
+    loss: float = 0.0
+    policy_loss: float = 0.0
+    value_loss: float = 0.0
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.samples / self.seconds if self.seconds > 0 else 0.0
+
+def collate_examples(examples: Sequence[Tuple[Any, Sequence[float], float]]) -> Batch:
+    """
+    (state, mcts_probs, winner) のリストをバッチテンソルにまとめます。
+    stateはエンコーダーが出力した特徴プレーン [NUM_PLANES, 34] です。
+    """
+    states, probs, winners = zip(*examples)
+    return {
+        'obs': torch.from_numpy(np.stack(states)),
+        'policy': torch.from_numpy(np.asarray(probs, dtype=np.float32)),
+        'value': torch.from_numpy(np.asarray(winners, dtype=np.float32)),
+    }
+
+class ReplayStoreDataset(IterableDataset):
+    """
+    学習データストア（HDF5）からミニバッチを流すデータセット。
+    DataLoaderのワーカーごとにファイルを開き、チャンクを分担して読みます。
+    各バッチには読み出し位置 'cursor'（ワーカー番号, そのワーカーでの通し番号）を付けます。
+    """
+
+    def __init__(self, path: str, batch_size: int, seed: int = 0, shuffle: bool = True,
+                 transform: Optional[Callable[[Dict[str, np.ndarray]], Dict[str, np.ndarray]]] = None):
+        self.path = path
+        self.batch_size = batch_size
+        self.seed = seed
+        self.shuffle = shuffle
+        self.transform = transform
+        self.epoch = 0
+        self.start: Sequence[int] = ()
+
+    def set_epoch(self, epoch: int, start: Sequence[int] = ()) -> None:
+        """
+        startはワーカーごとに読み飛ばすバッチ数です（途中から再開する場合）。
+        """
+        self.epoch = epoch
+        self.start = list(start)
+
+    def __iter__(self):
+        info = get_worker_info()
+        worker_id, num_workers = (info.id, info.num_workers) if info else (0, 1)
+        with ChunkedDatasetReader(self.path, columns=TRAIN_COLUMNS) as reader:
+            chunk_ids = range(worker_id, reader.num_chunks, num_workers)
+            seed = self.seed + self.epoch * 1000 + worker_id
+            skip = self.start[worker_id] if worker_id < len(self.start) else 0
+            reseed = getattr(self.transform, 'reseed', None)
+            for index, batch in enumerate(reader.iter_batches(self.batch_size, shuffle=self.shuffle, seed=seed,
+                                                              chunk_ids=chunk_ids, start=skip), skip):
+                if self.transform is not None:
+                    if reseed is not None:
+                        # 乱数をバッチの位置から決め、途中から再開しても同じ変換になるようにする
+                        reseed(self.epoch, worker_id, index)
+                    batch = self.transform(batch)
+                tensors = {name: torch.from_numpy(np.ascontiguousarray(values)) for name, values in batch.items()}
+                tensors['cursor'] = torch.tensor([worker_id, index])
+                yield tensors
+
+def make_loader(path: str, batch_size: int = 256, num_workers: int = 2, seed: int = 0,
+                transform=None) -> DataLoader:
+    """
+    ワーカープロセスで先読みするDataLoaderを作成します。
+    DataLoaderには専用の乱数生成器を渡し、チェックポイントで保存・復元する大域の乱数を消費させません。
+    """
+    dataset = ReplayStoreDataset(path, batch_size, seed=seed, transform=transform)
+    return DataLoader(dataset, batch_size=None, num_workers=num_workers,
+                      pin_memory=torch.cuda.is_available(), generator=torch.Generator().manual_seed(seed))
+
+class BatchTrainer:
+    """
+    方策・価値ネットワークをミニバッチ単位で学習します。勾配累積に対応します。
+    """
+
+    def __init__(self, model: nn.Module, optimizer: torch.optim.Optimizer, accumulation_steps: int = 1,
+                 num_threads: Optional[int] = None, device: Optional[torch.device] = None):
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.model = model
+        self.optimizer = optimizer
+        self.accumulation_steps = max(accumulation_steps, 1)
+        self.device = device or next(model.parameters()).device
+        self._pending = 0
+
+    def compute_loss(self, batch: Batch) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        バッチ全体の方策損失（交差エントロピー）と価値損失（二乗誤差）を計算します。
+        """
+        obs = batch['obs'].to(self.device, non_blocking=True)
+        target_policy = batch['policy'].to(self.device, non_blocking=True)
+        target_value = batch['value'].to(self.device, non_blocking=True)
+        policy_logits, value = self.model(obs)
+        policy_loss = -(target_policy * F.log_softmax(policy_logits, dim=-1)).sum(dim=-1).mean()
+        value_loss = F.mse_loss(value.squeeze(-1), target_value)
+        return policy_loss + value_loss, policy_loss, value_loss
+
+    def train_step(self, batch: Batch) -> Tuple[float, float, float]:
+        """
+        1バッチ分の勾配を加算し、accumulation_steps回ごとにパラメータを更新します。
+        """
+        self.model.train()
+        loss, policy_loss, value_loss = self.compute_loss(batch)
+        (loss / self.accumulation_steps).backward()
+        self._pending += 1
+        if self._pending == self.accumulation_steps:
+            self.optimizer.step()
+            self.optimizer.zero_grad(set_to_none=True)
+            self._pending = 0
+        return loss.item(), policy_loss.item(), value_loss.item()
+
+    def fit(self, batches: Iterable[Batch], log_every: int = 0,
+            on_batch: Optional[Callable[[Batch, bool], None]] = None) -> TrainStats:
+        """
+        バッチ列を1巡学習し、処理サンプル数と毎秒サンプル数を返します。
+        on_batchはバッチごとに (バッチ, パラメータを更新したか) で呼ばれます（定期的なチェックポイント用）。
+        """
+        stats = TrainStats()
+        self.optimizer.zero_grad(set_to_none=True)
+        start = time.perf_counter()
+        for batch in batches:
+            loss, policy_loss, value_loss = self.train_step(batch)
+            stats.samples += len(batch['value'])
+            stats.steps += 1
+            stats.loss += loss
+            stats.policy_loss += policy_loss
+            stats.value_loss += value_loss
+            if on_batch is not None:
+                on_batch(batch, self._pending == 0)
+            if log_every and stats.steps % log_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"step {stats.steps}: loss={loss:.4f}, {stats.samples / elapsed:.0f} samples/s")
+        if self._pending:
+            # 端数の累積勾配も反映する
+            self.optimizer.step()
+            self.optimizer.zero_grad(set_to_none=True)
+            self._pending = 0
+        stats.seconds = time.perf_counter() - start
+        if stats.steps:
+            stats.loss /= stats.steps
+            stats.policy_loss /= stats.steps
+            stats.value_loss /= stats.steps
+        return stats
+
+def iterate_examples(examples: List[Tuple[Any, Sequence[float], float]], batch_size: int,
+                     shuffle: bool = True,
+                     transform: Optional[Callable[[Dict[str, np.ndarray]], Dict[str, np.ndarray]]] = None
+                     ) -> Iterable[Batch]:
+    """
+    メモリ上の例をシャッフルしてバッチ単位で返します。transformはNumPyのバッチに適用します。
+    """
+    order = np.random.permutation(len(examples)) if shuffle else np.arange(len(examples))
+    for start in range(0, len(order), batch_size):
+        batch = collate_examples([examples[i] for i in order[start:start + batch_size]])
+        if transform is not None:
+            arrays = transform({name: values.numpy() for name, values in batch.items()})
+            batch = {name: torch.from_numpy(np.ascontiguousarray(values)) for name, values in arrays.items()}
+        yield batch
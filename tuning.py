@@ -0,0 +1,108 @@
+# tuning.py
+
+from typing import Callable, Optional
+import argparse
+import importlib
+import multiprocessing as mp
+import warnings
+import optuna
+from optuna.exceptions import ExperimentalWarning
+from optuna.storages import RDBStorage, RetryHeartbeatStaleTrialCallback
+from optuna.study import MaxTrialsCallback
+from optuna.trial import TrialState
+
+DEFAULT_STORAGE = 'optuna_study.db'
+DEFAULT_STUDY = 'mahjong_ai'
+DEFAULT_OBJECTIVE = 'marjong:objective'
+
+def create_pruner(name: str) -> optuna.pruners.BasePruner:
+    """
+    枝刈り方式（median / hyperband / none）からPrunerを作成します。
+    """
+    if name == 'median':
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=2)
+    if name == 'hyperband':
+        return optuna.pruners.HyperbandPruner(min_resource=1, max_resource=10)
+    if name == 'none':
+        return optuna.pruners.NopPruner()
+    raise ValueError(f"未対応の枝刈り方式です: {name}")
+
+def create_storage(path: str, heartbeat_interval: int = 60) -> RDBStorage:
+    """
+    ローカルSQLiteのストレージを作成します。
+    ハートビートが途絶えた試行（プロセスの異常終了など）は失敗扱いにし、1回だけ再試行します。
+    """
+    with warnings.catch_warnings():
+        # ハートビートと RetryHeartbeatStaleTrialCallback（廃止予定の failed_trial_callback の後継）は実験的機能の扱い
+        warnings.simplefilter('ignore', ExperimentalWarning)
+        return RDBStorage(
+            url=f"sqlite:///{path}",
+            engine_kwargs={'connect_args': {'timeout': 60}},
+            heartbeat_interval=heartbeat_interval,
+            grace_period=heartbeat_interval * 2,
+            heartbeat_stale_trial_callback=RetryHeartbeatStaleTrialCallback(max_retry=1),
+        )
+
+def load_objective(reference: str) -> Callable[[optuna.Trial], float]:
+    """
+    'モジュール:関数' 形式の参照から目的関数を読み込みます（spawnしたワーカーで使うため）。
+    """
+    module_name, function_name = reference.split(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+FINISHED_STATES = (TrialState.COMPLETE, TrialState.PRUNED)
+
+def _worker(study_name: str, storage_path: str, objective_ref: str, num_trials: int, quota: int, pruner: str,
+            seed: Optional[int]) -> None:
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=create_storage(storage_path),
+        pruner=create_pruner(pruner),
+        sampler=optuna.samplers.TPESampler(seed=seed),
+    )
+    # 各ワーカーは割り当て分だけ試行し、ほかのプロセスが同じスタディを進めて
+    # 完了・枝刈り済みの試行が全体でnum_trialsに達した場合もそこで止まる
+    done = MaxTrialsCallback(num_trials, states=FINISHED_STATES)
+    study.optimize(load_objective(objective_ref), n_trials=quota, callbacks=[done])
+
+def run_study(num_trials: int, num_workers: int = 1, storage_path: str = DEFAULT_STORAGE,
+              study_name: str = DEFAULT_STUDY, objective_ref: str = DEFAULT_OBJECTIVE,
+              pruner: str = 'median', seed: Optional[int] = None) -> optuna.Study:
+    """
+    同じスタディに対してnum_workers個のプロセスで並列に試行し、完了・枝刈り済みの試行を全体でnum_trials個にします。
+    既存のスタディがあれば読み込み、中断前の続きから再開します。
+    """
+    study = optuna.create_study(study_name=study_name, storage=create_storage(storage_path),
+                                direction='maximize', load_if_exists=True)
+    remaining = max(num_trials - len(study.get_trials(deepcopy=False, states=FINISHED_STATES)), 0)
+    if num_workers <= 1:
+        _worker(study_name, storage_path, objective_ref, num_trials, remaining, pruner, seed)
+    else:
+        # 残りの試行数を先に割り振っておき、ワーカー同士が同時に最後の試行を始めて超過しないようにする
+        quotas = [remaining // num_workers + (1 if i < remaining % num_workers else 0) for i in range(num_workers)]
+        ctx = mp.get_context('spawn')
+        workers = [
+            ctx.Process(target=_worker, args=(study_name, storage_path, objective_ref, num_trials, quota, pruner,
+                                              None if seed is None else seed + i))
+            for i, quota in enumerate(quotas) if quota > 0
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    return optuna.load_study(study_name=study_name, storage=create_storage(storage_path))
+
+def main():
+    parser = argparse.ArgumentParser(description="AIのハイパーパラメータを並列に探索します。")
+    parser.add_argument('--trials', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--storage', default=DEFAULT_STORAGE)
+    parser.add_argument('--study', default=DEFAULT_STUDY)
+    parser.add_argument('--objective', default=DEFAULT_OBJECTIVE)
+    parser.add_argument('--pruner', choices=['median', 'hyperband', 'none'], default='median')
+    args = parser.parse_args()
+    study = run_study(args.trials, args.workers, args.storage, args.study, args.objective, args.pruner)
+    print(f"Best trial: {study.best_trial.params}")
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,9 @@ if TYPE_CHECKING:
     from tiles import Tile
 
 class YakuEvaluator:
-    def __init__(self, is_dealer: bool = False):
+    def __init__(self, is_dealer: bool = False, verbose: bool = True):
         self.is_dealer = is_dealer
+        self.verbose = verbose
 
     def evaluate_hand(self, hand: List[Tile], is_closed: bool = True, is_tsumo: bool = True) -> Tuple[List[str], int, int]:
         try:
@@ -19,7 +20,8 @@ class YakuEvaluator:
             fu = self.calculate_fu(hand, yaku_list, is_tsumo, is_closed)
             return yaku_list, total_han, fu
         except Exception as e:
-            print(f"Yaku評価中にエラーが発生しました: {e}")
+            if self.verbose:
+                print(f"Yaku評価中にエラーが発生しました: {e}")
             return [], 0, 0
 
     def check_general_yaku(self, hand: List[Tile], is_closed: bool, is_tsumo: bool) -> List[str]: